@@ -10,6 +10,8 @@ This is a small prototype interpreter for EcoScript supporting a minimal subset:
 
 Note: This MVP uses braces for blocks to simplify the prototype. Later iterations will add indentation-aware parsing.
 """
+__version__ = "0.1.0"
+
 from .cli import main
 
 __all__ = ["tokenizer", "parser", "evaluator", "cli"]
@@ -0,0 +1,333 @@
+import operator
+from array import array as buffer
+from itertools import repeat
+
+# Numeric array values. An Array wraps a contiguous typed buffer of 64-bit
+# ints or doubles: a NumPy ndarray when NumPy is installed, otherwise an
+# array.array ('q' or 'd'). Arithmetic operators broadcast over elements
+# (array op array of the same length, array op number, number op array), so
+# every engine's BinaryOp handles arrays through the ordinary Python
+# operators. Elements come back out as plain Python ints and floats.
+#
+# Both backends behave alike: an integer result that does not fit in 64 bits
+# raises OverflowError (NumPy would wrap around silently), and sum() and dot()
+# of int arrays are exact Python ints.
+#
+# NumPy is imported on first use so scripts that never build an array do not
+# pay for it at startup.
+
+_numpy = False  # not looked up yet
+
+
+def numpy_module():
+    # the numpy module, or None when it is not installed
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+}
+
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+def _is_number(value):
+    return type(value) in (int, float, bool)
+
+
+def _overflow():
+    return OverflowError('integer overflow: array elements must fit in 64 bits')
+
+
+def _int_buffer(values):
+    try:
+        return buffer('q', values)
+    except OverflowError:
+        raise _overflow() from None
+
+
+def _magnitude(value):
+    # largest absolute value in an int64 ndarray, or of an int
+    if type(value) is int or type(value) is bool:
+        return abs(value)
+    if not len(value):
+        return 0
+    return max(-int(value.min()), int(value.max()))
+
+
+def _numpy_ints_overflow(numpy, op, a, b):
+    # whether a op b on int64 operands leaves the int64 range anywhere: the
+    # operands' magnitudes usually rule it out, else Python ints settle it
+    ma = _magnitude(a)
+    mb = _magnitude(b)
+    if (ma * mb if op == '*' else ma + mb) <= _INT64_MAX:
+        return False
+    a = numpy.asarray(a, dtype=object)
+    b = numpy.asarray(b, dtype=object)
+    return any(not _INT64_MIN <= v <= _INT64_MAX for v in numpy.atleast_1d(_OPS[op](a, b)).tolist())
+
+
+class Array:
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data  # ndarray or array.array; arrays are never mutated in place
+
+    @property
+    def is_float(self):
+        data = self.data
+        if type(data) is buffer:
+            return data.typecode == 'd'
+        return data.dtype.kind == 'f'
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        if type(self.data) is buffer:
+            return iter(self.data)
+        return iter(self.data.tolist())
+
+    def tolist(self):
+        return self.data.tolist()
+
+    def __repr__(self):
+        return '[' + ', '.join(repr(v) for v in self.tolist()) + ']'
+
+    def __eq__(self, other):
+        # whole-array equality, so == stays a bool in conditions
+        if type(other) is not Array:
+            return False
+        return self.tolist() == other.tolist()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __neg__(self):
+        data = self.data
+        if type(data) is buffer:
+            if data.typecode == 'q':
+                return Array(_int_buffer(map(operator.neg, data)))
+            return Array(buffer('d', map(operator.neg, data)))
+        if data.dtype.kind == 'i' and (data == _INT64_MIN).any():
+            raise _overflow()
+        return Array(-data)
+
+    def _binary(self, op, other, reflected):
+        if type(other) is Array:
+            if len(other.data) != len(self.data):
+                raise ValueError(f'array length mismatch: {len(self.data)} and {len(other.data)}')
+        elif not _is_number(other):
+            return NotImplemented
+        l, r = (other, self) if reflected else (self, other)
+        return elementwise(op, l, r)
+
+    def __add__(self, other):
+        return self._binary('+', other, False)
+
+    def __radd__(self, other):
+        return self._binary('+', other, True)
+
+    def __sub__(self, other):
+        return self._binary('-', other, False)
+
+    def __rsub__(self, other):
+        return self._binary('-', other, True)
+
+    def __mul__(self, other):
+        return self._binary('*', other, False)
+
+    def __rmul__(self, other):
+        return self._binary('*', other, True)
+
+    def __truediv__(self, other):
+        return self._binary('/', other, False)
+
+    def __rtruediv__(self, other):
+        return self._binary('/', other, True)
+
+    def __mod__(self, other):
+        return self._binary('%', other, False)
+
+    def __rmod__(self, other):
+        return self._binary('%', other, True)
+
+
+def _float_operand(value):
+    if type(value) is Array:
+        return value.is_float
+    return type(value) is float
+
+
+def _has_zero(value):
+    if type(value) is not Array:
+        return value == 0
+    if type(value.data) is buffer:
+        return 0 in value.data
+    return bool((value.data == 0).any())
+
+
+def elementwise(op, l, r):
+    # l op r with at least one Array operand of matching length; dividing by
+    # zero raises like it does for numbers, on either backend
+    if (op == '/' or op == '%') and _has_zero(r):
+        raise ZeroDivisionError('division by zero')
+    some = l if type(l) is Array else r
+    floating = op == '/' or _float_operand(l) or _float_operand(r)
+    fn = _OPS[op]
+    if type(some.data) is not buffer:
+        a = l.data if type(l) is Array else l
+        b = r.data if type(r) is Array else r
+        if not floating:
+            if type(a) is int and not _INT64_MIN <= a <= _INT64_MAX or \
+                    type(b) is int and not _INT64_MIN <= b <= _INT64_MAX:
+                raise _overflow()
+            if op != '%' and _numpy_ints_overflow(numpy_module(), op, a, b):
+                raise _overflow()
+        return Array(fn(a, b))
+    if type(l) is Array and type(r) is Array:
+        values = map(fn, l.data, r.data)
+    elif type(l) is Array:
+        values = map(fn, l.data, repeat(r))
+    else:
+        values = map(fn, repeat(l), r.data)
+    if floating:
+        return Array(buffer('d', values))
+    return Array(_int_buffer(values))
+
+
+def make_array(values):
+    # Array from an iterable of numbers; floats if any element is a float
+    values = list(values)
+    for v in values:
+        if not _is_number(v):
+            raise TypeError(f'array elements must be numbers, not {type(v).__name__}')
+    floating = any(type(v) is float for v in values)
+    numpy = numpy_module()
+    if numpy is not None:
+        try:
+            return Array(numpy.array(values, dtype=numpy.float64 if floating else numpy.int64))
+        except OverflowError:
+            raise _overflow() from None
+    if floating:
+        return Array(buffer('d', values))
+    return Array(_int_buffer(values))
+
+
+def _check(value):
+    if type(value) is not Array:
+        raise TypeError(f'expected an array, not {type(value).__name__}')
+    return value
+
+
+def _scalar(value):
+    # NumPy scalars to plain Python numbers
+    return value.item() if hasattr(value, 'item') else value
+
+
+# builtins
+
+def array_(*values):
+    return make_array(values)
+
+
+def zeros(n):
+    numpy = numpy_module()
+    if numpy is not None:
+        return Array(numpy.zeros(n, dtype=numpy.int64))
+    return Array(buffer('q', bytes(8 * n)))
+
+
+def arange(start, stop=None, step=1):
+    if stop is None:
+        start, stop = 0, start
+    if all(type(v) is int for v in (start, stop, step)):
+        numpy = numpy_module()
+        if numpy is not None:
+            return Array(numpy.arange(start, stop, step, dtype=numpy.int64))
+        return Array(buffer('q', range(start, stop, step)))
+    count = max(0, int(-(-(stop - start) // step)))
+    return make_array(float(start + i * step) for i in range(count))
+
+
+def length(value):
+    return len(value)
+
+
+def at(a, i):
+    return _scalar(_check(a).data[i])
+
+
+def slice_(a, start, stop=None):
+    return Array(_check(a).data[start:stop])
+
+
+def sum_(a):
+    data = _check(a).data
+    if type(data) is buffer:
+        return sum(data)
+    if data.dtype.kind == 'i' and len(data) * _magnitude(data) > _INT64_MAX:
+        # the int64 sum could wrap around
+        return sum(data.tolist())
+    return _scalar(data.sum())
+
+
+def min_(*values):
+    # smallest element of an array, or smallest of several numbers
+    if len(values) != 1:
+        return min(values)
+    data = _check(values[0]).data
+    if not len(data):
+        raise ValueError('min of an empty array')
+    return _scalar(data.min()) if type(data) is not buffer else min(data)
+
+
+def max_(*values):
+    if len(values) != 1:
+        return max(values)
+    data = _check(values[0]).data
+    if not len(data):
+        raise ValueError('max of an empty array')
+    return _scalar(data.max()) if type(data) is not buffer else max(data)
+
+
+def dot(a, b):
+    a, b = _check(a), _check(b)
+    if len(a) != len(b):
+        raise ValueError(f'array length mismatch: {len(a)} and {len(b)}')
+    if type(a.data) is not buffer:
+        if a.data.dtype.kind == 'i' and b.data.dtype.kind == 'i' and \
+                len(a) * _magnitude(a.data) * _magnitude(b.data) > _INT64_MAX:
+            # the int64 products or their sum could wrap around
+            return sum(map(operator.mul, a.data.tolist(), b.data.tolist()))
+        return _scalar(a.data.dot(b.data))
+    return sum(map(operator.mul, a.data, b.data))
+
+
+BUILTINS = {
+    'array': array_,
+    'zeros': zeros,
+    'arange': arange,
+    'len': length,
+    'at': at,
+    'slice': slice_,
+    'sum': sum_,
+    'min': min_,
+    'max': max_,
+    'dot': dot,
+}
@@ -0,0 +1,103 @@
+import asyncio
+from contextlib import contextmanager
+from ecoscript.evaluator import Evaluator, Limits, RETURN
+from ecoscript.resolver import resolve_program
+from ecoscript.ropes import plain
+from ecoscript.stackeval import StackMachine
+
+# Cooperative asyncio front end for the stack machine, for services that run
+# many small, mostly I/O-bound scripts in one event loop:
+#
+#     async def fetch(url): ...
+#     ev = AsyncEvaluator(yield_interval=500)
+#     ev.global_env.set('fetch', fetch)
+#     result = await ev.run_source_async(source)
+#
+# Scripts run on the non-recursive stack machine, whose loop is a generator
+# (see stackeval.py). Every `yield_interval` steps -- loop back-edges and
+# EcoScript calls, the same steps Limits.max_steps counts -- it hands control
+# back to the event loop, so a long loop cannot starve other tasks. A builtin
+# may be an async function (or return any awaitable): the script waits for it
+# without blocking the loop.
+#
+# An AsyncEvaluator runs one script at a time; run many concurrently with one
+# evaluator each. Builtins that call back into EcoScript functions run those
+# calls synchronously.
+
+DEFAULT_YIELD_INTERVAL = 1000
+
+
+class AsyncStackMachine(StackMachine):
+    awaiting = True
+
+    async def execute(self, conts, frames):
+        steps = self.loop(conts, frames)
+        value = None
+        error = None
+        while True:
+            try:
+                if error is None:
+                    awaitable = steps.send(value)
+                else:
+                    awaitable = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value = error = None
+            if awaitable is None:
+                # scheduling point
+                await asyncio.sleep(0)
+                continue
+            try:
+                value = await awaitable
+            except Exception as e:
+                error = e
+
+
+class AsyncEvaluator(Evaluator):
+    def __init__(self, optimize=False, limits=None, output=None, yield_interval=DEFAULT_YIELD_INTERVAL,
+                 memoize=True):
+        if yield_interval < 1:
+            raise ValueError('yield_interval must be at least 1')
+        super().__init__(engine='stack', optimize=optimize, limits=limits or Limits(), output=output,
+                         memoize=memoize)
+        self.yield_interval = yield_interval
+
+    @contextmanager
+    def budget(self):
+        outer = not self.running
+        with super().budget():
+            if outer:
+                # step counting drives the scheduling points
+                self.limited = True
+                self.next_check = self.steps + 1
+            yield
+
+    def check_limits(self):
+        # every check is a scheduling point; with a step limit or timeout to
+        # check as well, it comes at least every CHECK_INTERVAL steps
+        super().check_limits()
+        due = self.steps + self.yield_interval
+        if self.limits.max_steps is None and self.deadline is None or self.next_check > due:
+            self.next_check = due
+
+    async def run_source_async(self, source: str):
+        return await self.run_program_async(self.parse(source))
+
+    async def run_program_async(self, program):
+        if not program.resolved:
+            resolve_program(program)
+        return await self.run_statements_async(program.body)
+
+    async def run_statements_async(self, statements):
+        # statements must already be resolved (see resolver.resolve_statements)
+        if self.running:
+            raise RuntimeError('this AsyncEvaluator is already running a script')
+        machine = AsyncStackMachine(self)
+        env = self.global_env
+        result = None
+        with self.budget():
+            for s in statements:
+                result = await machine.run(s, env)
+                if result is RETURN:
+                    return plain(self.return_value)
+        return plain(result)
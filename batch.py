@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from ecoscript.cache import DEFAULT_MAX_BYTES
+from ecoscript.cli import execute_file
+from ecoscript.evaluator import Evaluator
+from ecoscript.output import MemorySink
+
+# Batch mode (`es --batch dir/ --jobs N`): runs many independent scripts on a
+# pool of worker processes. Each worker imports the interpreter once and keeps
+# one Evaluator, which gets a fresh global environment for every script; the
+# per-script results are reported as JSON lines.
+
+SUFFIX = '.eco'
+
+# per-worker state, set up by _init_worker
+_worker = None
+
+
+def find_scripts(paths):
+    # .eco files under the given directories (recursively) plus any files
+    # named directly, in a stable order
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(SUFFIX))
+        else:
+            found.append(path)
+    return found
+
+
+class BatchWorker:
+    def __init__(self, engine='tree', optimize=False, use_cache=True, cache_size=DEFAULT_MAX_BYTES, memoize=True):
+        self.evaluator = Evaluator(engine=engine, optimize=optimize, memoize=memoize)
+        self.use_cache = use_cache
+        self.cache_size = cache_size
+
+    def run(self, path):
+        ev = self.evaluator
+        ev.reset()
+        out = ev.output = MemorySink()
+        status = 0
+        error = None
+        start = time.perf_counter()
+        try:
+            execute_file(ev, path, self.use_cache, self.cache_size)
+        except Exception as e:
+            status = 1
+            error = f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - start
+        return {'file': path, 'status': status, 'time': round(elapsed, 6),
+                'stdout': out.getvalue(), 'error': error}
+
+
+def _init_worker(options):
+    global _worker
+    _worker = BatchWorker(**options)
+
+
+def _run_in_worker(path):
+    return _worker.run(path)
+
+
+def run_batch(paths, jobs=None, **options):
+    # yields one result dict per script, in the order of `paths`
+    if jobs == 1:
+        worker = BatchWorker(**options)
+        for path in paths:
+            yield worker.run(path)
+        return
+    jobs = jobs or os.cpu_count() or 1
+    # hand scripts out in chunks so small scripts don't pay a round trip each
+    chunksize = max(1, min(64, len(paths) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(options,)) as pool:
+        yield from pool.map(_run_in_worker, paths, chunksize=chunksize)
+
+
+def main_batch(paths, jobs=None, output=None, **options):
+    # writes JSON lines to `output` (default stdout) and a summary to stderr;
+    # returns the exit status: 1 if any script failed
+    output = output or sys.stdout
+    scripts = find_scripts(paths)
+    failed = 0
+    start = time.perf_counter()
+    for result in run_batch(scripts, jobs, **options):
+        failed += result['status'] != 0
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    elapsed = time.perf_counter() - start
+    print(f'batch: {len(scripts)} scripts, {failed} failed, {elapsed:.2f}s', file=sys.stderr)
+    return 1 if failed else 0
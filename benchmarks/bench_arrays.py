@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.arrays import numpy_module
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Bulk numeric work written as a scalar while loop against the same work on
+# arrays: the sum of squares of 0..N-1 and a scaled, shifted copy's sum.
+N = 100000
+
+SCALAR = """
+let i = 0
+let total = 0
+let shifted = 0
+while (i < %d)
+  let total = total + i * i
+  let shifted = shifted + (i * 3 + 1)
+  let i = i + 1
+total + shifted
+""" % N
+
+VECTOR = """
+let a = arange(%d)
+dot(a, a) + sum(a * 3 + 1)
+""" % N
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    print(f"array backend: {'numpy' if numpy_module() else 'array.array'}")
+    scalar = parse_source(SCALAR)
+    vector = parse_source(VECTOR)
+    for engine in ENGINES:
+        t_scalar, a = best_of(lambda: Evaluator(engine=engine).run_program(scalar))
+        t_vector, b = best_of(lambda: Evaluator(engine=engine).run_program(vector))
+        assert a == b, engine
+        print(f'{engine:8s} while loop {t_scalar * 1000:8.1f} ms   arrays {t_vector * 1000:7.1f} ms '
+              f'({t_scalar / t_vector:5.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
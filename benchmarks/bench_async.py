@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.asynceval import AsyncEvaluator
+from ecoscript.evaluator import Evaluator
+from ecoscript.parser import parse_source
+
+# Many small scripts that mostly wait on I/O (a 20 ms `wait()` builtin, three
+# times each): one Evaluator per job on a thread pool, against one
+# AsyncEvaluator per job in a single event loop. Then the worst event loop
+# stall seen by a 1 ms ticker while a CPU-bound script runs, per yield interval.
+JOBS = 1000
+THREADS = 64
+WAIT = 0.02
+
+SCRIPT = parse_source("""
+let total = 0
+let i = 0
+while (i < 3)
+  let total = total + wait()
+  let i = i + 1
+total
+""")
+
+BUSY = parse_source("""
+let i = 0
+while (i < 200000)
+  let i = i + 1
+i
+""")
+
+
+def threaded():
+    def job():
+        ev = Evaluator(engine='stack')
+        ev.global_env.set('wait', lambda: time.sleep(WAIT) or 1)
+        return ev.run_program(SCRIPT)
+    with ThreadPoolExecutor(THREADS) as pool:
+        return sum(f.result() for f in [pool.submit(job) for _ in range(JOBS)])
+
+
+async def wait():
+    await asyncio.sleep(WAIT)
+    return 1
+
+
+async def in_one_loop():
+    async def job():
+        ev = AsyncEvaluator()
+        ev.global_env.set('wait', wait)
+        return await ev.run_program_async(SCRIPT)
+    return sum(await asyncio.gather(*(job() for _ in range(JOBS))))
+
+
+async def worst_stall(yield_interval):
+    stalls = []
+    done = False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - start)
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    await AsyncEvaluator(yield_interval=yield_interval).run_program_async(BUSY)
+    done = True
+    await task
+    return max(stalls)
+
+
+def main():
+    start = time.perf_counter()
+    a = threaded()
+    t_threads = time.perf_counter() - start
+    start = time.perf_counter()
+    b = asyncio.run(in_one_loop())
+    t_async = time.perf_counter() - start
+    assert a == b == 3 * JOBS
+    print(f'{JOBS} waiting jobs   {THREADS} threads {t_threads * 1000:7.0f} ms   '
+          f'one event loop {t_async * 1000:7.0f} ms')
+    for interval in (100, 1000, 10000, 1000000):
+        stall = asyncio.run(worst_stall(interval))
+        print(f'yield every {interval:7d} steps   worst loop stall {stall * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
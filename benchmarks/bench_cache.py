@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.cache import ParseCache, file_hash
+from ecoscript.evaluator import Evaluator
+
+# Startup cost of getting a script's runnable statements the way the CLI
+# does (cli.execute_file): tokenize + parse + resolve the file as it is read
+# on every run, versus hashing it and reading its __ecocache__ entry.
+
+
+def generated_source(functions=300):
+    parts = []
+    for i in range(functions):
+        parts.append(f"""function f{i}(a, b)
+  let c = a * {i} + b
+  if (c > {i * 3})
+    let d = c - {i}
+    return d
+  while (c < {i * 5})
+    let c = c + 1
+  return c
+print(f{i}({i}, {i + 1}))
+""")
+    return ''.join(parts)
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def parse_file(path, cache=None):
+    # the statements of `path`, recorded into `cache` if one is given
+    ev = Evaluator()
+    with open(path, 'r', encoding='utf-8') as f:
+        if cache is None:
+            return list(ev.parse_stream(f))
+        with cache.writer('bench.eco', file_hash(path)) as writer:
+            return list(writer.record(ev.parse_stream(f)))
+
+
+def main():
+    src = generated_source()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'bench.eco')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(src)
+        cache = ParseCache.for_script(path)
+        parse_file(path, cache)
+        t_parse = best_of(lambda: parse_file(path))
+        t_hit = best_of(lambda: cache.open_entry('bench.eco', file_hash(path)))
+        assert cache.open_entry('bench.eco', file_hash(path)) == parse_file(path)
+    print(f'source {len(src) / 1024:.0f} KB   parse {t_parse * 1000:7.1f} ms   cache hit {t_hit * 1000:7.1f} ms   ({t_parse / t_hit:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Per-call overhead: the same loop with and without a call to a function that
+# returns immediately; the difference divided by the call count is the cost
+# of one EcoScript call and return.
+CALLS = 20000
+
+WITH_CALL = """
+function f(x)
+  return x
+let i = 0
+while (i < %d)
+  let i = f(i) + 1
+""" % CALLS
+
+WITHOUT_CALL = """
+let i = 0
+while (i < %d)
+  let i = i + 1
+""" % CALLS
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    for engine in ENGINES:
+        with_call = parse_source(WITH_CALL)
+        without_call = parse_source(WITHOUT_CALL)
+        t_call = best_of(lambda: Evaluator(engine=engine, memoize=False).run_program(with_call))
+        t_loop = best_of(lambda: Evaluator(engine=engine, memoize=False).run_program(without_call))
+        per_call = (t_call - t_loop) / CALLS
+        print(f'{engine:8s} {per_call * 1e9:8.0f} ns per call')
+
+
+if __name__ == '__main__':
+    main()
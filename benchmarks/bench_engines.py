@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Loop-heavy workloads comparing the execution backends against the tree walker.
+WORKLOADS = {
+    'nested_while': """
+let i = 0
+let total = 0
+while (i < 300)
+  let j = 0
+  while (j < 100)
+    let total = total + i * j % 7
+    let j = j + 1
+  let i = i + 1
+total
+""",
+    'fib': """
+function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+fib(18)
+""",
+}
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    for name, src in WORKLOADS.items():
+        tree = parse_source(src)
+        timings = {}
+        results = {}
+        for engine in ENGINES:
+            timings[engine], results[engine] = best_of(lambda: Evaluator(engine=engine, memoize=False).run_program(tree))
+        assert len(set(results.values())) == 1, (name, results)
+        cols = '   '.join(f'{e} {timings[e] * 1000:8.1f} ms ({timings["tree"] / timings[e]:4.2f}x)' for e in ENGINES)
+        print(f'{name:14s} {cols}')
+
+
+if __name__ == '__main__':
+    main()
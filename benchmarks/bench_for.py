@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# The same counted loop written with for over range() and with while, at top
+# level (global counter) and inside a function (counter in a frame slot):
+# time per iteration on each engine. The for loop's counter comes from a
+# native Python range instead of an EcoScript comparison and addition.
+N = 200000
+
+FOR = """
+function total(n)
+  let t = 0
+  for (i in range(n))
+    let t = t + i
+  return t
+%s
+"""
+
+WHILE = """
+function total(n)
+  let t = 0
+  let i = 0
+  while (i < n)
+    let t = t + i
+    let i = i + 1
+  return t
+%s
+"""
+
+GLOBAL_FOR = """
+let t = 0
+for (i in range(%d))
+  let t = t + i
+t
+"""
+
+GLOBAL_WHILE = """
+let t = 0
+let i = 0
+while (i < %d)
+  let t = t + i
+  let i = i + 1
+t
+"""
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    cases = [
+        ('function', parse_source(FOR % f'total({N})'), parse_source(WHILE % f'total({N})')),
+        ('global', parse_source(GLOBAL_FOR % N), parse_source(GLOBAL_WHILE % N)),
+    ]
+    for where, for_loop, while_loop in cases:
+        for engine in ENGINES:
+            t_for, a = best_of(lambda: Evaluator(engine=engine).run_program(for_loop))
+            t_while, b = best_of(lambda: Evaluator(engine=engine).run_program(while_loop))
+            assert a == b == N * (N - 1) // 2, engine
+            print(f'{where:8s} {engine:8s} for {t_for / N * 1e9:6.0f} ns/iter   '
+                  f'while {t_while / N * 1e9:6.0f} ns/iter   {t_while / t_for:4.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Reading globals from inside a function: the same loop reads four globals or
+# four locals per iteration, and a third loop calls a builtin. Globals and
+# builtins go through the inline caches.
+N = 20000
+
+TEMPLATE = """
+let g = 1
+function body(n)
+  let l = 1
+  let i = 0
+  let x = 0
+  while (i < n)
+    let x = %s + %s + %s + %s
+    let i = i + 1
+  return x
+body(%d)
+"""
+
+WORKLOADS = {
+    'global': TEMPLATE % ('g', 'g', 'g', 'g', N),
+    'local': TEMPLATE % ('l', 'l', 'l', 'l', N),
+}
+
+# a builtin called from a hot function
+BUILTIN = """
+function body(n)
+  let i = 0
+  while (i < n)
+    let i = inc(i)
+  return i
+body(%d)
+""" % N
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def run_builtin(engine, program):
+    ev = Evaluator(engine=engine)
+    ev.global_env.set('inc', lambda n: n + 1)
+    return ev.run_program(program)
+
+
+def main():
+    programs = {name: parse_source(src) for name, src in WORKLOADS.items()}
+    builtin = parse_source(BUILTIN)
+    for engine in ENGINES:
+        t_global, _ = best_of(lambda: Evaluator(engine=engine).run_program(programs['global']))
+        t_local, _ = best_of(lambda: Evaluator(engine=engine).run_program(programs['local']))
+        t_builtin, _ = best_of(lambda: run_builtin(engine, builtin))
+        print(f'{engine:8s} globals {t_global / N * 1e9:6.0f}   locals {t_local / N * 1e9:6.0f}   '
+              f'builtin call {t_builtin / N * 1e9:6.0f}  ns/iter')
+
+
+if __name__ == '__main__':
+    main()
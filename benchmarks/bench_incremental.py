@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.incremental import IncrementalParser
+from ecoscript.parser import parse_source
+
+# Two front-end workloads. REPL: a multi-line function typed one line at a
+# time, checking after every line whether it is complete (the old REPL
+# re-parsed the whole buffer and caught the EOF error). Editor: one line of a
+# large file edited repeatedly, re-parsing after every edit.
+BODY_LINES = 200
+FILE_BLOCKS = 3000
+
+
+def repl_lines():
+    lines = ['function big(n)']
+    lines += [f'  let v{i} = n * {i} + 1' for i in range(BODY_LINES)]
+    lines += ['  return n', '']
+    return lines
+
+
+def file_source():
+    return ''.join(f'let v{i} = {i} * 2\nif (v{i} > {i})\n  print(v{i})\n' for i in range(FILE_BLOCKS))
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def repl_reparse(lines):
+    buf = ''
+    for line in lines:
+        buf += line + '\n'
+        try:
+            program = parse_source(buf)
+        except SyntaxError:
+            continue
+    return len(program.body)
+
+
+def repl_incremental(lines):
+    buf = IncrementalParser()
+    for line in lines:
+        buf.append(line)
+        if not buf.needs_more:
+            program = buf.parse()
+    return len(program.body)
+
+
+def edit_reparse(src, edits):
+    lines = src.splitlines()
+    for k in range(edits):
+        lines[-1] = f'  print({k})'
+        program = parse_source('\n'.join(lines))
+    return len(program.body)
+
+
+def edit_incremental(src, edits):
+    lines = src.splitlines()
+    buf = IncrementalParser(src)
+    buf.parse()
+    for k in range(edits):
+        lines[-1] = f'  print({k})'
+        buf.replace(len(lines) - 1, len(lines), [lines[-1]])
+        program = buf.parse()
+    return len(program.body)
+
+
+def main():
+    lines = repl_lines()
+    t_old, a = best_of(lambda: repl_reparse(lines))
+    t_new, b = best_of(lambda: repl_incremental(lines))
+    assert a == b
+    print(f'repl, {len(lines)} lines    re-parse {t_old * 1000:8.1f} ms   incremental {t_new * 1000:6.1f} ms '
+          f'({t_old / t_new:5.1f}x)')
+
+    src = file_source()
+    edits = 20
+    t_old, a = best_of(lambda: edit_reparse(src, edits))
+    t_new, b = best_of(lambda: edit_incremental(src, edits))
+    assert a == b
+    print(f'editor, {src.count(chr(10))} lines, {edits} edits   re-parse {t_old * 1000:8.1f} ms   '
+          f'incremental {t_new * 1000:6.1f} ms ({t_old / t_new:5.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Pure functions with and without automatic memoization, on each engine:
+# naive fib and lattice path counting, whose calls repeat exponentially, and
+# a function called with a new argument every time, where the cache never
+# hits and is retired after MEMO_PROBATION misses (its overhead).
+FIB = """
+function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+fib(22)
+"""
+
+PATHS = """
+function paths(x, y)
+  if (x < 1 || y < 1)
+    return 1
+  return paths(x - 1, y) + paths(x, y - 1)
+paths(9, 9)
+"""
+
+DISTINCT = """
+function sq(x)
+  return x * x
+let t = 0
+for (i in range(100000))
+  let t = t + sq(i)
+t
+"""
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    cases = [('fib', parse_source(FIB)), ('paths', parse_source(PATHS)), ('distinct', parse_source(DISTINCT))]
+    for name, program in cases:
+        for engine in ENGINES:
+            t_off, a = best_of(lambda: Evaluator(engine=engine, memoize=False).run_program(program), repeat=3)
+            ev = Evaluator(engine=engine)
+            t_on, b = best_of(lambda: ev.run_program(program), repeat=3)
+            assert a == b, engine
+            print(f'{name:8s} {engine:8s} memo off {t_off * 1e3:8.2f} ms   memo on {t_on * 1e3:8.2f} ms   '
+                  f'{t_off / t_on:7.1f}x')
+        print(ev.memo_report())
+
+
+if __name__ == '__main__':
+    main()
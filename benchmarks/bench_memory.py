@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+# Memory cost of tokens and AST nodes with __slots__ (the current classes)
+# against the same classes keeping their attributes in a per-instance
+# __dict__ (as before slots): peak traced memory while tokenizing and
+# parsing, and the number of live allocations and bytes the token list and
+# the parsed Program keep per KB of source. Each measurement runs in a fresh
+# interpreter; only tracemalloc is used, so this runs on every platform.
+
+CHILD = r"""
+import dataclasses, sys, tracemalloc
+sys.path.insert(0, {parent!r})
+sys.path.insert(0, {root!r})
+from ecoscript import parser, tokenizer
+from bench_memory import generated_source
+if {layout!r} == 'dict':
+    tokenizer.Token = type('Token', (), {{'__init__': tokenizer.Token.__init__}})
+    for name, cls in list(vars(parser).items()):
+        if dataclasses.is_dataclass(cls) and cls.__module__ == parser.__name__:
+            specs = [(f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory,
+                                                        compare=f.compare, repr=f.repr))
+                     for f in dataclasses.fields(cls)]
+            setattr(parser, name, dataclasses.make_dataclass(name, specs))
+src = generated_source()
+kb = len(src) / 1024
+tracemalloc.start()
+if {what!r} == 'peak':
+    tokens = tokenizer.tokenize(src)
+    program = parser.parse_source(src)
+    print(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+else:
+    if {what!r} == 'tokens':
+        tokens = tokenizer.tokenize(src)
+    else:
+        program = parser.parse_source(src)
+    stats = tracemalloc.take_snapshot().statistics('filename')
+    print(sum(s.count for s in stats) / kb, sum(s.size for s in stats) / kb)
+"""
+
+
+def generated_source(blocks=20000):
+    parts = []
+    for i in range(blocks):
+        parts.append(f"let v{i} = ({i} + 1) * 2 - v{i // 2}\nif (v{i} > {i})\n  print(\"row \" + v{i})\n")
+    return ''.join(parts)
+
+
+def child(what, layout):
+    code = CHILD.format(parent=PARENT, root=os.path.dirname(os.path.abspath(__file__)), what=what, layout=layout)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return [float(x) for x in out.stdout.split()]
+
+
+def main():
+    src_kb = len(generated_source()) / 1024
+    print(f'source {src_kb:.0f} KB; __dict__ nodes -> __slots__ nodes')
+    (before,), (after,) = child('peak', 'dict'), child('peak', 'slots')
+    print(f'peak traced memory (token list + AST)  {before:7.1f} MB -> {after:7.1f} MB  ({after / before:.2f}x)')
+    for what, label in (('tokens', 'token list'), ('ast', 'AST')):
+        (count0, size0), (count1, size1) = child(what, 'dict'), child(what, 'slots')
+        print(f'{label:10s} {count0:6.0f} -> {count1:6.0f} allocations/KB   '
+              f'{size0 / 1024:5.1f} -> {size1 / 1024:5.1f} KB per KB source')
+
+
+if __name__ == '__main__':
+    main()
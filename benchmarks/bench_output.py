@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator
+from ecoscript.output import StreamSink
+from ecoscript.parser import parse_source
+
+# A script that prints N lines to a file: Python's print() per value (the old
+# builtin, with sys.stdout redirected to the file) against the buffered sink
+# under each flush policy.
+N = 200000
+
+SOURCE = """
+let i = 0
+while (i < %d)
+  print(i)
+  let i = i + 1
+""" % N
+
+ENGINES = ('tree', 'vm')
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def run_print(program, engine, path):
+    with open(path, 'w') as f:
+        stdout, sys.stdout = sys.stdout, f
+        try:
+            ev = Evaluator(engine=engine)
+            ev.global_env.set('print', lambda *a: print(*a))
+            ev.run_program(program)
+        finally:
+            sys.stdout = stdout
+
+
+def run_sink(program, engine, path, policy):
+    sink = StreamSink(open(path, 'w'), policy=policy)
+    try:
+        Evaluator(engine=engine, output=sink).run_program(program)
+    finally:
+        sink.close()
+
+
+def main():
+    program = parse_source(SOURCE)
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+    try:
+        for engine in ENGINES:
+            t_print, _ = best_of(lambda: run_print(program, engine, path))
+            print(f'{engine:5s} print()     {t_print * 1000:8.1f} ms')
+            for policy in ('line', 'size', 'exit'):
+                t, _ = best_of(lambda: run_sink(program, engine, path, policy))
+                assert os.path.getsize(path) == sum(len(str(i)) + 1 for i in range(N))
+                print(f'{engine:5s} sink {policy:5s}  {t * 1000:8.1f} ms ({t_print / t:4.2f}x)')
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
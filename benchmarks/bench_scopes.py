@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Variable access and per-call frame cost: identifiers read from enclosing
+# function scopes, locals in recursive calls, and if-blocks.
+WORKLOADS = {
+    'nested_scopes': """
+function outer(a)
+  function mid(b)
+    function inner(n)
+      let acc = 0
+      while (n > 0)
+        if (n % 3 == 0)
+          let bonus = a * b
+          let acc = acc + bonus
+        let acc = acc + a + b
+        let n = n - 1
+      return acc
+    return inner(20000)
+  return mid(2)
+outer(1)
+""",
+    'recursive_fib': """
+function fib(n)
+  if (n < 2)
+    return n
+  let a = fib(n - 1)
+  let b = fib(n - 2)
+  return a + b
+fib(20)
+""",
+}
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    for name, src in WORKLOADS.items():
+        cols = []
+        for engine in ENGINES:
+            elapsed = best_of(lambda: Evaluator(engine=engine, memoize=False).run_program(parse_source(src)))
+            cols.append(f'{engine} {elapsed * 1000:8.1f} ms')
+        print(f'{name:14s} ' + '   '.join(cols))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+# Whole-buffer vs streamed execution of a large generated script: time until
+# the first line of output and peak RSS of the run. Each measurement runs in a
+# fresh interpreter with output discarded.
+
+CHILD = r"""
+import resource, sys, time
+sys.path.insert(0, {parent!r})
+from ecoscript.evaluator import Evaluator
+path = {path!r}
+first = []
+start = time.perf_counter()
+def out(v):
+    if not first:
+        first.append(time.perf_counter() - start)
+ev = Evaluator()
+ev.global_env.set('print', out)
+if {mode!r} == 'buffer':
+    with open(path, encoding='utf-8') as f:
+        ev.run_source(f.read())
+else:
+    with open(path, encoding='utf-8') as f:
+        ev.run_stream(f)
+total = time.perf_counter() - start
+print(first[0], total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def generated_source(blocks=100000):
+    parts = []
+    for i in range(blocks):
+        parts.append(f"let v{i} = ({i} + 1) * 2\nif (v{i} > {i})\n  print(v{i})\n")
+    return ''.join(parts)
+
+
+def child(path, mode):
+    code = CHILD.format(parent=PARENT, path=path, mode=mode)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return [float(x) for x in out.stdout.split()]
+
+
+def main():
+    src = generated_source()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'big.eco')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(src)
+        print(f'source {len(src) / (1024 * 1024):.1f} MB')
+        for mode in ('buffer', 'stream'):
+            first, total, rss = child(path, mode)
+            print(f'{mode:8} first output {first * 1000:8.1f} ms  total {total:6.2f} s  peak RSS {rss:7.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# Building a report with `let s = s + piece` in a loop, at doubling piece
+# counts: time per piece should stay flat as the string grows (ropes make
+# each append O(len(piece)); copying the string every time made it grow
+# with the length). The string is used once at the end, through len().
+SIZES = (25000, 50000, 100000, 200000, 400000)
+
+BUILD = """
+let s = ""
+let i = 0
+while (i < %d)
+  let s = s + "piece 0;"
+  let i = i + 1
+len(s)
+"""
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    for engine in ENGINES:
+        row = []
+        for n in SIZES:
+            program = parse_source(BUILD % n)
+            elapsed, length = best_of(lambda: Evaluator(engine=engine).run_program(program))
+            assert length == 8 * n, engine
+            row.append(f'{n // 1000:4d}k {elapsed * 1e3:7.0f} ms {elapsed / n * 1e9:5.0f} ns/piece')
+        print(f'{engine:8s} ' + '   '.join(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import tracemalloc
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import parse_source
+
+# A loop written as a self tail call against the same loop written with
+# while: time per iteration and peak memory. Without tail calls the
+# recursive version needs one Python (or VM) frame per iteration and fails
+# on the tree and closure engines well before N.
+N = 20000
+
+TAIL = """
+function loop(n, acc)
+  if (n == 0)
+    return acc
+  return loop(n - 1, acc + n)
+loop(%d, 0)
+""" % N
+
+WHILE = """
+let n = %d
+let acc = 0
+while (n > 0)
+  let acc = acc + n
+  let n = n - 1
+acc
+""" % N
+
+
+def best_of(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    tail = parse_source(TAIL)
+    loop = parse_source(WHILE)
+    for engine in ENGINES:
+        run_tail = lambda: Evaluator(engine=engine, memoize=False).run_program(tail)
+        run_loop = lambda: Evaluator(engine=engine, memoize=False).run_program(loop)
+        t_tail, a = best_of(run_tail)
+        t_loop, b = best_of(run_loop)
+        assert a == b, engine
+        print(f'{engine:8s} tail call {t_tail / N * 1e9:7.0f} ns/iter {peak_memory(run_tail) / 1024:7.0f} KiB   '
+              f'while {t_loop / N * 1e9:7.0f} ns/iter {peak_memory(run_loop) / 1024:7.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
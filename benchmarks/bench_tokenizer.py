@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import tracemalloc
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript import tokenizer
+from ecoscript.parser import parse_source
+
+# Tokenizer throughput, time to the first token, and peak traced memory of a
+# full parse on a generated multi-megabyte script.
+
+
+def generated_source(blocks=20000):
+    parts = []
+    for i in range(blocks):
+        parts.append(f"let v{i} = {i} * 2 + 1\nif (v{i} > {i})\n  print(\"row \" + v{i})\n")
+    return ''.join(parts)
+
+
+def main():
+    src = generated_source()
+    size_mb = len(src) / (1024 * 1024)
+
+    start = time.perf_counter()
+    next(tokenizer.iter_tokens(src))
+    t_first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    count = sum(1 for _ in tokenizer.iter_tokens(src))
+    t_all = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse_source(src)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'source {size_mb:.2f} MB, {count} tokens')
+    print(f'first token   {t_first * 1000:8.2f} ms')
+    print(f'all tokens    {t_all * 1000:8.1f} ms ({size_mb / t_all:.1f} MB/s)')
+    print(f'parse peak    {peak / (1024 * 1024):8.1f} MB traced')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript import __version__, tokenizer
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.parser import Parser
+from ecoscript.resolver import resolve_program
+
+# Regression harness: times each phase (tokenize, parse, resolve, run) of a
+# set of representative workloads, writes the results as JSON and compares
+# them with a stored baseline.
+#
+#     python benchmarks/suite.py                          # compare with baseline.json
+#     python benchmarks/suite.py --output new.json        # also save the results
+#     python benchmarks/suite.py --output benchmarks/baseline.json --no-compare
+#
+# Timings are machine specific: refresh baseline.json on the machine that
+# runs the comparison. The exit status is 1 when any phase is slower than the
+# baseline by more than --threshold.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PHASES = ('tokenize', 'parse', 'resolve', 'run')
+
+# phases faster than this are dominated by timer noise and are not compared
+MIN_COMPARED = 0.0005
+
+
+def fib_source(scale):
+    return f"""function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+fib({14 + scale * 4})
+"""
+
+
+def nested_while_source(scale):
+    return f"""let i = 0
+let total = 0
+while (i < {100 * scale})
+  let j = 0
+  while (j < 100)
+    let total = total + i * j % 7
+    let j = j + 1
+  let i = i + 1
+total
+"""
+
+
+def string_building_source(scale):
+    return f"""let s = ""
+let i = 0
+while (i < {2000 * scale})
+  let s = s + "x" + "-"
+  let i = i + 1
+s
+"""
+
+
+def generated_source(scale):
+    # many small top-level statements, like machine-generated scripts
+    parts = []
+    for i in range(2000 * scale):
+        parts.append(f"let v{i} = ({i} + 1) * 2 - {i % 7}\nif (v{i} > {i})\n  let w = v{i} % 3\n")
+    parts.append("0\n")
+    return ''.join(parts)
+
+
+def deep_indentation_source(scale):
+    # deeply nested blocks, repeated so the tokenizer's indent stack works hard
+    depth = 40
+    parts = []
+    for r in range(10 * scale):
+        for d in range(depth):
+            parts.append('  ' * d + f'if ({d} < {depth})\n')
+        parts.append('  ' * depth + f'let leaf{r} = {r}\n')
+    parts.append("0\n")
+    return ''.join(parts)
+
+
+WORKLOADS = {
+    'fib': fib_source,
+    'nested_while': nested_while_source,
+    'string_building': string_building_source,
+    'generated_source': generated_source,
+    'deep_indentation': deep_indentation_source,
+}
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times)}, result
+
+
+def run_workload(src, repeat, engine):
+    phases = {}
+    phases['tokenize'], tokens = timed(lambda: tokenizer.tokenize(src), repeat)
+    # parse and resolve work on fresh copies so every repeat does the same work
+    phases['parse'], _ = timed(lambda: Parser(tokens).parse(), repeat)
+    programs = [Parser(tokens).parse() for _ in range(repeat)]
+    phases['resolve'], _ = timed(lambda: resolve_program(programs.pop()), repeat)
+    # and so does run: a program that already ran carries warm inline caches
+    # and BinaryOp specializations into the next repeat
+    programs = [resolve_program(Parser(tokens).parse()) for _ in range(repeat)]
+    # memoization off: the fib workload measures calls, not the result cache
+    phases['run'], _ = timed(lambda: Evaluator(engine=engine, memoize=False).run_program(programs.pop()), repeat)
+    return phases
+
+
+def run_suite(names=None, repeat=5, scale=1, engine='tree'):
+    results = {}
+    for name, make in WORKLOADS.items():
+        if names and name not in names:
+            continue
+        src = make(scale)
+        results[name] = run_workload(src, repeat, engine)
+    return {
+        'meta': {
+            'ecoscript': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine': engine,
+            'repeat': repeat,
+            'scale': scale,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    # rows of (workload, phase, baseline s, current s, ratio, regressed)
+    rows = []
+    for name, phases in current['results'].items():
+        old_phases = baseline.get('results', {}).get(name)
+        if old_phases is None:
+            continue
+        for phase in PHASES:
+            if phase not in phases or phase not in old_phases:
+                continue
+            old = old_phases[phase]['min']
+            new = phases[phase]['min']
+            ratio = new / old if old else float('inf')
+            regressed = max(old, new) >= MIN_COMPARED and ratio > 1 + threshold
+            rows.append((name, phase, old, new, ratio, regressed))
+    return rows
+
+
+def print_results(data):
+    print(f"{'workload':<18} " + ' '.join(f'{p:>11}' for p in PHASES))
+    for name, phases in data['results'].items():
+        cols = ' '.join(f"{phases[p]['min'] * 1000:9.2f}ms" for p in PHASES)
+        print(f'{name:<18} {cols}')
+
+
+def print_comparison(rows, threshold):
+    print()
+    print(f"{'workload':<18} {'phase':<9} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, phase, old, new, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<18} {phase:<9} {old * 1000:8.2f}ms {new * 1000:8.2f}ms {ratio - 1:>+8.1%}{flag}')
+    bad = sum(1 for row in rows if row[-1])
+    print(f'\n{bad} regression(s) over the {threshold:.0%} threshold')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EcoScript benchmark suite')
+    parser.add_argument('workloads', nargs='*', metavar='WORKLOAD',
+                        help=f"subset to run ({', '.join(WORKLOADS)})")
+    parser.add_argument('--repeat', type=int, default=5, help='runs per phase; the fastest is compared')
+    parser.add_argument('--scale', type=int, default=1, help='workload size multiplier')
+    parser.add_argument('--engine', choices=ENGINES, default='tree')
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', default=DEFAULT_BASELINE,
+                        help='JSON results to compare against (default: benchmarks/baseline.json)')
+    parser.add_argument('--no-compare', action='store_true', help='skip the baseline comparison')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed slowdown before a phase counts as a regression (default: 0.15)')
+    args = parser.parse_args(argv)
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+
+    data = run_suite(args.workloads, args.repeat, args.scale, args.engine)
+    print_results(data)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.write('\n')
+    if args.no_compare or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('scale') != args.scale or baseline['meta'].get('engine') != args.engine:
+        print('\nbaseline was recorded with a different --scale/--engine; not comparing')
+        return 0
+    rows = compare(data, baseline, args.threshold)
+    print_comparison(rows, args.threshold)
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import pickle
+import sys
+from ecoscript import __version__
+
+# On-disk cache of resolved ASTs, kept in an __ecocache__ directory next to
+# the script much like __pycache__. Entries are named
+#
+#     <script name>.<sha256 of source>.<interpreter tag>.pickle
+#
+# so an edited script or a different interpreter version never hits a stale
+# entry. Stale entries are removed when a fresh one is stored, and the
+# directory is kept under a size bound by evicting least recently used
+# entries (a hit refreshes the entry's mtime).
+#
+# An entry is a sequence of pickled top-level statements followed by an end
+# marker, so it can be written one statement at a time while a script is
+# streamed (EntryWriter). It is read back in full before any statement runs:
+# a truncated, corrupt or incompatible entry is removed and counts as a miss,
+# instead of failing the run halfway through.
+
+CACHE_DIR_NAME = '__ecocache__'
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# bump when the pickled AST layout changes
+CACHE_FORMAT = 8
+SUFFIX = '.pickle'
+END_MARKER = pickle.dumps('ecoscript-cache-end', pickle.HIGHEST_PROTOCOL)
+
+
+def cache_tag():
+    # no dots, so entry names split cleanly
+    version = __version__.replace('.', '_')
+    return f'eco{version}-f{CACHE_FORMAT}-py{sys.version_info[0]}{sys.version_info[1]}'
+
+
+def source_hash(source):
+    if isinstance(source, str):
+        source = source.encode('utf-8')
+    return hashlib.sha256(source).hexdigest()
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class EntryWriter:
+    # Pickles statements into a temporary file as they stream past and
+    # publishes the entry only if the whole stream was consumed without error.
+    def __init__(self, cache, name, key):
+        self.cache = cache
+        self.name = name
+        self.path = cache.path_for(name, key)
+        self.tmp = f'{self.path}.{os.getpid()}.tmp'
+        self.complete = False
+        self.committed = False
+        try:
+            os.makedirs(cache.directory, exist_ok=True)
+            self.file = open(self.tmp, 'wb')
+        except OSError:
+            # read-only location: run without caching
+            self.file = None
+
+    def record(self, statements):
+        for s in statements:
+            if self.file is not None:
+                try:
+                    pickle.dump(s, self.file, pickle.HIGHEST_PROTOCOL)
+                    if self.file.tell() > self.cache.max_bytes:
+                        self.abort()
+                except (pickle.PicklingError, RecursionError, OSError):
+                    self.abort()
+            yield s
+        self.complete = True
+
+    def commit(self):
+        if self.file is None:
+            return False
+        try:
+            self.file.write(END_MARKER)
+            self.file.close()
+            self.file = None
+            os.replace(self.tmp, self.path)
+        except OSError:
+            self.abort()
+            return False
+        self.cache._drop_stale(self.name, self.path)
+        self.cache.evict()
+        return True
+
+    def abort(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            except OSError:
+                pass
+            self.file = None
+        self.cache._remove(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.complete:
+            self.committed = self.commit()
+        else:
+            self.abort()
+        return False
+
+
+class ParseCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.tag = cache_tag()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_script(cls, path, max_bytes=DEFAULT_MAX_BYTES):
+        directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+        return cls(directory, max_bytes)
+
+    def path_for(self, name, key):
+        return os.path.join(self.directory, f'{name}.{key}.{self.tag}{SUFFIX}')
+
+    def entry_path(self, name, source):
+        return self.path_for(name, source_hash(source))
+
+    def open_entry(self, name, key):
+        # list of the cached resolved statements, or None on a miss
+        path = self.path_for(name, key)
+        try:
+            with open(path, 'rb') as f:
+                statements = self._read(f)
+        except OSError:
+            return None
+        if statements is None:
+            # unreadable entry: drop it and reparse
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return statements
+
+    def _read(self, f):
+        # the statements up to the end marker; None if the entry is truncated,
+        # corrupt or pickled from AST classes that no longer match
+        statements = []
+        try:
+            while True:
+                s = pickle.load(f)
+                if isinstance(s, str):
+                    return statements
+                statements.append(s)
+        except Exception:
+            # UnpicklingError, EOFError, AttributeError for a renamed class...:
+            # arbitrary bytes can make pickle raise almost anything
+            return None
+
+    def writer(self, name, key):
+        return EntryWriter(self, name, key)
+
+    def entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        out = []
+        for n in names:
+            if not n.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, n)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def evict(self):
+        entries = self.entries()
+        # entries written by another interpreter version can never hit
+        live = []
+        for mtime, size, path in entries:
+            if not path.endswith(f'.{self.tag}{SUFFIX}'):
+                self._remove(path)
+            else:
+                live.append((mtime, size, path))
+        total = sum(size for _, size, _ in live)
+        for mtime, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    def _drop_stale(self, name, current):
+        # earlier versions of the same script
+        prefix = name + '.'
+        for _, _, path in self.entries():
+            base = os.path.basename(path)
+            if not base.startswith(prefix) or path == current:
+                continue
+            parts = base[len(prefix):].split('.')
+            if len(parts) == 3 and len(parts[0]) == 64:
+                self._remove(path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
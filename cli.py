@@ -1,46 +1,146 @@
 import argparse
+import os
+import sys
 from ecoscript import tokenizer
-from ecoscript.parser import parse_source
-from ecoscript.evaluator import Evaluator
+from ecoscript.cache import ParseCache, DEFAULT_MAX_BYTES, file_hash
+from ecoscript.evaluator import Evaluator, ENGINES
+from ecoscript.incremental import IncrementalParser
+from ecoscript.output import StreamSink
+from ecoscript.profiler import Profiler
 
-def run_file(path):
+def run_file(path, engine='tree', use_cache=True, cache_size=DEFAULT_MAX_BYTES, optimize=False,
+             profiler=None, output=None, memoize=True, memo_stats=False):
+    # the script is parsed and run one top-level statement at a time, so a
+    # huge script starts running before it has been read in full
+    ev = Evaluator(engine=engine, optimize=optimize, output=output, memoize=memoize)
+    try:
+        if profiler is None:
+            return execute_file(ev, path, use_cache, cache_size)
+        profiler.attach(ev)
+        with profiler:
+            return execute_file(ev, path, use_cache, cache_size)
+    finally:
+        if optimize and ev.optimizer.nodes_before:
+            print(ev.optimizer.report(), file=sys.stderr)
+        if memo_stats:
+            print(ev.memo_report(), file=sys.stderr)
+
+def execute_file(ev, path, use_cache=True, cache_size=DEFAULT_MAX_BYTES):
+    # run the script at `path` in `ev`'s current global environment
+    if not use_cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            return ev.run_stream(f)
+    cache = ParseCache.for_script(path, max_bytes=cache_size)
+    name = os.path.basename(path)
+    if ev.optimizer is not None:
+        # optimized ASTs are cached separately from plain ones
+        name += '-O'
+    key = file_hash(path)
+    cached = cache.open_entry(name, key)
+    if cached is not None:
+        cache.hits += 1
+        return ev.run_statements(cached)
+    cache.misses += 1
+    with open(path, 'r', encoding='utf-8') as f, cache.writer(name, key) as writer:
+        return ev.run_statements(writer.record(ev.parse_stream(f)))
+
+def report_profile(profiler, path, output=None):
     with open(path, 'r', encoding='utf-8') as f:
-        src = f.read()
-    ev = Evaluator()
-    ev.run_source(src)
+        lines = f.read().splitlines()
+    print(profiler.format_report(lines), file=sys.stderr)
+    output = output or path + '.collapsed'
+    profiler.write_collapsed(output)
+    print(f'collapsed stacks written to {output}', file=sys.stderr)
 
-def repl():
-    ev = Evaluator()
+def repl(engine='tree', optimize=False, output=None, memoize=True):
+    ev = Evaluator(engine=engine, optimize=optimize, output=output, memoize=memoize)
     print('EcoScript REPL (type "exit" to quit)')
-    buf = ''
+    # lines are lexed as they arrive; the buffer is parsed once it is complete
+    buf = IncrementalParser()
     while True:
         try:
-            line = input('> ')
+            line = input('. ' if buf.lines else '> ')
         except EOFError:
             break
         if line.strip() == 'exit':
             break
-        buf += line + '\n'
-        # try to parse and run
+        buf.append(line)
+        if buf.needs_more:
+            continue
+        program = buf.parse()
+        error = buf.error
+        buf.clear()
+        if error is not None:
+            print('Error:', error)
+            continue
         try:
-            tree = parse_source(buf)
-            ev.eval(tree)
-            buf = ''
+            if ev.optimizer is not None:
+                ev.optimizer.optimize_program(program)
+            ev.run_program(program)
         except Exception as e:
-            # wait for more input or print error
-            if 'Unexpected EOF' in str(e) or 'in block' in str(e):
-                continue
             print('Error:', e)
-            buf = ''
 
 def main():
     parser = argparse.ArgumentParser(prog='es')
     parser.add_argument('file', nargs='?', help='EcoScript file to run')
+    parser.add_argument('--engine', choices=ENGINES, default='tree',
+                        help='execution backend: tree walker, closure compiler, bytecode VM or stack machine')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the __ecocache__ parse cache')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024), metavar='MB',
+                        help='size bound for each __ecocache__ directory (default: %(default)g MB)')
+    parser.add_argument('-O', dest='optimize', action='store_true',
+                        help='fold constant expressions and drop dead branches before running')
+    parser.add_argument('--no-memo', dest='memoize', action='store_false',
+                        help='do not cache the results of pure functions (caching is on by default, so '
+                             'cached calls do not run and --profile counts only the calls that did)')
+    parser.add_argument('--memo-stats', action='store_true',
+                        help='report cache hits and misses per pure function after the run')
+    parser.add_argument('--profile', action='store_true',
+                        help='sample the run and report wall time and calls per EcoScript function and line')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='collapsed-stack file for flame graph tools (default: <script>.collapsed)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='write printed output to FILE instead of stdout')
+    parser.add_argument('--unbuffered', action='store_true',
+                        help='write each printed line out immediately (default: only on a terminal)')
+    parser.add_argument('--batch', metavar='DIR',
+                        help='run every .eco file under DIR on a process pool and print JSON lines')
+    parser.add_argument('--jobs', type=int, metavar='N',
+                        help='worker processes for --batch (default: CPU count)')
     args = parser.parse_args()
-    if args.file:
-        run_file(args.file)
-    else:
-        repl()
+    if args.profile and args.engine != 'tree':
+        parser.error('--profile needs --engine=tree')
+    if args.batch:
+        if args.file or args.profile or args.unbuffered or args.memo_stats:
+            parser.error('--batch cannot be combined with a script, --profile, --unbuffered or --memo-stats')
+        from ecoscript.batch import main_batch
+        output = open(args.output, 'w', encoding='utf-8') if args.output else None
+        try:
+            status = main_batch([args.batch], jobs=args.jobs, output=output, engine=args.engine,
+                                optimize=args.optimize, use_cache=not args.no_cache,
+                                cache_size=int(args.cache_size * 1024 * 1024), memoize=args.memoize)
+        finally:
+            if output is not None:
+                output.close()
+        sys.exit(status)
+    stream = open(args.output, 'w', encoding='utf-8') if args.output else None
+    output = StreamSink(stream, policy='line' if args.unbuffered else None)
+    try:
+        if args.file:
+            profiler = Profiler() if args.profile else None
+            try:
+                run_file(args.file, engine=args.engine, use_cache=not args.no_cache,
+                         cache_size=int(args.cache_size * 1024 * 1024), optimize=args.optimize,
+                         profiler=profiler, output=output, memoize=args.memoize,
+                         memo_stats=args.memo_stats)
+            finally:
+                if profiler is not None:
+                    report_profile(profiler, args.file, args.profile_output)
+        else:
+            repl(engine=args.engine, optimize=args.optimize, output=output, memoize=args.memoize)
+    finally:
+        output.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,394 @@
+from ecoscript.parser import *
+from ecoscript.evaluator import Environment, Frame, Function, RETURN, BINARY_OPS, _UNSET, \
+    CallDepthExceeded, StringLimitExceeded, string_checked_ops, loop_values, TEXT
+from ecoscript.memo import MISS
+from ecoscript.ropes import Rope, add, concat, plain, plain_args
+from ecoscript.resolver import GLOBAL
+
+# Closure compiler: turns a resolved AST into a tree of pre-bound Python
+# closures. Each closure takes the current scope (a Frame, or the global
+# Environment at top level) and returns the node's value, so node dispatch,
+# operator lookup and variable slot resolution happen once at compile time
+# instead of on every visit.
+
+def _add(l, r):
+    # + with the rope check inlined (see ropes.py)
+    def add(env):
+        a = l(env)
+        if type(a) is str:
+            return concat(a, r(env))
+        return a + r(env)
+    return add
+
+# Inline the hot operators so the compiled closure does not need an extra call.
+_BINOP_FACTORIES = {
+    '+':  _add,
+    '-':  lambda l, r: (lambda env: l(env) - r(env)),
+    '*':  lambda l, r: (lambda env: l(env) * r(env)),
+    '/':  lambda l, r: (lambda env: l(env) / r(env)),
+    '%':  lambda l, r: (lambda env: l(env) % r(env)),
+    '==': lambda l, r: (lambda env: l(env) == r(env)),
+    '!=': lambda l, r: (lambda env: l(env) != r(env)),
+    '<':  lambda l, r: (lambda env: l(env) < r(env)),
+    '<=': lambda l, r: (lambda env: l(env) <= r(env)),
+    '>':  lambda l, r: (lambda env: l(env) > r(env)),
+    '>=': lambda l, r: (lambda env: l(env) >= r(env)),
+    # short-circuit: the right operand only runs when it decides the result
+    '&&': lambda l, r: (lambda env: bool(l(env)) and bool(r(env))),
+    '||': lambda l, r: (lambda env: bool(l(env)) or bool(r(env))),
+}
+
+
+class CompiledFunction(Function):
+    def __init__(self, decl: FunctionDecl, env, body):
+        super().__init__(decl, env)
+        self.body = body
+    def invoke(self, args, evaluator):
+        if self.body(self.new_frame(args)) is RETURN:
+            if evaluator.tail_call is None:
+                return evaluator.return_value
+            return self.tail_calls(evaluator)
+        return None
+    def call(self, args, evaluator):
+        # invoke() inlined: this is the hot path
+        memo = self.memo
+        limited = evaluator.limited
+        if memo is None and not limited:
+            if self.body(self.new_frame(args)) is RETURN:
+                if evaluator.tail_call is None:
+                    return evaluator.return_value
+                return self.tail_calls(evaluator)
+            return None
+        # Memo.call() and Evaluator.call_limited() inlined too, see
+        # Function.call
+        key = None
+        if memo is not None:
+            key, value = memo.get(self, args)
+            if value is not MISS:
+                return value
+        if limited:
+            max_depth = evaluator.limits.max_depth
+            if max_depth is not None and evaluator.depth >= max_depth:
+                raise CallDepthExceeded(f'more than {max_depth} nested calls')
+            evaluator.steps += 1
+            if evaluator.steps >= evaluator.next_check:
+                evaluator.check_limits()
+            evaluator.depth += 1
+        try:
+            if self.body(self.new_frame(args)) is RETURN:
+                value = evaluator.return_value if evaluator.tail_call is None else self.tail_calls(evaluator)
+            else:
+                value = None
+        finally:
+            if limited:
+                evaluator.depth -= 1
+        if key is not None:
+            memo.put(key, value)
+        return value
+    def run_body(self, frame, evaluator):
+        return self.body(frame)
+
+
+class CompiledProgram:
+    def __init__(self, program: Program, code):
+        self.program = program
+        self.code = code
+    def __call__(self, env):
+        return self.code(env)
+
+
+class Compiler:
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+
+    def compile(self, node):
+        method = getattr(self, 'compile_' + node.__class__.__name__, None)
+        if method is None:
+            raise NotImplementedError('compile_' + node.__class__.__name__)
+        return method(node)
+
+    def compile_statements(self, statements):
+        stmts = tuple(self.compile(s) for s in statements)
+        if len(stmts) == 1:
+            return stmts[0]
+        def run(env):
+            for s in stmts:
+                if s(env) is RETURN:
+                    return RETURN
+        return run
+
+    def compile_Program(self, node: Program):
+        evaluator = self.evaluator
+        stmts = tuple(self.compile(s) for s in node.body)
+        def run(env):
+            result = None
+            for s in stmts:
+                result = s(env)
+                if result is RETURN:
+                    return evaluator.return_value
+            return result
+        return CompiledProgram(node, run)
+
+    def compile_LetStmt(self, node: LetStmt):
+        name = node.name
+        slot = node.slot
+        expr = self.compile(node.expr) if node.expr is not None else (lambda env: None)
+        if slot is None:
+            def let(env):
+                env.set(name, expr(env))
+            return let
+        def let_slot(env):
+            env.slots[slot] = expr(env)
+        return let_slot
+
+    def compile_ExprStmt(self, node: ExprStmt):
+        return self.compile(node.expr)
+
+    def compile_NumberLiteral(self, node: NumberLiteral):
+        value = node.value
+        return lambda env: value
+
+    def compile_StringLiteral(self, node: StringLiteral):
+        value = node.value
+        return lambda env: value
+
+    def compile_Identifier(self, node: Identifier):
+        name = node.name
+        depth = node.depth
+        slot = node.slot
+        if depth is None:
+            return lambda env: env.get(name)
+        if depth == GLOBAL:
+            # inline cache, see Environment.version
+            cache = [0, None]
+            def global_(env):
+                genv = env.globals
+                if cache[0] == genv.version:
+                    return cache[1]
+                cache[1] = genv.get(name)
+                cache[0] = genv.version
+                return cache[1]
+            return global_
+        if depth == 0:
+            def local(env):
+                value = env.slots[slot]
+                if value is _UNSET:
+                    return env.get(name)
+                return value
+            return local
+        def outer(env):
+            frame = env
+            for _ in range(depth):
+                frame = frame.parent
+            value = frame.slots[slot]
+            if value is _UNSET:
+                return env.get(name)
+            return value
+        return outer
+
+    def compile_BinaryOp(self, node: BinaryOp):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        limits = self.evaluator.limits
+        if limits is not None and limits.max_string is not None and node.op in ('+', '*'):
+            return self.compile_checked_op(node.op, left, right, limits.max_string)
+        factory = _BINOP_FACTORIES.get(node.op)
+        if factory is not None:
+            return factory(left, right)
+        if node.op not in BINARY_OPS:
+            raise NotImplementedError(f'Operator {node.op}')
+        op = BINARY_OPS[node.op]
+        return lambda env: op(left(env), right(env))
+
+    def compile_checked_op(self, op, left, right, max_string):
+        # + and * under a string size limit (see evaluator.string_checked_ops);
+        # only a text operand can make a string, numbers go straight through
+        if op == '+':
+            def checked_add(env):
+                l = left(env)
+                r = right(env)
+                if type(l) is str or type(l) is Rope:
+                    if type(r) in TEXT and len(l) + len(r) > max_string:
+                        raise StringLimitExceeded(f'string longer than {max_string} characters')
+                    return add(l, r)
+                return l + r
+            return checked_add
+        mul = string_checked_ops(max_string)['*']
+        def checked_mul(env):
+            l = left(env)
+            r = right(env)
+            if type(l) in TEXT or type(r) in TEXT:
+                return mul(l, r)
+            return l * r
+        return checked_mul
+
+    def compile_UnaryOp(self, node: UnaryOp):
+        operand = self.compile(node.operand)
+        if node.op == '-':
+            return lambda env: -operand(env)
+        if node.op == '!':
+            return lambda env: not operand(env)
+        raise NotImplementedError(node.op)
+
+    def compile_PrintStmt(self, node: PrintStmt):
+        expr = self.compile(node.expr)
+        evaluator = self.evaluator
+        cache = [0, None]
+        def print_stmt(env):
+            v = expr(env)
+            # `print` is a keyword, so it can only be bound globally
+            genv = env.globals
+            if cache[0] == genv.version:
+                builtin = cache[1]
+            else:
+                builtin = cache[1] = genv.get('print')
+                cache[0] = genv.version
+            if builtin is evaluator.print_builtin or not callable(builtin):
+                evaluator.output.write(f'{v}\n')
+            else:
+                return builtin(plain(v))
+        return print_stmt
+
+    def compile_Block(self, node: Block):
+        body = self.compile_statements(node.statements)
+        layout = node.layout
+        if layout is None:
+            return lambda env: body(Environment(env))
+        if not layout.size:
+            return body
+        size = layout.size
+        def block(env):
+            return body(Frame([_UNSET] * size, env, layout))
+        return block
+
+    def compile_IfStmt(self, node: IfStmt):
+        cond = self.compile(node.condition)
+        then_block = self.compile_Block(node.then_block)
+        if node.else_block is None:
+            def if_stmt(env):
+                if cond(env):
+                    return then_block(env)
+            return if_stmt
+        else_block = self.compile_Block(node.else_block)
+        def if_else(env):
+            if cond(env):
+                return then_block(env)
+            return else_block(env)
+        return if_else
+
+    def compile_WhileStmt(self, node: WhileStmt):
+        evaluator = self.evaluator
+        cond = self.compile(node.condition)
+        body = self.compile_statements(node.body.statements)
+        def while_stmt(env):
+            if evaluator.limited:
+                while cond(env):
+                    if body(env) is RETURN:
+                        return RETURN
+                    evaluator.steps += 1
+                    if evaluator.steps >= evaluator.next_check:
+                        evaluator.check_limits()
+                return
+            while cond(env):
+                if body(env) is RETURN:
+                    return RETURN
+        return while_stmt
+
+    def compile_ForStmt(self, node: ForStmt):
+        evaluator = self.evaluator
+        name = node.name
+        slot = node.slot
+        iterable = self.compile(node.iterable)
+        body = self.compile_statements(node.body.statements)
+        if slot is None:
+            def for_global(env):
+                limited = evaluator.limited
+                for value in loop_values(iterable(env)):
+                    env.set(name, value)
+                    if body(env) is RETURN:
+                        return RETURN
+                    if limited:
+                        evaluator.steps += 1
+                        if evaluator.steps >= evaluator.next_check:
+                            evaluator.check_limits()
+            return for_global
+        def for_stmt(env):
+            values = loop_values(iterable(env))
+            slots = env.slots
+            if evaluator.limited:
+                for slots[slot] in values:
+                    if body(env) is RETURN:
+                        return RETURN
+                    evaluator.steps += 1
+                    if evaluator.steps >= evaluator.next_check:
+                        evaluator.check_limits()
+                return
+            # the counter goes straight into its frame slot
+            for slots[slot] in values:
+                if body(env) is RETURN:
+                    return RETURN
+        return for_stmt
+
+    def compile_FunctionDecl(self, node: FunctionDecl):
+        name = node.name
+        slot = node.slot
+        body = self.compile_statements(node.body.statements)
+        memoized = self.evaluator.memoized
+        if slot is None:
+            def function_decl(env):
+                env.set(name, memoized(CompiledFunction(node, env, body)))
+            return function_decl
+        def function_decl_slot(env):
+            env.slots[slot] = memoized(CompiledFunction(node, env, body))
+        return function_decl_slot
+
+    def compile_ReturnStmt(self, node: ReturnStmt):
+        evaluator = self.evaluator
+        if node.tail is not None:
+            return self.compile_tail_return(node)
+        expr = self.compile(node.expr) if node.expr is not None else (lambda env: None)
+        def return_stmt(env):
+            evaluator.return_value = expr(env)
+            return RETURN
+        return return_stmt
+
+    def compile_tail_return(self, node: ReturnStmt):
+        # see Evaluator.eval_ReturnStmt
+        evaluator = self.evaluator
+        decl = node.tail
+        callee_fn = self.compile(node.expr.callee)
+        arg_fns = tuple(self.compile(a) for a in node.expr.args)
+        def tail_return(env):
+            callee = callee_fn(env)
+            args = [a(env) for a in arg_fns]
+            if type(callee) is CompiledFunction and callee.decl is decl:
+                evaluator.tail_call = callee
+                evaluator.tail_args = args
+            elif callable(callee):
+                evaluator.return_value = callee(*plain_args(args))
+            elif isinstance(callee, Function):
+                evaluator.return_value = callee.call(args, evaluator)
+            else:
+                raise TypeError('Not callable')
+            return RETURN
+        return tail_return
+
+    def compile_CallExpr(self, node: CallExpr):
+        evaluator = self.evaluator
+        callee_fn = self.compile(node.callee)
+        arg_fns = tuple(self.compile(a) for a in node.args)
+        def call(env):
+            callee = callee_fn(env)
+            args = [a(env) for a in arg_fns]
+            # builtin function
+            if callable(callee):
+                return callee(*plain_args(args))
+            # user function
+            if isinstance(callee, Function):
+                return callee.call(args, evaluator)
+            raise TypeError('Not callable')
+        return call
+
+
+def compile_program(program: Program, evaluator) -> CompiledProgram:
+    return Compiler(evaluator).compile_Program(program)
@@ -1,13 +1,183 @@
+import itertools
+import operator
+import time
+from contextlib import contextmanager
 from ecoscript.parser import *
+from ecoscript import tokenizer
+from ecoscript.arrays import Array, BUILTINS as ARRAY_BUILTINS
+from ecoscript.memo import MISS, Memo, MemoStats
+from ecoscript.output import StreamSink
+from ecoscript.ropes import Rope, add, concat, plain, plain_args
+from ecoscript.resolver import GLOBAL, Resolver, resolve_program, resolve_statements
 
-class ReturnException(Exception):
-    def __init__(self, value):
-        self.value = value
+# Operator implementations shared by the compiled backends.
+BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '&&': lambda l, r: bool(l) and bool(r),
+    '||': lambda l, r: bool(l) or bool(r),
+}
+
+# BINARY_OPS as the engines run them: + builds long strings as ropes (see
+# ropes.py). The tree walker, closure compiler and VM inline the same check.
+RUNTIME_OPS = dict(BINARY_OPS)
+RUNTIME_OPS['+'] = add
+
+UNARY_OPS = {
+    '-': operator.neg,
+    '!': operator.not_,
+}
+
+# What a for loop runs over: the values of a range(...) or an array.
+def loop_values(value):
+    if type(value) is range:
+        return value
+    if type(value) is Array:
+        return value
+    raise TypeError(f'for needs a range or an array, not {type(plain(value)).__name__}')
+
+# && and || evaluate their right operand only when it decides the result;
+# the compiled backends get the same behaviour from their own code.
+def _and(evaluator, node, env):
+    return bool(evaluator.eval(node.left, env)) and bool(evaluator.eval(node.right, env))
+
+def _or(evaluator, node, env):
+    return bool(evaluator.eval(node.left, env)) or bool(evaluator.eval(node.right, env))
+
+LOGICAL_OPS = {'&&': _and, '||': _or}
+
+# Adaptive specialization of BinaryOp in the tree walker. A node starts out
+# generic; once its operands have had the same numeric type SPECIALIZE_AFTER
+# times in a row it gets a handler (BinaryOp.fast) with its operator and
+# operand access resolved in advance, guarded by that type. When the guard
+# fails the node goes back to the generic path for good (fast = False).
+SPECIALIZE_AFTER = 8
+
+def _operand(node):
+    # fetch function for one operand of a specialized BinaryOp
+    t = type(node)
+    if t is NumberLiteral:
+        value = node.value
+        return lambda evaluator, env: value
+    if t is Identifier and node.depth == 0:
+        slot = node.slot
+        name = node.name
+        def local(evaluator, env):
+            value = env.slots[slot]
+            if value is _UNSET:
+                return env.get(name)
+            return value
+        return local
+    if t is Identifier:
+        return lambda evaluator, env: evaluator.eval_Identifier(node, env)
+    return lambda evaluator, env: evaluator.eval(node, env)
+
+def specialize(node: BinaryOp, kind):
+    # handler for `node` once its operands have settled on type `kind`
+    op = BINARY_OPS[node.op]
+    left = _operand(node.left)
+    right = _operand(node.right)
+    def fast(evaluator, node, env):
+        l = left(evaluator, env)
+        r = right(evaluator, env)
+        if type(l) is kind and type(r) is kind:
+            return op(l, r)
+        # types changed: deoptimize
+        node.fast = False
+        return evaluator.binary_ops[node.op](l, r)
+    fast.kind = kind
+    return fast
+
+# Statements return RETURN once a return statement has run; the value itself
+# is left in Evaluator.return_value. This keeps function returns off Python's
+# exception machinery.
+class _Return:
+    __slots__ = ()
+    def __repr__(self):
+        return 'RETURN'
+
+RETURN = _Return()
+
+# Execution limits. A step is one loop iteration or one function call, so
+# the counters live on the loop back-edge and the call path and a run without
+# limits only pays a flag test there.
+class LimitExceeded(RuntimeError):
+    # an EcoScript run went over one of its Limits
+    pass
+
+class StepLimitExceeded(LimitExceeded):
+    pass
+
+class ExecutionTimeout(LimitExceeded):
+    pass
+
+class CallDepthExceeded(LimitExceeded):
+    pass
+
+class StringLimitExceeded(LimitExceeded):
+    pass
+
+class Limits:
+    __slots__ = ('max_steps', 'timeout', 'max_depth', 'max_string')
+    def __init__(self, max_steps=None, timeout=None, max_depth=None, max_string=None):
+        self.max_steps = max_steps    # loop iterations + calls per run
+        self.timeout = timeout        # wall-clock seconds per run
+        self.max_depth = max_depth    # nested EcoScript calls
+        self.max_string = max_string  # length of strings built by + and *
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Limits(**values)
+    def __repr__(self):
+        set_ = ', '.join(f'{n}={getattr(self, n)!r}' for n in self.__slots__ if getattr(self, n) is not None)
+        return f'Limits({set_})'
+
+# steps between two clock reads
+CHECK_INTERVAL = 1024
+
+def string_checked_ops(max_string):
+    # RUNTIME_OPS with + and * refusing to build strings over max_string;
+    # sizes are checked before the string is allocated
+    def checked_add(l, r):
+        if type(l) in TEXT:
+            if type(r) in TEXT and len(l) + len(r) > max_string:
+                raise StringLimitExceeded(f'string longer than {max_string} characters')
+            return add(l, r)
+        return l + r
+    def mul(l, r):
+        if type(l) in TEXT and type(r) is int and len(l) * r > max_string or \
+                type(r) in TEXT and type(l) is int and len(r) * l > max_string:
+            raise StringLimitExceeded(f'string longer than {max_string} characters')
+        return l * r
+    ops = dict(RUNTIME_OPS)
+    ops['+'] = checked_add
+    ops['*'] = mul
+    return ops
+
+# string values: str, or a Rope while + is still building it
+TEXT = (str, Rope)
+
+# Environment versions come from one counter, so an inline cache entry
+# (version, value) can only match the environment state it was read from,
+# whichever environment that was.
+_versions = itertools.count(1)
 
 class Environment:
+    # dict-backed scope used for globals (and for code that was never resolved)
     def __init__(self, parent=None):
         self.parent = parent
         self.values = {}
+        self.globals = parent.globals if parent is not None else self
+        self.version = next(_versions)
     def get(self, name):
         if name in self.values:
             return self.values[name]
@@ -16,26 +186,265 @@ class Environment:
         raise NameError(f"Name '{name}' is not defined")
     def set(self, name, value):
         self.values[name] = value
+        self.version = next(_versions)
+
+def cached_global(node, genv, name):
+    # genv.get(name) through the inline cache on `node`
+    cache = node.cache
+    if cache is not None and cache[0] == genv.version:
+        return cache[1]
+    value = genv.get(name)
+    node.cache = (genv.version, value)
+    return value
+
+# marks a frame slot whose binding has not run yet
+_UNSET = object()
+
+class Frame:
+    # list-backed local scope laid out by the resolver
+    __slots__ = ('slots', 'parent', 'layout', 'globals')
+    def __init__(self, slots, parent, layout):
+        self.slots = slots
+        self.parent = parent
+        self.layout = layout
+        self.globals = parent.globals
+    def get(self, name):
+        # by-name lookup, for bindings the resolver could not pin down statically
+        env = self
+        while type(env) is Frame:
+            slot = env.layout.index.get(name)
+            if slot is not None:
+                value = env.slots[slot]
+                if value is not _UNSET:
+                    return value
+            env = env.parent
+        return env.get(name)
+    def set(self, name, value):
+        slot = self.layout.index.get(name)
+        if slot is None:
+            raise NameError(f"Name '{name}' has no slot in this scope")
+        self.slots[slot] = value
 
 class Function:
-    def __init__(self, decl: FunctionDecl, env: Environment):
+    memo = None  # result cache of a pure function, see Evaluator.memoized()
+
+    def __init__(self, decl: FunctionDecl, env):
         self.decl = decl
         self.env = env
+    def new_frame(self, args):
+        decl = self.decl
+        n = len(decl.params)
+        slots = args[:n] if type(args) is list else list(args[:n])
+        if len(slots) < n:
+            slots.extend([None] * (n - len(slots)))
+        extra = decl.layout.size - n
+        if extra:
+            slots.extend([_UNSET] * extra)
+        return Frame(slots, self.env, decl.layout)
+    def invoke(self, args, evaluator):
+        # the call itself, without limit accounting
+        if evaluator.eval_block(self.decl.body, self.new_frame(args)) is RETURN:
+            if evaluator.tail_call is None:
+                return evaluator.return_value
+            return self.tail_calls(evaluator)
+        return None
     def call(self, args, evaluator):
-        new_env = Environment(self.env)
-        for i, p in enumerate(self.decl.params):
-            new_env.set(p, args[i] if i < len(args) else None)
+        # invoke() inlined: this is the hot path
+        memo = self.memo
+        limited = evaluator.limited
+        if memo is None and not limited:
+            if evaluator.eval_block(self.decl.body, self.new_frame(args)) is RETURN:
+                if evaluator.tail_call is None:
+                    return evaluator.return_value
+                return self.tail_calls(evaluator)
+            return None
+        # Memo.call() and Evaluator.call_limited() inlined too, so a
+        # recursive call costs no extra Python frames
+        key = None
+        if memo is not None:
+            key, value = memo.get(self, args)
+            if value is not MISS:
+                return value
+        if limited:
+            max_depth = evaluator.limits.max_depth
+            if max_depth is not None and evaluator.depth >= max_depth:
+                raise CallDepthExceeded(f'more than {max_depth} nested calls')
+            evaluator.steps += 1
+            if evaluator.steps >= evaluator.next_check:
+                evaluator.check_limits()
+            evaluator.depth += 1
         try:
-            evaluator.eval_block(self.decl.body, new_env)
-        except ReturnException as r:
-            return r.value
-        return None
+            if evaluator.eval_block(self.decl.body, self.new_frame(args)) is RETURN:
+                value = evaluator.return_value if evaluator.tail_call is None else self.tail_calls(evaluator)
+            else:
+                value = None
+        finally:
+            if limited:
+                evaluator.depth -= 1
+        if key is not None:
+            memo.put(key, value)
+        return value
+    def run_body(self, frame, evaluator):
+        return evaluator.eval_block(self.decl.body, frame)
+    def tail_calls(self, evaluator):
+        # the body returned through a self tail call (see eval_ReturnStmt):
+        # run the calls it left in evaluator.tail_call one after another, in
+        # this Python frame, until one returns normally
+        while True:
+            function = evaluator.tail_call
+            evaluator.tail_call = None
+            if evaluator.limited:
+                evaluator.steps += 1
+                if evaluator.steps >= evaluator.next_check:
+                    evaluator.check_limits()
+            if function.run_body(function.new_frame(evaluator.tail_args), evaluator) is not RETURN:
+                return None
+            if evaluator.tail_call is None:
+                return evaluator.return_value
+
+ENGINES = ('tree', 'closure', 'vm', 'stack')
 
 class Evaluator:
-    def __init__(self):
+    default_engine = 'tree'
+
+    def __init__(self, engine=None, optimize=False, limits=None, output=None, memoize=True):
+        self.engine = engine or self.default_engine
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{self.engine}' (expected one of {', '.join(ENGINES)})")
+        # constant folding pass applied to parsed source (see optimizer.py)
+        self.optimizer = None
+        if optimize:
+            from ecoscript.optimizer import Optimizer
+            self.optimizer = Optimizer()
+        self.limits = limits
+        # where print writes (see output.py); flushed at the end of each run
+        self.output = output if output is not None else StreamSink()
+        # result caches for pure functions (see memo.py)
+        self.memoize = memoize
+        # per-run limit state, see budget()
+        self.limited = False
+        self.running = False
+        self.steps = 0
+        self.next_check = 0
+        self.depth = 0
+        self.deadline = None
+        self.binary_ops = RUNTIME_OPS
+        self.reset()
+
+    def reset(self):
+        # fresh global environment holding only the builtins
         self.global_env = Environment()
+        self.return_value = None
+        # id(FunctionDecl) -> MemoStats, which keeps the declaration alive
+        self.memo_stats = {}
+        # a pending self tail call: the function and its arguments
+        self.tail_call = None
+        self.tail_args = None
         # builtins
-        self.global_env.set('print', lambda *a: print(*a))
+        self.print_builtin = self.print_values
+        self.global_env.set('print', self.print_builtin)
+        self.global_env.set('range', range)
+        for name, builtin in ARRAY_BUILTINS.items():
+            self.global_env.set(name, builtin)
+
+    def print_values(self, *values):
+        # the print builtin
+        if len(values) == 1:
+            self.output.write(f'{values[0]}\n')
+        else:
+            self.output.write(' '.join(map(str, values)) + '\n')
+
+    def memoized(self, function):
+        # `function`, given a result cache if its declaration is pure
+        decl = function.decl
+        if self.memoize and decl.pure_reads is not None:
+            stats = self.memo_stats.get(id(decl))
+            if stats is None:
+                stats = self.memo_stats[id(decl)] = MemoStats(decl)
+            function.memo = Memo(stats)
+        return function
+
+    def memo_report(self):
+        # one line per pure function declaration
+        stats = sorted(self.memo_stats.values(), key=lambda s: (s.decl.name, s.decl.line))
+        lines = [f'memo: {s.decl.name} (line {s.decl.line}) {s.hits} hits, {s.misses} misses' for s in stats]
+        return '\n'.join(lines) if lines else 'memo: no pure functions called'
+
+    def snapshot(self):
+        # the global bindings, for restore()
+        return dict(self.global_env.values)
+
+    def restore(self, snapshot):
+        # a new global environment holding exactly the snapshotted bindings;
+        # functions defined since still refer to the old one
+        self.global_env = Environment()
+        self.global_env.values.update(snapshot)
+        self.global_env.version = next(_versions)
+        self.return_value = None
+        self.memo_stats = {}
+
+    @contextmanager
+    def budget(self):
+        # the limits apply to each top-level run; nested entry points share
+        # the outer run's budget
+        if self.running:
+            yield
+            return
+        limits = self.limits
+        self.steps = self.depth = 0
+        self.deadline = None
+        self.binary_ops = RUNTIME_OPS
+        if limits is not None:
+            if limits.timeout is not None:
+                self.deadline = time.monotonic() + limits.timeout
+            if limits.max_string is not None:
+                self.binary_ops = string_checked_ops(limits.max_string)
+            self.limited = (limits.max_steps is not None or limits.max_depth is not None
+                            or self.deadline is not None)
+            self.next_check = self.steps + 1
+        self.running = True
+        try:
+            yield
+        except RecursionError:
+            raise CallDepthExceeded('maximum call depth exceeded (Python recursion limit)') from None
+        finally:
+            self.running = False
+            self.limited = False
+            self.output.flush()
+
+    def check_limits(self):
+        # called when steps reaches next_check
+        limits = self.limits
+        if limits.max_steps is not None and self.steps > limits.max_steps:
+            raise StepLimitExceeded(f'more than {limits.max_steps} steps')
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExecutionTimeout(f'ran for more than {limits.timeout} seconds')
+        self.next_check = self.steps + CHECK_INTERVAL
+        if limits.max_steps is not None and self.next_check > limits.max_steps + 1:
+            self.next_check = limits.max_steps + 1
+
+    def enter_call(self):
+        max_depth = self.limits.max_depth
+        if max_depth is not None and self.depth >= max_depth:
+            raise CallDepthExceeded(f'more than {max_depth} nested calls')
+        self.steps += 1
+        if self.steps >= self.next_check:
+            self.check_limits()
+        self.depth += 1
+
+    def call_limited(self, function, args):
+        # enter_call() inlined
+        max_depth = self.limits.max_depth
+        if max_depth is not None and self.depth >= max_depth:
+            raise CallDepthExceeded(f'more than {max_depth} nested calls')
+        self.steps += 1
+        if self.steps >= self.next_check:
+            self.check_limits()
+        self.depth += 1
+        try:
+            return function.invoke(args, self)
+        finally:
+            self.depth -= 1
 
     def eval(self, node, env=None):
         if env is None:
@@ -46,16 +455,24 @@ class Evaluator:
         raise NotImplementedError(method)
 
     def eval_Program(self, node: Program, env: Environment):
+        if not node.resolved:
+            resolve_program(node)
         result = None
         for s in node.body:
             result = self.eval(s, env)
+            if result is RETURN:
+                # a top-level return ends the program with its value
+                return self.return_value
         return result
 
     def eval_LetStmt(self, node: LetStmt, env: Environment):
         val = None
         if node.expr is not None:
             val = self.eval(node.expr, env)
-        env.set(node.name, val)
+        if node.slot is None:
+            env.set(node.name, val)
+        else:
+            env.slots[node.slot] = val
         return None
 
     def eval_ExprStmt(self, node: ExprStmt, env: Environment):
@@ -68,17 +485,64 @@ class Evaluator:
         return node.value
 
     def eval_Identifier(self, node: Identifier, env: Environment):
-        return env.get(node.name)
+        depth = node.depth
+        if depth is None:
+            return env.get(node.name)
+        if depth == 0:
+            value = env.slots[node.slot]
+        elif depth == GLOBAL:
+            # inline cache, see Environment.version
+            genv = env.globals
+            cache = node.cache
+            if cache is not None and cache[0] == genv.version:
+                return cache[1]
+            value = genv.get(node.name)
+            node.cache = (genv.version, value)
+            return value
+        else:
+            frame = env
+            while depth:
+                frame = frame.parent
+                depth -= 1
+            value = frame.slots[node.slot]
+        if value is _UNSET:
+            return env.get(node.name)
+        return value
 
     def eval_BinaryOp(self, node: BinaryOp, env: Environment):
+        fast = node.fast
+        if fast:
+            return fast(self, node, env)
+        op = node.op
+        if fast is None and op in LOGICAL_OPS:
+            node.fast = fast = LOGICAL_OPS[op]
+            return fast(self, node, env)
         l = self.eval(node.left, env)
         r = self.eval(node.right, env)
-        op = node.op
+        if fast is None:
+            # warming up: count evaluations with matching numeric operands
+            t = type(l)
+            if t is type(r) and (t is int or t is float):
+                node.hits += 1
+                if node.hits >= SPECIALIZE_AFTER:
+                    node.fast = specialize(node, t)
+            else:
+                node.fast = False
+        # under a string size limit binary_ops is string_checked_ops(); only
+        # a text operand can make a string
         if op == '+':
+            if type(l) is str:
+                if self.binary_ops is RUNTIME_OPS:
+                    return concat(l, r)
+                return self.binary_ops['+'](l, r)
+            if type(l) is Rope and self.binary_ops is not RUNTIME_OPS:
+                return self.binary_ops['+'](l, r)
             return l + r
         if op == '-':
             return l - r
         if op == '*':
+            if self.binary_ops is not RUNTIME_OPS and (type(l) in TEXT or type(r) in TEXT):
+                return self.binary_ops['*'](l, r)
             return l * r
         if op == '/':
             return l / r
@@ -96,10 +560,6 @@ class Evaluator:
             return l > r
         if op == '>=':
             return l >= r
-        if op == '&&':
-            return bool(l) and bool(r)
-        if op == '||':
-            return bool(l) or bool(r)
         raise NotImplementedError(f'Operator {op}')
 
     def eval_UnaryOp(self, node: UnaryOp, env: Environment):
@@ -112,18 +572,26 @@ class Evaluator:
 
     def eval_PrintStmt(self, node: PrintStmt, env: Environment):
         v = self.eval(node.expr, env)
-        builtin = env.get('print')
-        if callable(builtin):
-            return builtin(v)
+        # `print` is a keyword, so it can only be bound globally
+        builtin = cached_global(node, env.globals, 'print')
+        if builtin is self.print_builtin or not callable(builtin):
+            self.output.write(f'{v}\n')
         else:
-            print(v)
+            return builtin(plain(v))
 
     def eval_Block(self, node: Block, env: Environment):
-        return self.eval_block(node, Environment(env))
+        layout = node.layout
+        if layout is None:
+            return self.eval_block(node, Environment(env))
+        if layout.size:
+            env = Frame([_UNSET] * layout.size, env, layout)
+        return self.eval_block(node, env)
 
     def eval_block(self, block: Block, env: Environment):
         for s in block.statements:
-            self.eval(s, env)
+            if self.eval(s, env) is RETURN:
+                return RETURN
+        return None
 
     def eval_IfStmt(self, node: IfStmt, env: Environment):
         cond = self.eval(node.condition, env)
@@ -134,33 +602,167 @@ class Evaluator:
         return None
 
     def eval_WhileStmt(self, node: WhileStmt, env: Environment):
+        limited = self.limited
         while self.eval(node.condition, env):
-            self.eval_block(node.body, env)
+            if self.eval_block(node.body, env) is RETURN:
+                return RETURN
+            if limited:
+                self.steps += 1
+                if self.steps >= self.next_check:
+                    self.check_limits()
+        return None
+
+    def eval_ForStmt(self, node: ForStmt, env: Environment):
+        limited = self.limited
+        slot = node.slot
+        body = node.body
+        for value in loop_values(self.eval(node.iterable, env)):
+            if slot is None:
+                env.set(node.name, value)
+            else:
+                env.slots[slot] = value
+            if self.eval_block(body, env) is RETURN:
+                return RETURN
+            if limited:
+                self.steps += 1
+                if self.steps >= self.next_check:
+                    self.check_limits()
         return None
 
     def eval_FunctionDecl(self, node: FunctionDecl, env: Environment):
-        func = Function(node, env)
-        env.set(node.name, func)
+        if node.layout is None:
+            # declaration evaluated outside a resolved program
+            Resolver(free=None).resolve_function(node)
+        func = self.memoized(Function(node, env))
+        if node.slot is None:
+            env.set(node.name, func)
+        else:
+            env.slots[node.slot] = func
         return None
 
     def eval_ReturnStmt(self, node: ReturnStmt, env: Environment):
+        if node.tail is not None:
+            call = node.expr
+            callee = self.eval(call.callee, env)
+            args = [self.eval(a, env) for a in call.args]
+            if type(callee) is Function and callee.decl is node.tail:
+                # self call in tail position: Function.tail_calls runs it
+                self.tail_call = callee
+                self.tail_args = args
+                return RETURN
+            if callable(callee):
+                self.return_value = callee(*plain_args(args))
+            elif isinstance(callee, Function):
+                self.return_value = callee.call(args, self)
+            else:
+                raise TypeError('Not callable')
+            return RETURN
         val = None
         if node.expr is not None:
             val = self.eval(node.expr, env)
-        raise ReturnException(val)
+        self.return_value = val
+        return RETURN
 
     def eval_CallExpr(self, node: CallExpr, env: Environment):
-        callee = self.eval(node.callee, env) if not isinstance(node.callee, Identifier) else env.get(node.callee.name)
+        callee = self.eval(node.callee, env)
         args = [self.eval(a, env) for a in node.args]
         # builtin function
         if callable(callee):
-            return callee(*args)
+            return callee(*plain_args(args))
         # user function
         if isinstance(callee, Function):
             return callee.call(args, self)
         raise TypeError('Not callable')
 
-    # convenience runner
+    # convenience runners
     def run_source(self, source: str):
-        tree = parse_source(source)
-        return self.eval(tree, self.global_env)
+        return self.run_program(self.parse(source))
+
+    def parse(self, source: str):
+        program = parse_source(source)
+        if self.optimizer is not None:
+            self.optimizer.optimize_program(program)
+        return program
+
+    def run_program(self, program: Program):
+        if not program.resolved:
+            resolve_program(program)
+        if self.engine == 'vm':
+            return self.run_bytecode(self.compile_bytecode(program))
+        if self.engine == 'closure':
+            return self.run_compiled(self.compile(program))
+        if self.engine == 'stack':
+            return self.run_statements(program.body)
+        with self.budget():
+            return plain(self.eval(program, self.global_env))
+
+    # streaming execution: parse one top-level statement, run it, drop it
+    def run_stream(self, source):
+        # source: a str, a file object or any iterable of lines
+        return self.run_statements(self.parse_stream(source))
+
+    def parse_stream(self, source):
+        # resolved top-level statements, parsed lazily from `source`
+        statements = Parser(tokenizer.iter_tokens(source)).iter_statements()
+        if self.optimizer is not None:
+            statements = self.optimizer.optimize_statements(statements)
+        return resolve_statements(statements)
+
+    def run_statements(self, statements):
+        # statements must already be resolved (see resolver.resolve_statements)
+        env = self.global_env
+        if self.engine == 'vm':
+            from ecoscript.vm import VM, compile_statement
+            execute = lambda s: VM(self).run(compile_statement(s), env)
+        elif self.engine == 'closure':
+            from ecoscript.compiler import Compiler
+            compiler = Compiler(self)
+            execute = lambda s: compiler.compile(s)(env)
+        elif self.engine == 'stack':
+            from ecoscript.stackeval import StackMachine
+            machine = StackMachine(self)
+            execute = lambda s: machine.run(s, env)
+        else:
+            execute = lambda s: self.eval(s, env)
+        result = None
+        with self.budget():
+            for s in statements:
+                result = execute(s)
+                if result is RETURN:
+                    # a top-level return ends the program with its value
+                    return plain(self.return_value)
+        return plain(result)
+
+    # closure-compiled execution
+    def compile(self, program):
+        from ecoscript.compiler import compile_program
+        if isinstance(program, str):
+            program = parse_source(program)
+        if not program.resolved:
+            resolve_program(program)
+        return compile_program(program, self)
+
+    def run_compiled(self, compiled, env=None):
+        if env is None:
+            env = self.global_env
+        with self.budget():
+            return plain(compiled(env))
+
+    # bytecode execution
+    def compile_bytecode(self, program):
+        from ecoscript.vm import compile_bytecode
+        if isinstance(program, str):
+            program = parse_source(program)
+        if not program.resolved:
+            resolve_program(program)
+        return compile_bytecode(program)
+
+    def run_bytecode(self, code, env=None):
+        from ecoscript.vm import VM
+        if env is None:
+            env = self.global_env
+        with self.budget():
+            result = VM(self).run(code, env)
+        if result is RETURN:
+            return plain(self.return_value)
+        return plain(result)
@@ -0,0 +1,186 @@
+from ecoscript.parser import Parser, Program
+from ecoscript.tokenizer import Token, scan_line
+
+# Incremental front end for the REPL and editors. The source is kept as a
+# list of lines; a line is lexed once and its tokens are kept until its text
+# changes. The indent stack after every line is stored too, so INDENT/DEDENT
+# tokens are replayed from the stored state instead of rescanning the buffer.
+#
+# A re-parse restarts at the last top-level statement that begins (at the
+# head of its line) before the first changed line; the statements before it
+# are reused as they are. Parse errors are recorded in `error`, not raised.
+#
+# `needs_more` answers the REPL's question "is this input finished?" from the
+# per-line state alone, without parsing: an unclosed `{`, a block header such
+# as `while (x)` or `else` on the last line, or an indented block that has
+# not been closed by a blank line all mean more input is expected.
+
+_HEADERS = ('IF', 'WHILE', 'FOR', 'FUNCTION')
+
+
+class _Line:
+    __slots__ = ('text', 'lineno', 'leading', 'tokens', 'bad', 'braces', 'stack', 'indent')
+
+    def __init__(self, text, lineno):
+        self.text = text
+        self.lineno = lineno
+        self.leading, self.tokens = scan_line(text, lineno)
+        # the line has an unexpected character (its last token)
+        self.bad = bool(self.tokens) and self.tokens[-1].type == 'MISMATCH'
+        self.braces = 0
+        for tok in self.tokens:
+            if tok.type == 'LBRACE':
+                self.braces += 1
+            elif tok.type == 'RBRACE':
+                self.braces -= 1
+        self.stack = (0,)  # indent stack after this line
+        self.indent = 0    # INDENTs (1) or DEDENTs (-n) before this line's tokens
+
+
+class IncrementalParser:
+    def __init__(self, text=''):
+        self.lines = []
+        self.statements = []  # top-level statements of the last parse
+        self.error = None     # SyntaxError of the last parse, or None
+        self.braces = 0       # unclosed `{` over the whole buffer
+        self._dirty = 0       # index of the first line changed since the last parse
+        if text:
+            self.update(text)
+
+    @property
+    def source(self):
+        return '\n'.join(line.text for line in self.lines)
+
+    def update(self, text):
+        # replace the whole buffer; only lines that differ from the current
+        # buffer are lexed again
+        new = text.splitlines()
+        old = self.lines
+        limit = min(len(new), len(old))
+        start = 0
+        while start < limit and old[start].text == new[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old[-1 - end].text == new[-1 - end]:
+            end += 1
+        self.replace(start, len(old) - end, new[start:len(new) - end])
+
+    def append(self, text):
+        # add one or more lines at the end (one REPL input line)
+        n = len(self.lines)
+        self.replace(n, n, text.splitlines() or [''])
+
+    def clear(self):
+        self.replace(0, len(self.lines), [])
+
+    def replace(self, start, stop, texts):
+        # replace lines[start:stop] (0-based) with new line texts
+        lines = self.lines
+        for line in lines[start:stop]:
+            self.braces -= line.braces
+        fresh = [_Line(text, start + i + 1) for i, text in enumerate(texts)]
+        for line in fresh:
+            self.braces += line.braces
+        lines[start:stop] = fresh
+        self._restack(start, start + len(fresh))
+        if self._dirty is None or start < self._dirty:
+            self._dirty = start
+
+    def _restack(self, start, end):
+        # recompute indent stacks from line `start`; past the replaced lines
+        # stop as soon as a line ends with the stack it had before
+        lines = self.lines
+        stack = lines[start - 1].stack if start else (0,)
+        for i in range(start, len(lines)):
+            line = lines[i]
+            old = line.stack if i >= end else None
+            leading = line.leading
+            if leading is None:
+                line.indent = 0
+            elif leading > stack[-1]:
+                stack = stack + (leading,)
+                line.indent = 1
+            else:
+                depth = len(stack)
+                while leading < stack[-1]:
+                    stack = stack[:-1]
+                line.indent = len(stack) - depth
+            line.stack = stack
+            if stack == old:
+                break
+
+    @property
+    def needs_more(self):
+        if self.braces > 0:
+            return True
+        lines = self.lines
+        i = len(lines) - 1
+        while i >= 0 and lines[i].leading is None:
+            i -= 1
+        if i < 0 or lines[i].bad:
+            return False
+        tokens = lines[i].tokens
+        last = tokens[-1].type
+        if last == 'ELSE' or (last == 'RPAREN' and tokens[0].type in _HEADERS):
+            return True
+        # an open indented block ends at a blank line
+        return len(lines[i].stack) > 1 and i == len(lines) - 1
+
+    def parse(self):
+        # the whole buffer as a Program; on a syntax error the Program holds
+        # the statements before it and `error` is set
+        if self._dirty is None:
+            return Program(list(self.statements))
+        statements = self.statements
+        changed = self._dirty + 1
+        k = len(statements) - 1
+        while k >= 0 and not (statements[k].line < changed and self._heads_line(statements[k])):
+            k -= 1
+        if k < 0:
+            statements, start = [], 0
+        else:
+            start = statements[k].line - 1
+            statements = statements[:k]
+        self.error = None
+        try:
+            for statement in Parser(self._tokens(start)).iter_statements():
+                statements.append(statement)
+        except SyntaxError as e:
+            self.error = e
+        self.statements = statements
+        self._dirty = None
+        return Program(list(statements))
+
+    def _heads_line(self, statement):
+        tokens = self.lines[statement.line - 1].tokens
+        return bool(tokens) and tokens[0].col == statement.col
+
+    def _tokens(self, start):
+        # the token stream from line index `start`; unless that is the first
+        # line it begins a top-level statement whose indentation tokens were
+        # already consumed by the blocks before it
+        lines = self.lines
+        for i in range(start, len(lines)):
+            line = lines[i]
+            n = i + 1
+            if line.leading is None:
+                continue
+            if line.lineno != n:
+                # lines were inserted or removed above since it was lexed
+                for tok in line.tokens:
+                    tok.lineno = n
+                line.lineno = n
+            if i != start or not start:
+                if line.indent > 0:
+                    yield Token('INDENT', '', n, 1)
+                for _ in range(-line.indent):
+                    yield Token('DEDENT', '', n, 1)
+            if line.bad:
+                yield from line.tokens[:-1]
+                raise SyntaxError(f'Unexpected character {line.tokens[-1].value!r} on line {n}')
+            yield from line.tokens
+            yield Token('NEWLINE', '', n, len(line.text))
+        last = len(lines) or 1
+        for _ in range(len(lines[-1].stack) - 1 if lines else 0):
+            yield Token('DEDENT', '', last, 1)
+        yield Token('EOF', '', last, 0)
@@ -0,0 +1,150 @@
+import math
+from collections import OrderedDict
+from ecoscript.arrays import BUILTINS as ARRAY_BUILTINS
+from ecoscript.parser import FunctionDecl
+
+# Automatic memoization of pure EcoScript functions. The resolver marks a
+# FunctionDecl pure when its body prints nothing, declares no functions,
+# reads no variable of an enclosing function and calls only global names
+# (resolver.pure_reads); every Function made from it then gets a Memo, a
+# bounded LRU cache of results keyed on the argument values and their types
+# (so 1, 1.0 and True stay apart), plus the sign of float arguments (so 0.0
+# and -0.0 do too). Evaluator(memoize=False) turns this off.
+#
+# The globals a pure function reads must themselves be pure: pure builtins,
+# or EcoScript functions that are pure in turn. That is checked when the
+# function is called, and again whenever the global environment has changed
+# since (Environment.version); if any of those bindings now holds something
+# else, the cache is dropped. A call with an unhashable argument (an array)
+# runs uncached, and a function whose calls almost never repeat stops being
+# cached after MEMO_PROBATION misses. Cache hits are not steps for Limits.
+
+DEFAULT_MEMO_SIZE = 4096
+MEMO_PROBATION = 1000
+
+PURE_BUILTINS = {id(f) for f in (range, *ARRAY_BUILTINS.values())}
+
+# a cache miss; never a cached value
+MISS = object()
+# a global that is not bound
+_ABSENT = object()
+
+
+def global_deps(decl, genv, seen=None):
+    # the values of every global `decl` depends on, following the pure
+    # functions it calls; None if one of them is neither a pure function nor
+    # a pure builtin
+    if seen is None:
+        seen = {id(decl)}
+    values = []
+    get = genv.values.get
+    for name in decl.pure_reads:
+        value = get(name, _ABSENT)
+        values.append(value)
+        if value is _ABSENT:
+            # reading it raises NameError, so nothing is cached
+            continue
+        inner = getattr(value, 'decl', None)
+        if type(inner) is FunctionDecl:
+            if inner.pure_reads is None:
+                return None
+            if id(inner) not in seen:
+                seen.add(id(inner))
+                more = global_deps(inner, value.env.globals, seen)
+                if more is None:
+                    return None
+                values.extend(more)
+        elif id(value) not in PURE_BUILTINS:
+            return None
+    return values
+
+
+class MemoStats:
+    # hits and misses of every function made from one declaration, kept by
+    # the Evaluator
+    __slots__ = ('decl', 'hits', 'misses')
+
+    def __init__(self, decl):
+        self.decl = decl
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f'MemoStats({self.decl.name}, hits={self.hits}, misses={self.misses})'
+
+
+class Memo:
+    __slots__ = ('cache', 'maxsize', 'stats', 'hits', 'misses', 'version', 'deps', 'active', 'retired')
+
+    def __init__(self, stats, maxsize=DEFAULT_MEMO_SIZE):
+        self.cache = OrderedDict()
+        self.maxsize = maxsize
+        self.stats = stats
+        self.hits = 0
+        self.misses = 0
+        self.version = None  # Environment.version deps was taken at
+        self.deps = None
+        self.active = False
+        self.retired = False
+
+    def refresh(self, decl, genv):
+        self.version = genv.version
+        deps = global_deps(decl, genv)
+        if deps != self.deps:
+            self.cache.clear()
+            self.deps = deps
+        self.active = deps is not None
+
+    def get(self, function, args):
+        # (key, cached result or MISS); key is None when the call must run
+        # uncached
+        if self.retired:
+            return None, MISS
+        genv = function.env.globals
+        if self.version != genv.version:
+            self.refresh(function.decl, genv)
+            if not self.active:
+                return None, MISS
+        elif not self.active:
+            return None, MISS
+        types = tuple(map(type, args))
+        if float in types:
+            # 0.0 == -0.0
+            key = (*args, *types, *[math.copysign(1.0, a) for a in args if type(a) is float])
+        else:
+            key = (*args, *types)
+        try:
+            value = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            self.stats.misses += 1
+            return key, MISS
+        except TypeError:
+            return None, MISS
+        self.cache.move_to_end(key)
+        self.hits += 1
+        self.stats.hits += 1
+        return key, value
+
+    def put(self, key, value):
+        cache = self.cache
+        cache[key] = value
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+        if self.misses >= MEMO_PROBATION and self.hits * 8 < self.misses:
+            # hardly any call repeats: caching only costs
+            self.retired = True
+            cache.clear()
+
+    def call(self, function, args, evaluator):
+        # Function.call through the cache
+        key, value = self.get(function, args)
+        if value is not MISS:
+            return value
+        if evaluator.limited:
+            value = evaluator.call_limited(function, args)
+        else:
+            value = function.invoke(args, evaluator)
+        if key is not None:
+            self.put(key, value)
+        return value
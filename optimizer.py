@@ -0,0 +1,189 @@
+from dataclasses import fields
+from ecoscript.parser import *
+from ecoscript.evaluator import BINARY_OPS
+
+# Optional AST optimizer run between parsing and resolution (`es -O`).
+#
+# It folds operators whose operands are literals, including comparisons and
+# string concatenation, and removes if/while branches whose condition is a
+# literal. Folded values keep their runtime type: numbers and booleans become
+# NumberLiteral (bool is an int), strings become StringLiteral. An operation
+# that would fail at runtime (`1 / 0`, `"a" - 1`) is left alone so the error
+# still happens when, and if, the code runs.
+
+# don't let folding blow up the AST (or the parse cache) with huge strings
+MAX_FOLDED_STRING = 4096
+
+_LITERALS = (NumberLiteral, StringLiteral)
+
+
+def count_nodes(node):
+    # number of AST nodes under (and including) `node`
+    if isinstance(node, list):
+        return sum(count_nodes(n) for n in node)
+    if not hasattr(node, '__dataclass_fields__'):
+        return 0
+    total = 1
+    for f in fields(node):
+        if f.compare:
+            total += count_nodes(getattr(node, f.name))
+    return total
+
+
+def literal(value, node):
+    # literal for a folded value, at the position of the node it replaces
+    if isinstance(value, str):
+        if len(value) > MAX_FOLDED_STRING:
+            return None
+        return StringLiteral(value, line=node.line, col=node.col)
+    if isinstance(value, (int, float)):
+        return NumberLiteral(value, line=node.line, col=node.col)
+    return None
+
+
+class Optimizer:
+    def __init__(self):
+        self.nodes_before = 0
+        self.nodes_after = 0
+        self.folded = 0
+        self.branches = 0
+
+    @property
+    def removed(self):
+        return self.nodes_before - self.nodes_after
+
+    def report(self):
+        return (f'optimizer: {self.nodes_before} -> {self.nodes_after} nodes '
+                f'({self.removed} removed; {self.folded} constant expressions folded, '
+                f'{self.branches} dead branches eliminated)')
+
+    def optimize_program(self, program: Program):
+        program.body = list(self.optimize_statements(program.body))
+        return program
+
+    def optimize_statements(self, statements):
+        # top-level statements, optimized one at a time as they stream past
+        for s in statements:
+            self.nodes_before += count_nodes(s)
+            s = self.optimize(s)
+            if s is not None:
+                self.nodes_after += count_nodes(s)
+                yield s
+
+    def optimize(self, node):
+        method = getattr(self, 'optimize_' + node.__class__.__name__, None)
+        if method is None:
+            raise NotImplementedError('optimize_' + node.__class__.__name__)
+        return method(node)
+
+    def optimize_Block(self, node: Block):
+        # statements optimize to a statement, a Block standing in for a
+        # decided `if`, or None when removed
+        statements = []
+        for s in node.statements:
+            s = self.optimize(s)
+            if s is not None:
+                statements.append(s)
+        node.statements = statements
+        return node
+
+    def optimize_LetStmt(self, node: LetStmt):
+        if node.expr is not None:
+            node.expr = self.optimize(node.expr)
+        return node
+
+    def optimize_ExprStmt(self, node: ExprStmt):
+        node.expr = self.optimize(node.expr)
+        return node
+
+    def optimize_NumberLiteral(self, node: NumberLiteral):
+        return node
+
+    def optimize_StringLiteral(self, node: StringLiteral):
+        return node
+
+    def optimize_Identifier(self, node: Identifier):
+        return node
+
+    def optimize_BinaryOp(self, node: BinaryOp):
+        node.left = self.optimize(node.left)
+        node.right = self.optimize(node.right)
+        if not (isinstance(node.left, _LITERALS) and isinstance(node.right, _LITERALS)):
+            return node
+        op = BINARY_OPS.get(node.op)
+        if op is None:
+            return node
+        try:
+            folded = literal(op(node.left.value, node.right.value), node)
+        except Exception:
+            return node
+        if folded is None:
+            return node
+        self.folded += 1
+        return folded
+
+    def optimize_UnaryOp(self, node: UnaryOp):
+        node.operand = self.optimize(node.operand)
+        if not isinstance(node.operand, _LITERALS):
+            return node
+        value = node.operand.value
+        try:
+            if node.op == '-':
+                folded = literal(-value, node)
+            elif node.op == '!':
+                folded = literal(not value, node)
+            else:
+                return node
+        except Exception:
+            return node
+        if folded is None:
+            return node
+        self.folded += 1
+        return folded
+
+    def optimize_PrintStmt(self, node: PrintStmt):
+        node.expr = self.optimize(node.expr)
+        return node
+
+    def optimize_IfStmt(self, node: IfStmt):
+        node.condition = self.optimize(node.condition)
+        self.optimize_Block(node.then_block)
+        if node.else_block is not None:
+            self.optimize_Block(node.else_block)
+        if not isinstance(node.condition, _LITERALS):
+            return node
+        # the branch taken runs as a plain block, keeping its own scope
+        self.branches += 1
+        if node.condition.value:
+            return node.then_block
+        return node.else_block
+
+    def optimize_WhileStmt(self, node: WhileStmt):
+        node.condition = self.optimize(node.condition)
+        self.optimize_Block(node.body)
+        if isinstance(node.condition, _LITERALS) and not node.condition.value:
+            self.branches += 1
+            return None
+        return node
+
+    def optimize_ForStmt(self, node: ForStmt):
+        node.iterable = self.optimize(node.iterable)
+        self.optimize_Block(node.body)
+        return node
+
+    def optimize_FunctionDecl(self, node: FunctionDecl):
+        self.optimize_Block(node.body)
+        return node
+
+    def optimize_ReturnStmt(self, node: ReturnStmt):
+        if node.expr is not None:
+            node.expr = self.optimize(node.expr)
+        return node
+
+    def optimize_CallExpr(self, node: CallExpr):
+        node.args = [self.optimize(a) for a in node.args]
+        return node
+
+
+def optimize_program(program: Program) -> Program:
+    return Optimizer().optimize_program(program)
@@ -0,0 +1,113 @@
+import sys
+import weakref
+
+# Output sinks for the `print` builtin and statement. A sink is any object
+# with write(text) and flush(); Evaluator(output=...) takes one, and the
+# evaluator flushes it when each top-level run ends (normally or not).
+# Output printed outside a run -- Evaluator.eval() or a Function called
+# straight from Python -- is written when the sink is garbage collected or
+# the interpreter exits, at the latest.
+#
+# StreamSink batches writes to a text stream in a bounded buffer and hands
+# them over in one write() per flush. When it flushes is set by its policy:
+#
+#     'line'  after every printed line (interactive use, --unbuffered)
+#     'size'  when buffer_size characters are pending
+#     'exit'  when the run ends, or at MAX_BUFFER_SIZE pending characters
+#             so a chatty script cannot hold unbounded output in memory
+#
+# The default policy is 'line' when the stream is a terminal and 'size'
+# otherwise, like Python's own stdout.
+#
+# MemorySink keeps everything written, for embedders and tests that want the
+# output without redirecting sys.stdout.
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+MAX_BUFFER_SIZE = 16 * 1024 * 1024
+FLUSH_POLICIES = ('line', 'size', 'exit')
+
+
+class StreamSink:
+    def __init__(self, stream=None, policy=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        if policy is not None and policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy '{policy}' (expected one of {', '.join(FLUSH_POLICIES)})")
+        self._stream = stream  # None: whatever sys.stdout is at flush time
+        self.policy = policy
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.size = 0
+        self.limit = None  # pending characters that trigger a flush, see _limit()
+        self._limit_for = None  # the stream `limit` was worked out for
+        weakref.finalize(self, _write_pending, self.pending, stream)
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def _limit(self):
+        stream = self._limit_for = self.stream
+        policy = self.policy
+        if policy is None:
+            isatty = getattr(stream, 'isatty', None)
+            policy = 'line' if isatty is not None and isatty() else 'size'
+        if policy == 'line':
+            return 0
+        if policy == 'size':
+            return min(self.buffer_size, MAX_BUFFER_SIZE)
+        return MAX_BUFFER_SIZE
+
+    def write(self, text):
+        self.pending.append(text)
+        self.size += len(text)
+        limit = self.limit
+        if limit is None:
+            limit = self.limit = self._limit()
+        if self.size >= limit:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            stream = self.stream
+            stream.write(''.join(self.pending))
+            self.pending.clear()
+            self.size = 0
+            stream.flush()
+        if self._stream is None and sys.stdout is not self._limit_for:
+            # sys.stdout was replaced: its policy may differ
+            self.limit = None
+
+    def close(self):
+        # flush, and close the stream unless it is sys.stdout
+        self.flush()
+        if self._stream is not None:
+            self._stream.close()
+
+
+def _write_pending(pending, stream):
+    # a StreamSink's unflushed output, when the sink is collected or at exit
+    if pending:
+        if stream is None:
+            stream = sys.stdout
+        stream.write(''.join(pending))
+        pending.clear()
+        stream.flush()
+
+
+class MemorySink:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+    def lines(self):
+        return self.getvalue().splitlines()
+
+    def clear(self):
+        self.parts.clear()
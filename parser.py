@@ -1,92 +1,162 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Any
 from ecoscript import tokenizer
 
 # AST node classes
-
-@dataclass
+#
+# Nodes are slotted dataclasses: a large script allocates millions of them, so
+# they carry no per-instance __dict__. Fields declared with
+# field(compare=False, repr=False) are annotations filled in by later passes
+# (see resolver.py); they default to "unresolved". `cache` fields hold the
+# evaluator's inline caches and BinaryOp.fast/hits its specialization state,
+# filled at run time. `line`/`col` give the
+# source position of the node's first token (the operator, for binary
+# operations), for error messages and the profiler.
+
+@dataclass(slots=True)
 class Program:
     body: List[Any]
+    resolved: bool = field(default=False, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class LetStmt:
     name: str
     expr: Any
+    slot: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt:
     expr: Any
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class NumberLiteral:
     value: Any
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class StringLiteral:
     value: str
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class Identifier:
     name: str
+    depth: Any = field(default=None, compare=False, repr=False)
+    slot: Any = field(default=None, compare=False, repr=False)
+    cache: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp:
     op: str
     left: Any
     right: Any
+    fast: Any = field(default=None, compare=False, repr=False)
+    hits: int = field(default=0, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp:
     op: str
     operand: Any
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt:
     expr: Any
+    cache: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class Block:
     statements: List[Any]
+    layout: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt:
     condition: Any
     then_block: Block
     else_block: Any  # Block or None
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt:
     condition: Any
     body: Block
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
+class ForStmt:
+    name: str
+    iterable: Any
+    body: Block
+    slot: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
+
+@dataclass(slots=True)
 class FunctionDecl:
     name: str
     params: List[str]
     body: Block
-
-@dataclass
+    slot: Any = field(default=None, compare=False, repr=False)
+    layout: Any = field(default=None, compare=False, repr=False)
+    # global names the body may read when it is pure, else None (see resolver.pure_reads)
+    pure_reads: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
+
+@dataclass(slots=True)
 class ReturnStmt:
     expr: Any
+    # the enclosing FunctionDecl when expr calls that function by name
+    tail: Any = field(default=None, compare=False, repr=False)
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
-@dataclass
+@dataclass(slots=True)
 class CallExpr:
     callee: Any
     args: List[Any]
+    line: int = field(default=0, compare=False, repr=False)
+    col: int = field(default=0, compare=False, repr=False)
 
 class Parser:
+    # Consumes any iterable of tokens (typically the lazy tokenizer.iter_tokens
+    # generator) one token at a time; the grammar needs no lookahead beyond
+    # the current token.
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
+        self.tokens = iter(tokens)
+        self.current = next(self.tokens)
 
     def peek(self):
-        return self.tokens[self.pos]
+        return self.current
 
     def advance(self):
-        tok = self.tokens[self.pos]
-        self.pos += 1
+        tok = self.current
+        # keep returning EOF once the stream is exhausted
+        self.current = next(self.tokens, tok)
         return tok
 
+    def at(self, node, tok):
+        node.line = tok.lineno
+        node.col = tok.col
+        return node
+
     def expect(self, type_):
         tok = self.peek()
         if tok.type != type_:
@@ -94,14 +164,16 @@ class Parser:
         return self.advance()
 
     def parse(self):
-        stmts = []
+        return Program(list(self.iter_statements()))
+
+    def iter_statements(self):
+        # top-level statements, parsed one at a time as they are requested
         while self.peek().type != 'EOF':
             # skip empty statement separators
             if self.peek().type in ('SEMICOL','NEWLINE'):
                 self.advance()
                 continue
-            stmts.append(self.parse_statement())
-        return Program(stmts)
+            yield self.parse_statement()
 
     def parse_statement(self):
         tok = self.peek()
@@ -115,6 +187,8 @@ class Parser:
             return self.parse_if()
         if tok.type == 'WHILE':
             return self.parse_while()
+        if tok.type == 'FOR':
+            return self.parse_for()
         if tok.type == 'RETURN':
             return self.parse_return()
         # otherwise expression statement
@@ -122,10 +196,10 @@ class Parser:
         # optional semicolon
         if self.peek().type == 'SEMICOL':
             self.advance()
-        return ExprStmt(expr)
+        return self.at(ExprStmt(expr), tok)
 
     def parse_let(self):
-        self.advance()  # let/var/const
+        tok = self.advance()  # let/var/const
         name_tok = self.expect('IDENT')
         name = name_tok.value
         if self.peek().type == 'OP' and self.peek().value == '=':
@@ -135,10 +209,10 @@ class Parser:
             expr = None
         if self.peek().type == 'SEMICOL':
             self.advance()
-        return LetStmt(name, expr)
+        return self.at(LetStmt(name, expr), tok)
 
     def parse_function(self):
-        self.advance()  # function
+        tok = self.advance()  # function
         name_tok = self.expect('IDENT')
         name = name_tok.value
         self.expect('LPAREN')
@@ -153,19 +227,19 @@ class Parser:
                 break
         self.expect('RPAREN')
         body = self.parse_block()
-        return FunctionDecl(name, params, body)
+        return self.at(FunctionDecl(name, params, body), tok)
 
     def parse_print(self):
-        self.advance()
+        tok = self.advance()
         self.expect('LPAREN')
         expr = self.parse_expression()
         self.expect('RPAREN')
         if self.peek().type == 'SEMICOL':
             self.advance()
-        return PrintStmt(expr)
+        return self.at(PrintStmt(expr), tok)
 
     def parse_if(self):
-        self.advance()
+        tok = self.advance()
         self.expect('LPAREN')
         cond = self.parse_expression()
         self.expect('RPAREN')
@@ -174,29 +248,44 @@ class Parser:
         if self.peek().type == 'ELSE':
             self.advance()
             else_block = self.parse_block()
-        return IfStmt(cond, then_block, else_block)
+        return self.at(IfStmt(cond, then_block, else_block), tok)
 
     def parse_while(self):
-        self.advance()
+        tok = self.advance()
         self.expect('LPAREN')
         cond = self.parse_expression()
         self.expect('RPAREN')
         body = self.parse_block()
-        return WhileStmt(cond, body)
+        return self.at(WhileStmt(cond, body), tok)
 
-    def parse_return(self):
+    def parse_for(self):
+        # for (name in iterable) -- `in` is only a keyword here
+        tok = self.advance()
+        self.expect('LPAREN')
+        name = self.expect('IDENT').value
+        in_tok = self.peek()
+        if in_tok.type != 'IDENT' or in_tok.value != 'in':
+            raise SyntaxError(f"Expected 'in' but got {in_tok.type} at {in_tok.lineno}:{in_tok.col}")
         self.advance()
+        iterable = self.parse_expression()
+        self.expect('RPAREN')
+        body = self.parse_block()
+        return self.at(ForStmt(name, iterable, body), tok)
+
+    def parse_return(self):
+        tok = self.advance()
         if self.peek().type == 'SEMICOL':
             self.advance()
-            return ReturnStmt(None)
+            return self.at(ReturnStmt(None), tok)
         expr = self.parse_expression()
         if self.peek().type == 'SEMICOL':
             self.advance()
-        return ReturnStmt(expr)
+        return self.at(ReturnStmt(expr), tok)
 
     def parse_block(self):
         # support both { ... } and indentation blocks
-        if self.peek().type == 'LBRACE':
+        tok = self.peek()
+        if tok.type == 'LBRACE':
             self.expect('LBRACE')
             stmts = []
             while self.peek().type != 'RBRACE':
@@ -207,7 +296,7 @@ class Parser:
                     continue
                 stmts.append(self.parse_statement())
             self.expect('RBRACE')
-            return Block(stmts)
+            return self.at(Block(stmts), tok)
 
         # indentation block: expect NEWLINE then INDENT ... DEDENT
         if self.peek().type == 'NEWLINE':
@@ -224,7 +313,7 @@ class Parser:
                 continue
             stmts.append(self.parse_statement())
         self.expect('DEDENT')
-        return Block(stmts)
+        return self.at(Block(stmts), tok)
 
     # Expression parsing (precedence climbing)
     def parse_expression(self):
@@ -233,69 +322,75 @@ class Parser:
     def parse_logical_or(self):
         node = self.parse_logical_and()
         while self.peek().type == 'OP' and self.peek().value == '||':
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_logical_and()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_logical_and(self):
         node = self.parse_equality()
         while self.peek().type == 'OP' and self.peek().value == '&&':
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_equality()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_equality(self):
         node = self.parse_comparison()
         while self.peek().type == 'OP' and self.peek().value in ('==','!='):
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_comparison()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_comparison(self):
         node = self.parse_term()
         while self.peek().type == 'OP' and self.peek().value in ('<','>','<=','>='):
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_term()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_term(self):
         node = self.parse_factor()
         while self.peek().type == 'OP' and self.peek().value in ('+','-'):
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_factor()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_factor(self):
         node = self.parse_unary()
         while self.peek().type == 'OP' and self.peek().value in ('*','/','%'):
-            op = self.advance().value
+            op_tok = self.advance()
+            op = op_tok.value
             right = self.parse_unary()
-            node = BinaryOp(op, node, right)
+            node = self.at(BinaryOp(op, node, right), op_tok)
         return node
 
     def parse_unary(self):
         if self.peek().type == 'OP' and self.peek().value in ('-','!'):
-            op = self.advance().value
+            tok = self.advance()
             operand = self.parse_unary()
-            return UnaryOp(op, operand)
+            return self.at(UnaryOp(tok.value, operand), tok)
         return self.parse_primary()
 
     def parse_primary(self):
         tok = self.peek()
         if tok.type == 'NUMBER':
             self.advance()
-            return NumberLiteral(tok.value)
+            return self.at(NumberLiteral(tok.value), tok)
         if tok.type == 'STRING':
             self.advance()
-            return StringLiteral(tok.value)
+            return self.at(StringLiteral(tok.value), tok)
         if tok.type == 'IDENT':
             self.advance()
-            node = Identifier(tok.value)
+            node = self.at(Identifier(tok.value), tok)
             # call?
             if self.peek().type == 'LPAREN':
                 self.advance()
@@ -308,7 +403,7 @@ class Parser:
                             continue
                         break
                 self.expect('RPAREN')
-                return CallExpr(node, args)
+                return self.at(CallExpr(node, args), tok)
             return node
         if tok.type == 'LPAREN':
             self.advance()
@@ -319,6 +414,4 @@ class Parser:
 
 
 def parse_source(source: str):
-    tokens = tokenizer.tokenize(source)
-    p = Parser(tokens)
-    return p.parse()
+    return Parser(tokenizer.iter_tokens(source)).parse()
@@ -0,0 +1,153 @@
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from ecoscript.evaluator import Evaluator, Limits
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+# Thread-safe pool of Evaluators for embedding EcoScript in a service that
+# runs many small scripts concurrently:
+#
+#     pool = EvaluatorPool(size=8, builtins={'log': log})
+#     result = pool.run(source, variables={'request': req}, timeout=0.5)
+#
+# Each checked-out evaluator starts from a snapshot of its global environment
+# taken right after the builtins were installed, so nothing one call defines
+# is visible to the next. Parsed (and resolved) programs are cached by source
+# text and shared between evaluators. Runs do write into the shared AST, but
+# only caches that cannot carry one evaluator's state into another's run:
+# the global inline caches (Identifier.cache, PrintStmt.cache) are keyed on
+# Environment.version, which comes from one process-wide counter, so an entry
+# only ever matches the global environment it was read from; a specialized
+# BinaryOp.fast checks its operand types on every use and falls back to the
+# generic operator, and its `hits` counter only decides when to specialize.
+# Each field is replaced by a single attribute store, so concurrent runs at
+# worst lose a cache entry or delay a specialization.
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class _Member:
+    # a pooled evaluator, its clean global snapshot and its compiled programs
+    __slots__ = ('evaluator', 'snapshot', 'compiled')
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.snapshot = evaluator.snapshot()
+        self.compiled = OrderedDict()
+
+
+class EvaluatorPool:
+    def __init__(self, size=4, engine=None, builtins=None, optimize=False,
+                 cache_size=DEFAULT_CACHE_SIZE, limits=None):
+        self.size = size
+        self.engine = engine
+        self.limits = limits
+        self.builtins = dict(builtins or {})
+        self.optimize = optimize
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._programs = OrderedDict()  # source -> resolved Program
+
+    def _new_member(self):
+        ev = Evaluator(engine=self.engine, optimize=self.optimize, limits=self.limits)
+        for name, value in self.builtins.items():
+            ev.global_env.set(name, value)
+        return _Member(ev)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._created < self.size
+            if grow:
+                self._created += 1
+        if grow:
+            try:
+                return self._new_member()
+            except BaseException:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # all evaluators are busy: wait for one
+        return self._idle.get()
+
+    @contextmanager
+    def _checkout(self, variables=None):
+        member = self._acquire()
+        ev = member.evaluator
+        try:
+            ev.restore(member.snapshot)
+            for name, value in (variables or {}).items():
+                ev.global_env.set(name, value)
+            yield member
+        finally:
+            ev.limits = self.limits
+            self._idle.put(member)
+
+    @contextmanager
+    def evaluator(self, variables=None):
+        # check out a reset evaluator for direct use
+        with self._checkout(variables) as member:
+            yield member.evaluator
+
+    def program(self, source):
+        # resolved Program for `source`, parsed once per distinct source text
+        with self._lock:
+            program = self._programs.get(source)
+            if program is not None:
+                self._programs.move_to_end(source)
+                self.hits += 1
+                return program
+            self.misses += 1
+        program = parse_source(source)
+        if self.optimize:
+            from ecoscript.optimizer import optimize_program
+            optimize_program(program)
+        resolve_program(program)
+        with self._lock:
+            self._programs[source] = program
+            while len(self._programs) > self.cache_size:
+                self._programs.popitem(last=False)
+        return program
+
+    def _compiled(self, member, source, program):
+        # engine-specific code for `program`, cached per evaluator since
+        # compiled closures and bytecode functions are bound to it
+        engine = member.evaluator.engine
+        if engine in ('tree', 'stack'):
+            return program
+        code = member.compiled.get(source)
+        if code is None or code[0] is not program:
+            ev = member.evaluator
+            code = (program, ev.compile(program) if engine == 'closure' else ev.compile_bytecode(program))
+            member.compiled[source] = code
+            while len(member.compiled) > self.cache_size:
+                member.compiled.popitem(last=False)
+        else:
+            member.compiled.move_to_end(source)
+        return code[1]
+
+    def run(self, source, variables=None, timeout=None):
+        # run `source` on a clean evaluator; `variables` are bound as globals
+        # first, and ExecutionTimeout is raised if it runs past `timeout`
+        # seconds (overriding the pool's own Limits.timeout)
+        program = self.program(source)
+        with self._checkout(variables) as member:
+            ev = member.evaluator
+            code = self._compiled(member, source, program)
+            if timeout is not None:
+                ev.limits = (self.limits or Limits()).replace(timeout=timeout)
+            if ev.engine == 'closure':
+                return ev.run_compiled(code)
+            if ev.engine == 'vm':
+                return ev.run_bytecode(code)
+            return ev.run_program(code)
+
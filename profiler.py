@@ -0,0 +1,165 @@
+import sys
+import threading
+import time
+from collections import Counter
+from ecoscript.parser import *
+
+# Sampling profiler for EcoScript programs (`es --profile`).
+#
+# The profiler hooks a tree-walking Evaluator instance to keep a shadow stack
+# of EcoScript frames, each holding the function name and the line of the
+# statement it is running; entering a function body also counts a call. A
+# background thread samples that stack every `interval` seconds and charges
+# the wall time since the previous sample to it, so times are attributed to
+# EcoScript functions and lines rather than to eval_* methods.
+
+MAIN = '<main>'
+
+# nodes whose line is recorded as the frame's current line
+_STATEMENTS = (LetStmt, ExprStmt, PrintStmt, IfStmt, WhileStmt, ForStmt, FunctionDecl, ReturnStmt)
+
+
+class Profiler:
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stack = [[MAIN, 0]]      # [function name, current line] per frame
+        self.calls = Counter()        # function name -> calls
+        self.samples = Counter()      # tuple of (name, line) frames -> seconds
+        self.nsamples = 0
+        self.wall = 0.0
+        self.bodies = {}              # id(function body) -> (body, name)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def attach(self, evaluator):
+        if evaluator.engine != 'tree':
+            raise ValueError("the profiler needs the tree engine (--engine=tree)")
+        stack = self.stack
+        calls = self.calls
+        bodies = self.bodies
+        statements = _STATEMENTS
+        eval_node = evaluator.eval
+        eval_block = evaluator.eval_block
+
+        def eval(node, env=None):
+            if isinstance(node, statements):
+                stack[-1][1] = node.line
+                if type(node) is FunctionDecl:
+                    # keep the body alive so its id cannot be reused
+                    bodies[id(node.body)] = (node.body, node.name)
+            return eval_node(node, env)
+
+        def eval_function_block(block, env):
+            entry = bodies.get(id(block))
+            if entry is None:
+                return eval_block(block, env)
+            name = entry[1]
+            calls[name] += 1
+            stack.append([name, block.line])
+            try:
+                return eval_block(block, env)
+            finally:
+                stack.pop()
+
+        evaluator.eval = eval
+        evaluator.eval_block = eval_function_block
+        return evaluator
+
+    def start(self):
+        self._stop.clear()
+        # the sampler can only run when the interpreter switches threads
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval))
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='eco-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        sys.setswitchinterval(self._switch)
+        self.wall += time.perf_counter() - self._started
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _sample(self):
+        stack = self.stack
+        samples = self.samples
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frames = tuple((name, line) for name, line in tuple(stack))
+            now = time.perf_counter()
+            samples[frames] += now - last
+            self.nsamples += 1
+            last = now
+
+    # results
+
+    def function_times(self):
+        # name -> (self seconds, total seconds); total counts recursive
+        # frames once per sample
+        own = Counter()
+        total = Counter()
+        for frames, seconds in self.samples.items():
+            own[frames[-1][0]] += seconds
+            for name in {name for name, _ in frames}:
+                total[name] += seconds
+        return {name: (own[name], total[name]) for name in total}
+
+    def line_times(self):
+        # line -> (self seconds, total seconds)
+        own = Counter()
+        total = Counter()
+        for frames, seconds in self.samples.items():
+            own[frames[-1][1]] += seconds
+            for line in {line for _, line in frames}:
+                total[line] += seconds
+        return {line: (own[line], total[line]) for line in total}
+
+    def format_report(self, source_lines=None, limit=20):
+        sampled = sum(self.samples.values()) or 1.0
+        out = [f'EcoScript profile: {self.wall:.3f}s wall, {self.nsamples} samples '
+               f'every {self.interval * 1000:g}ms']
+        out.append('')
+        out.append(f"{'function':<24} {'calls':>9} {'self s':>9} {'self %':>7} {'total s':>9} {'total %':>7}")
+        functions = self.function_times()
+        for name in list(self.calls) + [MAIN]:
+            functions.setdefault(name, (0.0, 0.0))
+        rows = sorted(functions.items(), key=lambda item: (-item[1][1], -item[1][0], item[0]))
+        for name, (own, total) in rows[:limit]:
+            calls = self.calls[name] if name != MAIN else 1
+            out.append(f'{name:<24} {calls:>9} {own:>9.3f} {own / sampled:>7.1%} '
+                       f'{total:>9.3f} {total / sampled:>7.1%}')
+        out.append('')
+        out.append(f"{'line':>6} {'self s':>9} {'self %':>7} {'total s':>9} {'total %':>7}  source")
+        rows = sorted(self.line_times().items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        for line, (own, total) in rows[:limit]:
+            text = ''
+            if source_lines is not None and 0 < line <= len(source_lines):
+                text = source_lines[line - 1].strip()
+            out.append(f'{line:>6} {own:>9.3f} {own / sampled:>7.1%} '
+                       f'{total:>9.3f} {total / sampled:>7.1%}  {text}')
+        return '\n'.join(out)
+
+    def collapsed(self):
+        # one "frame;frame;frame weight" line per distinct stack, the input
+        # format of flamegraph.pl / speedscope / inferno; weights are
+        # microseconds of wall time
+        weights = Counter()
+        for frames, seconds in self.samples.items():
+            key = ';'.join(f'{name}:{line}' for name, line in frames)
+            weights[key] += seconds
+        return [f'{key} {round(seconds * 1e6)}' for key, seconds in sorted(weights.items())
+                if round(seconds * 1e6) > 0]
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.collapsed():
+                f.write(line + '\n')
@@ -0,0 +1,300 @@
+from ecoscript.parser import *
+
+# Static scope resolution. Every local binding is given a slot in the frame of
+# the scope that declares it, and every Identifier gets a (depth, slot) pair so
+# the evaluator can read it by walking `depth` frame parents and indexing.
+#
+# Scopes mirror what the tree walker does at runtime: a function body is one
+# scope (while and for bodies run in the enclosing scope, and a for loop's
+# variable is bound there too), and if/else blocks get their
+# own scope only when they declare something. Names at top level stay in the
+# dict-backed global Environment.
+#
+# Bindings are dynamic in EcoScript (`let` inside a loop only takes effect once
+# it runs), so a slot may still be unset when it is read. The evaluator then
+# falls back to a by-name lookup, which gives the same answer as the old
+# Environment chain.
+
+GLOBAL = -1
+
+
+class ScopeLayout:
+    __slots__ = ('index', 'size')
+    def __init__(self, index, size):
+        self.index = index  # name -> slot
+        self.size = size
+    def __repr__(self):
+        return f"ScopeLayout({self.index!r}, {self.size})"
+
+# layout of a block that declares nothing and so runs in its parent's frame
+EMPTY_LAYOUT = ScopeLayout({}, 0)
+
+
+class Scope:
+    def __init__(self, parent):
+        self.parent = parent
+        self.index = {}
+        self.size = 0
+        self.visible = set()  # names declared so far
+
+    def declare(self, name):
+        slot = self.index.get(name)
+        if slot is None:
+            slot = self.index[name] = self.size
+            self.size += 1
+        self.visible.add(name)
+        return slot
+
+    def declare_param(self, name):
+        # every parameter gets its own slot; a repeated name resolves to the last one
+        self.index[name] = self.size
+        self.size += 1
+        self.visible.add(name)
+
+    def layout(self):
+        return ScopeLayout(self.index, self.size)
+
+
+def declared_names(statements):
+    # names bound directly in the scope running these statements
+    names = []
+    for s in statements:
+        if isinstance(s, (LetStmt, FunctionDecl)):
+            names.append(s.name)
+        elif isinstance(s, WhileStmt):
+            names.extend(declared_names(s.body.statements))
+        elif isinstance(s, ForStmt):
+            names.append(s.name)
+            names.extend(declared_names(s.body.statements))
+    return names
+
+
+class Resolver:
+    def __init__(self, free=GLOBAL):
+        # depth given to names not bound in any enclosing local scope: GLOBAL
+        # when resolving from top level, None (dynamic lookup) otherwise
+        self.free = free
+        self.scope = None
+        self.function = None  # FunctionDecl whose body is being resolved
+        # function bodies are resolved once their enclosing scopes are complete,
+        # so they see names declared after the function itself
+        self.pending = []
+
+    def resolve_program(self, program: Program):
+        for s in program.body:
+            self.resolve_statement(s)
+        program.resolved = True
+        return program
+
+    def resolve_statement(self, node):
+        self.resolve(node)
+        self.flush()
+        return node
+
+    def resolve_function(self, decl: FunctionDecl):
+        self.pending.append((decl, self.scope))
+        self.flush()
+        return decl
+
+    def flush(self):
+        while self.pending:
+            decl, enclosing = self.pending.pop()
+            saved = self.scope, self.function
+            self.scope = Scope(enclosing)
+            self.function = decl
+            for p in decl.params:
+                self.scope.declare_param(p)
+            self.resolve_statements(decl.body.statements)
+            decl.layout = self.scope.layout()
+            decl.pure_reads = pure_reads(decl, nested=enclosing is not None)
+            self.scope, self.function = saved
+
+    def resolve(self, node):
+        method = getattr(self, 'resolve_' + node.__class__.__name__, None)
+        if method is None:
+            raise NotImplementedError('resolve_' + node.__class__.__name__)
+        method(node)
+
+    def resolve_statements(self, statements):
+        for s in statements:
+            self.resolve(s)
+
+    def declare(self, name):
+        if self.scope is None:
+            return None
+        return self.scope.declare(name)
+
+    def resolve_LetStmt(self, node: LetStmt):
+        if node.expr is not None:
+            self.resolve(node.expr)
+        node.slot = self.declare(node.name)
+
+    def resolve_ExprStmt(self, node: ExprStmt):
+        self.resolve(node.expr)
+
+    def resolve_NumberLiteral(self, node: NumberLiteral):
+        pass
+
+    def resolve_StringLiteral(self, node: StringLiteral):
+        pass
+
+    def resolve_Identifier(self, node: Identifier):
+        depth = 0
+        scope = self.scope
+        while scope is not None:
+            if node.name in scope.visible:
+                node.depth = depth
+                node.slot = scope.index[node.name]
+                return
+            scope = scope.parent
+            depth += 1
+        node.depth = self.free
+        node.slot = None
+
+    def resolve_BinaryOp(self, node: BinaryOp):
+        self.resolve(node.left)
+        self.resolve(node.right)
+
+    def resolve_UnaryOp(self, node: UnaryOp):
+        self.resolve(node.operand)
+
+    def resolve_PrintStmt(self, node: PrintStmt):
+        self.resolve(node.expr)
+
+    def resolve_Block(self, node: Block):
+        if not declared_names(node.statements):
+            node.layout = EMPTY_LAYOUT
+            self.resolve_statements(node.statements)
+            return
+        self.scope = Scope(self.scope)
+        self.resolve_statements(node.statements)
+        node.layout = self.scope.layout()
+        self.scope = self.scope.parent
+
+    def resolve_IfStmt(self, node: IfStmt):
+        self.resolve(node.condition)
+        self.resolve_Block(node.then_block)
+        if node.else_block is not None:
+            self.resolve_Block(node.else_block)
+
+    def resolve_WhileStmt(self, node: WhileStmt):
+        # later iterations see bindings made further down the body
+        for name in declared_names(node.body.statements):
+            self.declare(name)
+        self.resolve(node.condition)
+        self.resolve_statements(node.body.statements)
+
+    def resolve_ForStmt(self, node: ForStmt):
+        self.resolve(node.iterable)
+        node.slot = self.declare(node.name)
+        for name in declared_names(node.body.statements):
+            self.declare(name)
+        self.resolve_statements(node.body.statements)
+
+    def resolve_FunctionDecl(self, node: FunctionDecl):
+        node.slot = self.declare(node.name)
+        self.pending.append((node, self.scope))
+
+    def resolve_ReturnStmt(self, node: ReturnStmt):
+        if node.expr is not None:
+            self.resolve(node.expr)
+        # `return f(...)` inside f: a self call in tail position, which the
+        # engines run in a loop instead of a nested call. The name may have
+        # been rebound, so they check the callee's decl at runtime.
+        expr = node.expr
+        function = self.function
+        if function is not None and type(expr) is CallExpr and type(expr.callee) is Identifier \
+                and expr.callee.name == function.name and expr.callee.depth != 0:
+            node.tail = function
+
+    def resolve_CallExpr(self, node: CallExpr):
+        self.resolve(node.callee)
+        for a in node.args:
+            self.resolve(a)
+
+
+def pure_reads(decl: FunctionDecl, nested=False):
+    # Purity analysis for memo.py, run on a resolved function: the global
+    # names its body may read if it prints nothing, declares no functions,
+    # reads no variable of an enclosing function and only calls global names;
+    # None otherwise. Whether those globals hold pure functions is only known
+    # at runtime. A local read before its `let` has run (in a loop) falls back
+    # to a by-name lookup, so such names count as global reads too -- or, in a
+    # nested function, where the lookup could reach the enclosing frames, make
+    # it impure.
+    reads = set()
+    assigned = set(decl.params)
+    if not _pure_statements(decl.body.statements, 0, assigned, reads, nested):
+        return None
+    return tuple(sorted(reads))
+
+
+def _pure_statements(statements, nesting, assigned, reads, nested):
+    for s in statements:
+        if not _pure(s, nesting, assigned, reads, nested):
+            return False
+    return True
+
+
+def _pure(node, nesting, assigned, reads, nested):
+    # `nesting`: block scopes entered inside the function; `assigned`: names
+    # certainly bound at this point
+    t = type(node)
+    if t is Identifier:
+        depth = node.depth
+        if depth == GLOBAL:
+            reads.add(node.name)
+            return True
+        if depth is None or depth > nesting:
+            return False
+        if node.name not in assigned:
+            if nested:
+                return False
+            reads.add(node.name)
+        return True
+    if t is NumberLiteral or t is StringLiteral:
+        return True
+    if t is BinaryOp:
+        return _pure(node.left, nesting, assigned, reads, nested) and \
+            _pure(node.right, nesting, assigned, reads, nested)
+    if t is UnaryOp:
+        return _pure(node.operand, nesting, assigned, reads, nested)
+    if t is CallExpr:
+        callee = node.callee
+        if type(callee) is not Identifier or callee.depth != GLOBAL:
+            return False
+        reads.add(callee.name)
+        return all(_pure(a, nesting, assigned, reads, nested) for a in node.args)
+    if t is LetStmt:
+        if node.expr is not None and not _pure(node.expr, nesting, assigned, reads, nested):
+            return False
+        assigned.add(node.name)
+        return True
+    if t is ExprStmt or t is ReturnStmt:
+        return node.expr is None or _pure(node.expr, nesting, assigned, reads, nested)
+    if t is IfStmt:
+        return _pure(node.condition, nesting, assigned, reads, nested) and \
+            _pure(node.then_block, nesting, assigned, reads, nested) and \
+            (node.else_block is None or _pure(node.else_block, nesting, assigned, reads, nested))
+    if t is Block:
+        inner = nesting + 1 if node.layout.size else nesting
+        return _pure_statements(node.statements, inner, set(assigned), reads, nested)
+    if t is WhileStmt:
+        return _pure(node.condition, nesting, assigned, reads, nested) and \
+            _pure_statements(node.body.statements, nesting, set(assigned), reads, nested)
+    if t is ForStmt:
+        return _pure(node.iterable, nesting, assigned, reads, nested) and \
+            _pure_statements(node.body.statements, nesting, assigned | {node.name}, reads, nested)
+    # print, nested function declarations
+    return False
+
+
+def resolve_program(program: Program) -> Program:
+    return Resolver().resolve_program(program)
+
+
+def resolve_statements(statements):
+    # resolve a stream of top-level statements one at a time
+    resolver = Resolver()
+    for s in statements:
+        yield resolver.resolve_statement(s)
@@ -0,0 +1,158 @@
+# Lazily concatenated strings. `let s = s + piece` in a loop used to copy
+# the whole of `s` on every iteration, so building a long string was
+# quadratic. Once a concatenation reaches ROPE_MIN_LENGTH characters, +
+# returns a Rope instead: the pieces are kept in a list and joined only when
+# the string's contents are needed -- when it is printed, compared, passed to
+# a builtin or returned to Python from a run -- so appending is amortized
+# O(len(piece)).
+#
+# Ropes are immutable values like str. The parts list is shared between a
+# rope and the ropes built by appending to it; only the rope whose pieces
+# fill the list (the newest one) appends in place, any other copies its
+# prefix first, so `let a = s + "x"` and `let b = s + "y"` stay independent.
+#
+# A rope behaves exactly like its string: ==, <, hashing, len, truth, str()
+# and formatting all use the joined value, and every other operator (and
+# every error message) is the string's own. Only code reading variables
+# straight out of an Environment can see a Rope; plain() turns it back into
+# a str.
+
+ROPE_MIN_LENGTH = 1024
+
+
+class Rope:
+    __slots__ = ('parts', 'count', 'length', 'joined')
+
+    def __init__(self, parts, length):
+        self.parts = parts  # may be shared: this rope is parts[:count]
+        self.count = len(parts)
+        self.length = length
+        self.joined = None
+
+    @property
+    def value(self):
+        joined = self.joined
+        if joined is None:
+            parts = self.parts
+            if self.count < len(parts):
+                parts = parts[:self.count]
+            joined = self.joined = ''.join(parts)
+            # later appends start from the joined string; ropes sharing the
+            # old list keep it
+            self.parts = [joined]
+            self.count = 1
+        return joined
+
+    def append(self, text):
+        parts = self.parts
+        if self.count < len(parts):
+            parts = parts[:self.count]
+        parts.append(text)
+        return Rope(parts, self.length + len(text))
+
+    def __add__(self, other):
+        if type(other) is str:
+            return self.append(other)
+        if type(other) is Rope:
+            return self.append(other.value)
+        return self.value + other
+
+    def __radd__(self, other):
+        if type(other) is str:
+            return Rope([other, self.value], len(other) + self.length)
+        return other + self.value
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return repr(self.value)
+
+    def __format__(self, spec):
+        return format(self.value, spec)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __eq__(self, other):
+        return self.value == plain(other)
+
+    def __ne__(self, other):
+        return self.value != plain(other)
+
+    def __lt__(self, other):
+        return self.value < plain(other)
+
+    def __le__(self, other):
+        return self.value <= plain(other)
+
+    def __gt__(self, other):
+        return self.value > plain(other)
+
+    def __ge__(self, other):
+        return self.value >= plain(other)
+
+    def __neg__(self):
+        return -self.value
+
+    def __sub__(self, other):
+        return self.value - other
+
+    def __rsub__(self, other):
+        return other - self.value
+
+    def __mul__(self, other):
+        return self.value * other
+
+    def __rmul__(self, other):
+        return other * self.value
+
+    def __truediv__(self, other):
+        return self.value / other
+
+    def __rtruediv__(self, other):
+        return other / self.value
+
+    def __mod__(self, other):
+        return self.value % other
+
+    def __rmod__(self, other):
+        return other % self.value
+
+
+def concat(l, r):
+    # l + r for a str `l`
+    if type(r) is str:
+        length = len(l) + len(r)
+        if length < ROPE_MIN_LENGTH:
+            return l + r
+        return Rope([l, r], length)
+    return l + r
+
+
+def add(l, r):
+    # the + operator, building long strings as ropes
+    if type(l) is str:
+        return concat(l, r)
+    return l + r
+
+
+def plain(value):
+    # `value`, with a rope joined into its str
+    if type(value) is Rope:
+        return value.value
+    return value
+
+
+def plain_args(args):
+    # builtin call arguments, with any ropes joined
+    for a in args:
+        if type(a) is Rope:
+            return [plain(a) for a in args]
+    return args
@@ -0,0 +1,414 @@
+from inspect import isawaitable
+from ecoscript.parser import *
+from ecoscript.evaluator import Environment, Frame, Function, RETURN, _UNSET, cached_global, loop_values
+from ecoscript.memo import MISS
+from ecoscript.resolver import GLOBAL, Resolver
+from ecoscript.ropes import plain, plain_args
+
+# Non-recursive tree walker (`--engine=stack`). Instead of recursing through
+# eval_* methods, StackMachine keeps an explicit stack of continuations, each
+# a (tag, node, env) tuple (FOR_NEXT carries (node, iterator) and MEMO
+# (memo, key) as its node), and an operand stack of values. An EcoScript call
+# pushes a FRAME_END marker and the callee's statements, so recursion depth is
+# bounded by memory rather than by Python's recursion limit. Local variables
+# live in the resolver's list-backed Frames, as in the tree walker.
+#
+# The machine loop is a generator: it yields None at scheduling points (a
+# limit check at a loop back-edge or call, see Evaluator.check_limits) and,
+# when `awaiting` is set, yields awaitables returned by builtins and takes
+# their results back through send(). execute() drives it synchronously and
+# ignores the scheduling points; asynceval.AsyncStackMachine awaits them.
+
+(EXEC, BINARY, UNARY, CALL, STORE, BRANCH, LOOP, LOOP_TEST, RETURN_VALUE,
+ PRINT, POP, FRAME_END, TAIL_CALL, LOGICAL, TRUTH, FOR, FOR_NEXT, MEMO) = range(18)
+
+# returned by leaf() for nodes that need their own continuation
+_NOT_LEAF = object()
+
+
+def lookup(node: Identifier, env):
+    # Evaluator.eval_Identifier
+    depth = node.depth
+    if depth is None:
+        return env.get(node.name)
+    if depth == 0:
+        value = env.slots[node.slot]
+    elif depth == GLOBAL:
+        genv = env.globals
+        cache = node.cache
+        if cache is not None and cache[0] == genv.version:
+            return cache[1]
+        value = genv.get(node.name)
+        node.cache = (genv.version, value)
+        return value
+    else:
+        frame = env
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        value = frame.slots[node.slot]
+    if value is _UNSET:
+        return env.get(node.name)
+    return value
+
+
+def leaf(node, env):
+    # value of a literal or variable reference, evaluated in place
+    t = type(node)
+    if t is Identifier:
+        return lookup(node, env)
+    if t is NumberLiteral or t is StringLiteral:
+        return node.value
+    return _NOT_LEAF
+
+
+def block_env(block: Block, env):
+    # Evaluator.eval_Block's scope for `block`
+    layout = block.layout
+    if layout is None:
+        return Environment(env)
+    if layout.size:
+        return Frame([_UNSET] * layout.size, env, layout)
+    return env
+
+
+class StackFunction(Function):
+    def __init__(self, decl: FunctionDecl, env):
+        super().__init__(decl, env)
+        # body statements in the order they are pushed
+        self.body = decl.body.statements[::-1]
+    def invoke(self, args, evaluator):
+        # entry point for callers outside the machine (e.g. builtins)
+        return StackMachine(evaluator).call(self, args)
+    def call(self, args, evaluator):
+        if self.memo is not None:
+            return self.memo.call(self, args, evaluator)
+        if evaluator.limited:
+            return evaluator.call_limited(self, args)
+        return self.invoke(args, evaluator)
+
+
+class StackMachine:
+    # builtins' awaitable results are passed out of loop() to be awaited
+    awaiting = False
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+
+    def run(self, node, env):
+        # value of a top-level statement; a top-level return leaves its value
+        # in evaluator.return_value and gives RETURN
+        t = type(node)
+        if t is ExprStmt:
+            conts = [(EXEC, node.expr, env)]
+        elif t is PrintStmt:
+            conts = [(PRINT, node, env), (EXEC, node.expr, env)]
+        else:
+            conts = [(EXEC, node, env)]
+        return self.execute(conts, [])
+
+    def call(self, function: StackFunction, args):
+        env = function.new_frame(args)
+        conts = [(FRAME_END, None, None)]
+        conts.extend([(EXEC, s, env) for s in function.body])
+        return self.execute(conts, [1])
+
+    def execute(self, conts, frames):
+        steps = self.loop(conts, frames)
+        try:
+            while True:
+                next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+    def loop(self, conts, frames):
+        # frames holds, per active EcoScript call, the height of `conts` just
+        # above that call's FRAME_END marker; a return truncates `conts` there
+        evaluator = self.evaluator
+        limited = evaluator.limited
+        awaiting = self.awaiting
+        ops = evaluator.binary_ops
+        values = []
+        push = values.append
+        pop = values.pop
+        cpush = conts.append
+        cpop = conts.pop
+
+        while conts:
+            tag, node, env = cpop()
+            if tag == EXEC:
+                t = type(node)
+                if t is Identifier:
+                    push(lookup(node, env))
+                elif t is BinaryOp:
+                    if node.op == '&&' or node.op == '||':
+                        cpush((LOGICAL, node, env))
+                        cpush((EXEC, node.left, env))
+                        continue
+                    l = leaf(node.left, env)
+                    if l is _NOT_LEAF:
+                        cpush((BINARY, node, env))
+                        cpush((EXEC, node.right, env))
+                        cpush((EXEC, node.left, env))
+                        continue
+                    r = leaf(node.right, env)
+                    if r is _NOT_LEAF:
+                        push(l)
+                        cpush((BINARY, node, env))
+                        cpush((EXEC, node.right, env))
+                        continue
+                    push(ops[node.op](l, r))
+                elif t is NumberLiteral or t is StringLiteral:
+                    push(node.value)
+                elif t is CallExpr:
+                    cpush((CALL, node, env))
+                    callee = leaf(node.callee, env)
+                    for a in reversed(node.args):
+                        cpush((EXEC, a, env))
+                    if callee is _NOT_LEAF:
+                        cpush((EXEC, node.callee, env))
+                    else:
+                        push(callee)
+                elif t is LetStmt:
+                    expr = node.expr
+                    value = None if expr is None else leaf(expr, env)
+                    if value is _NOT_LEAF:
+                        cpush((STORE, node, env))
+                        cpush((EXEC, expr, env))
+                    elif node.slot is None:
+                        env.set(node.name, value)
+                    else:
+                        env.slots[node.slot] = value
+                elif t is IfStmt:
+                    cond = leaf(node.condition, env)
+                    if cond is _NOT_LEAF:
+                        cpush((BRANCH, node, env))
+                        cpush((EXEC, node.condition, env))
+                        continue
+                    block = node.then_block if cond else node.else_block
+                    if block is not None:
+                        env = block_env(block, env)
+                        conts.extend([(EXEC, s, env) for s in reversed(block.statements)])
+                elif t is WhileStmt:
+                    cond = leaf(node.condition, env)
+                    if cond is _NOT_LEAF:
+                        cpush((LOOP_TEST, node, env))
+                        cpush((EXEC, node.condition, env))
+                    elif cond:
+                        cpush((LOOP, node, env))
+                        conts.extend([(EXEC, s, env) for s in reversed(node.body.statements)])
+                elif t is ForStmt:
+                    cpush((FOR, node, env))
+                    iterable = leaf(node.iterable, env)
+                    if iterable is _NOT_LEAF:
+                        cpush((EXEC, node.iterable, env))
+                    else:
+                        push(iterable)
+                elif t is ExprStmt:
+                    cpush((POP, None, None))
+                    cpush((EXEC, node.expr, env))
+                elif t is ReturnStmt:
+                    expr = node.expr
+                    if node.tail is not None:
+                        cpush((TAIL_CALL, node, env))
+                        for a in reversed(expr.args):
+                            cpush((EXEC, a, env))
+                        cpush((EXEC, expr.callee, env))
+                        continue
+                    value = None if expr is None else leaf(expr, env)
+                    if value is _NOT_LEAF:
+                        cpush((RETURN_VALUE, node, env))
+                        cpush((EXEC, expr, env))
+                        continue
+                    if not frames:
+                        evaluator.return_value = value
+                        return RETURN
+                    del conts[frames.pop() - 1:]
+                    push(value)
+                    if limited:
+                        evaluator.depth -= 1
+                elif t is PrintStmt:
+                    cpush((POP, None, None))
+                    cpush((PRINT, node, env))
+                    cpush((EXEC, node.expr, env))
+                elif t is UnaryOp:
+                    cpush((UNARY, node, env))
+                    cpush((EXEC, node.operand, env))
+                elif t is FunctionDecl:
+                    if node.layout is None:
+                        # declaration evaluated outside a resolved program
+                        Resolver(free=None).resolve_function(node)
+                    func = evaluator.memoized(StackFunction(node, env))
+                    if node.slot is None:
+                        env.set(node.name, func)
+                    else:
+                        env.slots[node.slot] = func
+                elif t is Block:
+                    # an if whose condition the optimizer folded away
+                    env = block_env(node, env)
+                    conts.extend([(EXEC, s, env) for s in reversed(node.statements)])
+                else:
+                    raise NotImplementedError('eval_' + t.__name__)
+            elif tag == BINARY:
+                r = pop()
+                values[-1] = ops[node.op](values[-1], r)
+            elif tag == CALL:
+                n = len(node.args)
+                if n:
+                    args = values[-n:]
+                    del values[-n:]
+                else:
+                    args = []
+                callee = pop()
+                # builtin function
+                if callable(callee):
+                    result = callee(*plain_args(args))
+                    if awaiting and isawaitable(result):
+                        result = yield result
+                    push(result)
+                # user function: run its body on this machine
+                elif type(callee) is StackFunction:
+                    memo = callee.memo
+                    if memo is not None:
+                        key, value = memo.get(callee, args)
+                        if value is not MISS:
+                            push(value)
+                            continue
+                        if key is not None:
+                            # stores the call's result once its frame ends
+                            cpush((MEMO, (memo, key), None))
+                    if limited:
+                        due = evaluator.steps + 1 >= evaluator.next_check
+                        evaluator.enter_call()
+                        if due:
+                            yield
+                    cpush((FRAME_END, None, None))
+                    frames.append(len(conts))
+                    env = callee.new_frame(args)
+                    conts.extend([(EXEC, s, env) for s in callee.body])
+                # user function from another backend
+                elif isinstance(callee, Function):
+                    push(callee.call(args, evaluator))
+                else:
+                    raise TypeError('Not callable')
+            elif tag == STORE:
+                if node.slot is None:
+                    env.set(node.name, pop())
+                else:
+                    env.slots[node.slot] = pop()
+            elif tag == POP:
+                pop()
+            elif tag == LOOP or tag == LOOP_TEST:
+                if tag == LOOP:
+                    # back-edge: one iteration done
+                    if limited:
+                        evaluator.steps += 1
+                        if evaluator.steps >= evaluator.next_check:
+                            evaluator.check_limits()
+                            yield
+                    cond = leaf(node.condition, env)
+                    if cond is _NOT_LEAF:
+                        cpush((LOOP_TEST, node, env))
+                        cpush((EXEC, node.condition, env))
+                        continue
+                else:
+                    cond = pop()
+                if cond:
+                    cpush((LOOP, node, env))
+                    conts.extend([(EXEC, s, env) for s in reversed(node.body.statements)])
+            elif tag == FOR or tag == FOR_NEXT:
+                if tag == FOR:
+                    iterator = iter(loop_values(pop()))
+                else:
+                    # back-edge: one iteration done
+                    node, iterator = node
+                    if limited:
+                        evaluator.steps += 1
+                        if evaluator.steps >= evaluator.next_check:
+                            evaluator.check_limits()
+                            yield
+                value = next(iterator, _UNSET)
+                if value is not _UNSET:
+                    if node.slot is None:
+                        env.set(node.name, value)
+                    else:
+                        env.slots[node.slot] = value
+                    cpush((FOR_NEXT, (node, iterator), env))
+                    conts.extend([(EXEC, s, env) for s in reversed(node.body.statements)])
+            elif tag == FRAME_END:
+                # fell off the end of a function body
+                frames.pop()
+                push(None)
+                if limited:
+                    evaluator.depth -= 1
+            elif tag == RETURN_VALUE:
+                if not frames:
+                    evaluator.return_value = pop()
+                    return RETURN
+                del conts[frames.pop() - 1:]
+                if limited:
+                    evaluator.depth -= 1
+            elif tag == TAIL_CALL:
+                call = node.expr
+                n = len(call.args)
+                if n:
+                    args = values[-n:]
+                    del values[-n:]
+                else:
+                    args = []
+                callee = pop()
+                if type(callee) is StackFunction and callee.decl is node.tail:
+                    # self call in tail position: replace the current call's
+                    # continuations instead of stacking a new FRAME_END
+                    del conts[frames[-1]:]
+                    if limited:
+                        evaluator.steps += 1
+                        if evaluator.steps >= evaluator.next_check:
+                            evaluator.check_limits()
+                            yield
+                    env = callee.new_frame(args)
+                    conts.extend([(EXEC, s, env) for s in callee.body])
+                else:
+                    push(callee)
+                    values.extend(args)
+                    cpush((RETURN_VALUE, node, env))
+                    cpush((CALL, call, env))
+            elif tag == LOGICAL:
+                # left operand of && / ||: decide, or go on to the right one
+                if bool(values[-1]) is (node.op == '||'):
+                    values[-1] = node.op == '||'
+                else:
+                    pop()
+                    cpush((TRUTH, None, None))
+                    cpush((EXEC, node.right, env))
+            elif tag == TRUTH:
+                values[-1] = bool(values[-1])
+            elif tag == MEMO:
+                memo, key = node
+                memo.put(key, values[-1])
+            elif tag == BRANCH:
+                block = node.then_block if pop() else node.else_block
+                if block is not None:
+                    env = block_env(block, env)
+                    conts.extend([(EXEC, s, env) for s in reversed(block.statements)])
+            elif tag == UNARY:
+                if node.op == '-':
+                    values[-1] = -values[-1]
+                elif node.op == '!':
+                    values[-1] = not values[-1]
+                else:
+                    raise NotImplementedError(node.op)
+            elif tag == PRINT:
+                v = pop()
+                builtin = cached_global(node, env.globals, 'print')
+                if builtin is evaluator.print_builtin or not callable(builtin):
+                    evaluator.output.write(f'{v}\n')
+                    push(None)
+                else:
+                    result = builtin(plain(v))
+                    if awaiting and isawaitable(result):
+                        result = yield result
+                    push(result)
+            else:
+                raise RuntimeError(f'Bad continuation {tag}')
+        return values[-1] if values else None
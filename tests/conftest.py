@@ -0,0 +1,19 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, ENGINES
+
+
+@pytest.fixture(autouse=True, params=ENGINES)
+def engine(request, monkeypatch):
+    # run every test once per execution backend
+    monkeypatch.setattr(Evaluator, 'default_engine', request.param)
+    return request.param
@@ -0,0 +1,116 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript import arrays
+from ecoscript.arrays import Array
+from ecoscript.evaluator import Evaluator
+
+
+@pytest.fixture(autouse=True, params=['buffer', 'numpy'])
+def backend(request, monkeypatch):
+    # run every test on both array backends; NumPy only where it is installed
+    if request.param == 'numpy':
+        monkeypatch.setattr(arrays, '_numpy', pytest.importorskip('numpy'))
+    else:
+        monkeypatch.setattr(arrays, '_numpy', None)
+    return request.param
+
+
+def run(src):
+    return Evaluator().run_source(src)
+
+
+def test_create_and_inspect():
+    a = run("array(1, 2, 3)")
+    assert isinstance(a, Array)
+    assert a.tolist() == [1, 2, 3]
+    assert run("len(array(1, 2, 3))") == 3
+    assert run("len(zeros(4))") == 4
+    assert run("arange(2, 10, 3)").tolist() == [2, 5, 8]
+    assert run("arange(0, 1, 0.25)").tolist() == [0.0, 0.25, 0.5, 0.75]
+
+
+def test_elements_are_python_numbers():
+    assert type(run("at(array(1, 2), 0)")) is int
+    assert type(run("at(array(1, 2.5), 0)")) is float
+    assert run("at(arange(5), -1)") == 4
+
+
+def test_broadcasting():
+    assert run("array(1, 2, 3) + 1").tolist() == [2, 3, 4]
+    assert run("10 - array(1, 2, 3)").tolist() == [9, 8, 7]
+    assert run("array(1, 2, 3) * array(4, 5, 6)").tolist() == [4, 10, 18]
+    assert run("array(1, 2) / 2").tolist() == [0.5, 1.0]
+    assert run("array(5, 7) % 3").tolist() == [2, 1]
+    assert run("-array(1, 2)").tolist() == [-1, -2]
+
+
+def test_reductions():
+    assert run("sum(arange(101))") == 5050
+    assert run("min(array(3, 1, 2))") == 1
+    assert run("max(array(3, 1, 2))") == 3
+    assert run("min(4, 2)") == 2
+    assert run("dot(array(1, 2, 3), array(4, 5, 6))") == 32
+
+
+def test_slice():
+    assert run("slice(arange(10), 2, 5)").tolist() == [2, 3, 4]
+    assert run("slice(arange(5), 3)").tolist() == [3, 4]
+
+
+def test_equality_is_a_bool():
+    assert run("array(1, 2) == array(1, 2)") is True
+    assert run("array(1, 2) != array(1, 3)") is True
+    assert run("!(array(1) == array(2))") is True
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        run("array(1, 2) + array(1, 2, 3)")
+    with pytest.raises(ZeroDivisionError):
+        run("array(1, 2) / array(1, 0)")
+    with pytest.raises(TypeError):
+        run('array(1, 2) + "x"')
+    with pytest.raises(TypeError):
+        run('array("x")')
+    with pytest.raises(ValueError):
+        run("min(zeros(0))")
+
+
+def test_vectorized_matches_scalar_loop():
+    scalar = run("""let i = 0
+let total = 0
+while (i < 50)
+  let total = total + i * i
+  let i = i + 1
+total""")
+    a = "let a = arange(50)\ndot(a, a)"
+    assert run(a) == scalar
+    assert run("sum(arange(50) * arange(50))") == scalar
+
+
+def test_integer_overflow_is_an_error():
+    # both backends hold 64-bit ints; neither wraps around silently
+    big = 2 ** 62
+    for src in (f"array({big}, 1) * 2", f"array({big}) + array({big})", f"array(-{big}) - {big} - 1",
+                f"-(array(-{big}) * 2)", f"array(1) + {2 ** 64}", f"{2 ** 64} - array(1)"):
+        with pytest.raises(OverflowError, match='64 bits'):
+            run(src)
+    with pytest.raises(OverflowError, match='64 bits'):
+        run(f"array({2 ** 63}, 1)")
+    assert run(f"array({big} - 1) * 2 + 1").tolist() == [2 ** 63 - 1]
+    assert run(f"array(-{big}) * 2").tolist() == [-2 ** 63]
+
+
+def test_reductions_are_exact():
+    big = 2 ** 62
+    assert run(f"sum(array({big}, {big}, {big}))") == 3 * big
+    assert run(f"dot(array({big}, 2), array(2, {big}))") == 4 * big
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import sys
+import time
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.asynceval import AsyncEvaluator
+from ecoscript.evaluator import Limits, StepLimitExceeded, ExecutionTimeout
+from ecoscript.output import MemorySink
+
+LOOP = """let i = 0
+while (i < %d)
+  mark()
+  let i = i + 1
+i"""
+
+FIB = """function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+fib(%d)"""
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_results_match_the_sync_engines():
+    src = FIB % 12 + "\nlet s = \"\"\nlet i = 0\nwhile (i < 3)\n  let s = s + \"ab\"\n  let i = i + 1\ns"
+    assert run(AsyncEvaluator().run_source_async(src)) == 'ababab'
+    assert run(AsyncEvaluator().run_source_async(FIB % 15)) == 610
+
+
+def test_top_level_return():
+    assert run(AsyncEvaluator().run_source_async("return 4\n5")) == 4
+
+
+def test_long_loops_interleave():
+    order = []
+
+    async def script(name):
+        ev = AsyncEvaluator(yield_interval=10)
+        ev.global_env.set('mark', lambda: order.append(name))
+        return await ev.run_source_async(LOOP % 100)
+
+    async def main():
+        return await asyncio.gather(script('a'), script('b'))
+
+    assert run(main()) == [100, 100]
+    # both scripts made progress before either finished
+    assert order.index('b') < order.index('a') + 50
+    switches = sum(1 for x, y in zip(order, order[1:]) if x != y)
+    assert switches >= 10
+
+
+def test_calls_are_scheduling_points():
+    ticks = []
+
+    async def ticker():
+        for _ in range(50):
+            ticks.append(len(ticks))
+            await asyncio.sleep(0)
+
+    async def main():
+        # uncached, so every call really runs
+        ev = AsyncEvaluator(yield_interval=5, memoize=False)
+        task = asyncio.ensure_future(ticker())
+        result = await ev.run_source_async(FIB % 10)
+        seen = len(ticks)
+        await task
+        return result, seen
+
+    result, seen = run(main())
+    assert result == 55
+    assert seen > 5
+
+
+def test_async_builtins_are_awaited():
+    async def double(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    ev = AsyncEvaluator()
+    ev.global_env.set('double', double)
+    src = "function f(n)\n  return double(n) + 1\nlet a = f(20)\nprint(double(a))\na"
+    out = ev.output = MemorySink()
+    assert run(ev.run_source_async(src)) == 41
+    assert out.getvalue() == '82\n'
+
+
+def test_async_builtin_errors_propagate():
+    async def fail():
+        await asyncio.sleep(0)
+        raise KeyError('missing')
+
+    ev = AsyncEvaluator()
+    ev.global_env.set('fail', fail)
+    with pytest.raises(KeyError):
+        run(ev.run_source_async("let x = 1\nfail()"))
+    # the evaluator is usable again afterwards
+    assert run(ev.run_source_async("1 + 1")) == 2
+
+
+def test_async_print_builtin():
+    seen = []
+
+    async def show(v):
+        await asyncio.sleep(0)
+        seen.append(v)
+
+    ev = AsyncEvaluator()
+    ev.global_env.set('print', show)
+    run(ev.run_source_async("print(1)\nprint(\"x\")"))
+    assert seen == [1, 'x']
+
+
+def test_many_waiting_scripts_share_one_loop():
+    async def wait():
+        await asyncio.sleep(0.05)
+        return 1
+
+    async def script():
+        ev = AsyncEvaluator()
+        ev.global_env.set('wait', wait)
+        return await ev.run_source_async("let t = 0\nlet i = 0\nwhile (i < 3)\n  let t = t + wait()\n  let i = i + 1\nt")
+
+    async def main():
+        return await asyncio.gather(*(script() for _ in range(200)))
+
+    start = time.perf_counter()
+    assert run(main()) == [3] * 200
+    assert time.perf_counter() - start < 200 * 3 * 0.05 / 4
+
+
+def test_limits_still_apply():
+    ev = AsyncEvaluator(limits=Limits(max_steps=500), yield_interval=7)
+    ev.global_env.set('mark', lambda: None)
+    with pytest.raises(StepLimitExceeded):
+        run(ev.run_source_async(LOOP % 10000))
+
+    async def stall():
+        await asyncio.sleep(0.02)
+
+    ev = AsyncEvaluator(limits=Limits(timeout=0.05), yield_interval=1)
+    ev.global_env.set('mark', stall)
+    with pytest.raises(ExecutionTimeout):
+        run(ev.run_source_async(LOOP % 100))
+
+
+def test_one_script_at_a_time():
+    async def pause():
+        await asyncio.sleep(0.01)
+
+    async def main():
+        ev = AsyncEvaluator()
+        ev.global_env.set('pause', pause)
+        first = asyncio.ensure_future(ev.run_source_async("pause()\n1"))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await ev.run_source_async("2")
+        return await first
+
+    assert run(main()) == 1
+
+
+def test_sync_entry_points_still_work():
+    ev = AsyncEvaluator(yield_interval=3)
+    assert ev.run_source(FIB % 10) == 55
+
+
+def test_bad_yield_interval():
+    with pytest.raises(ValueError):
+        AsyncEvaluator(yield_interval=0)
@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.batch import BatchWorker, find_scripts, main_batch, run_batch
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'a.eco').write_text("let x = 2\nprint(x * 21)\n")
+    (tmp_path / 'b.eco').write_text("print(x)\n")
+    (tmp_path / 'sub' / 'c.eco').write_text("print('c')\nlet = 1\n")
+    (tmp_path / 'notes.txt').write_text("not a script")
+    return tmp_path
+
+
+def test_find_scripts_recurses_in_order(scripts):
+    names = [os.path.relpath(p, scripts) for p in find_scripts([str(scripts)])]
+    assert names == ['a.eco', 'b.eco', os.path.join('sub', 'c.eco')]
+
+
+def test_each_script_gets_fresh_globals(scripts):
+    worker = BatchWorker()
+    a, b = (worker.run(str(scripts / n)) for n in ('a.eco', 'b.eco'))
+    assert (a['status'], a['stdout'], a['error']) == (0, '42\n', None)
+    # `x` from a.eco must not leak into b.eco
+    assert b['status'] == 1 and b['error'].startswith('NameError')
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run_batch_collects_output_and_status(scripts, jobs):
+    results = list(run_batch(find_scripts([str(scripts)]), jobs=jobs, use_cache=False))
+    assert [r['status'] for r in results] == [0, 1, 1]
+    assert results[2]['stdout'] == 'c\n'
+    assert results[2]['error'].startswith('SyntaxError')
+    assert all(r['time'] >= 0 for r in results)
+
+
+def test_main_batch_writes_json_lines(scripts):
+    out = io.StringIO()
+    assert main_batch([str(scripts)], jobs=2, output=out) == 1
+    lines = [json.loads(l) for l in out.getvalue().splitlines()]
+    assert [os.path.basename(r['file']) for r in lines] == ['a.eco', 'b.eco', 'c.eco']
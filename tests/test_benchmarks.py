@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import suite
+
+
+def result(**phases):
+    return {'results': {'w': {p: {'min': t, 'median': t} for p, t in phases.items()}}}
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    rows = suite.compare(result(parse=0.0115, run=0.013), result(parse=0.010, run=0.010), 0.2)
+    assert [(r[1], r[-1]) for r in rows] == [('parse', False), ('run', True)]
+
+
+def test_compare_ignores_noise_sized_phases():
+    rows = suite.compare(result(tokenize=0.0002), result(tokenize=0.0001), 0.1)
+    assert rows[0][-1] is False
+
+
+def test_suite_writes_json_and_compares(tmp_path, capsys):
+    out = tmp_path / 'run.json'
+    args = ['fib', 'deep_indentation', '--repeat', '1', '--output', str(out)]
+    assert suite.main(args + ['--no-compare']) == 0
+    data = json.loads(out.read_text())
+    assert set(data['results']) == {'fib', 'deep_indentation'}
+    assert set(data['results']['fib']) == set(suite.PHASES)
+    # against itself, only timer noise differs
+    assert suite.main(args + ['--baseline', str(out), '--threshold', '100']) == 0
+    assert '0 regression(s)' in capsys.readouterr().out
@@ -0,0 +1,122 @@
+import os
+import pickle
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript import cli
+from ecoscript.cache import CACHE_DIR_NAME, END_MARKER, ParseCache, file_hash, source_hash
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+
+SRC = "function sq(n)\n  return n * n\nprint(sq(9))\n"
+
+
+def store(cache, name, source):
+    # record an entry the way cli.execute_file does on a miss
+    with cache.writer(name, source_hash(source)) as writer:
+        for _ in writer.record(resolve_program(parse_source(source)).body):
+            pass
+    return writer.committed
+
+
+def load(cache, name, source):
+    return cache.open_entry(name, source_hash(source))
+
+
+def test_miss_then_hit(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    assert load(cache, 'a.eco', SRC) is None
+    assert store(cache, 'a.eco', SRC)
+    assert load(cache, 'a.eco', SRC) == parse_source(SRC).body
+
+
+def test_edited_source_replaces_old_entry(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    store(cache, 'a.eco', SRC)
+    store(cache, 'a.eco', SRC + "print(1)\n")
+    store(cache, 'b.eco', SRC)
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2
+    assert load(cache, 'a.eco', SRC) is None
+
+
+def test_other_interpreter_version_is_dropped(tmp_path):
+    old = ParseCache(str(tmp_path))
+    old.tag = 'eco0_0_1-f0-py30'
+    store(old, 'a.eco', SRC)
+    cache = ParseCache(str(tmp_path))
+    assert load(cache, 'a.eco', SRC) is None
+    store(cache, 'a.eco', SRC)
+    assert all(cache.tag in n for n in os.listdir(tmp_path))
+
+
+def test_lru_eviction_respects_size_bound(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    store(cache, 'probe.eco', SRC)
+    entry_size = os.path.getsize(os.path.join(tmp_path, os.listdir(tmp_path)[0]))
+    cache.clear()
+    cache.max_bytes = entry_size * 2
+    store(cache, 'a.eco', SRC)
+    store(cache, 'b.eco', SRC)
+    # touch a so b is the least recently used
+    os.utime(cache.entry_path('b.eco', SRC), (1, 1))
+    load(cache, 'a.eco', SRC)
+    store(cache, 'c.eco', SRC)
+    assert load(cache, 'b.eco', SRC) is None
+    assert load(cache, 'a.eco', SRC) is not None
+    assert load(cache, 'c.eco', SRC) is not None
+
+
+def test_unreadable_entries_are_dropped(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    path = cache.entry_path('a.eco', SRC)
+    statements = resolve_program(parse_source(SRC)).body
+    first = pickle.dumps(statements[0], pickle.HIGHEST_PROTOCOL)
+    # garbage, a truncated entry, and a statement pickled from a class the
+    # parser no longer has
+    renamed = first.replace(b'FunctionDecl', b'FunctionDefn')
+    for data in (b'not a pickle', first, renamed + END_MARKER):
+        store(cache, 'a.eco', SRC)
+        with open(path, 'wb') as f:
+            f.write(data)
+        assert load(cache, 'a.eco', SRC) is None
+        assert not os.path.exists(path)
+
+
+def test_corrupt_entry_is_reparsed_before_anything_runs(tmp_path, capsys):
+    script = tmp_path / 'prog.eco'
+    script.write_text("print(1)\nprint(2)\n")
+    cli.run_file(str(script))
+    cache = ParseCache.for_script(str(script))
+    path = cache.path_for('prog.eco', file_hash(str(script)))
+    with open(path, 'rb') as f:
+        first = pickle.load(f)
+    # the first statement is intact, the rest is not
+    with open(path, 'wb') as f:
+        f.write(pickle.dumps(first, pickle.HIGHEST_PROTOCOL) + b'garbage' + END_MARKER)
+    cli.run_file(str(script))
+    assert capsys.readouterr().out.split() == ['1', '2', '1', '2']
+    assert cache.open_entry('prog.eco', file_hash(str(script))) is not None
+
+
+def test_run_file_uses_cache_next_to_script(tmp_path, capsys):
+    script = tmp_path / 'prog.eco'
+    script.write_text(SRC)
+    cli.run_file(str(script))
+    cli.run_file(str(script))
+    assert capsys.readouterr().out.split() == ['81', '81']
+    assert len(os.listdir(tmp_path / CACHE_DIR_NAME)) == 1
+
+
+def test_run_file_without_cache(tmp_path, capsys):
+    script = tmp_path / 'prog.eco'
+    script.write_text(SRC)
+    cli.run_file(str(script), use_cache=False)
+    assert capsys.readouterr().out.split() == ['81']
+    assert not (tmp_path / CACHE_DIR_NAME).exists()
@@ -0,0 +1,90 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import textwrap
+import pytest
+
+from ecoscript.evaluator import Evaluator
+
+
+PROGRAMS = [
+    "5 + 3 * 2",
+    "10 / 4 - 7 % 3",
+    "1 && 0 || 1",
+    "!0 == -(-1)",
+    '"hello" + " " + "world"',
+    "let x = 5\nx * 2",
+    """
+    function fact(n)
+      if (n <= 1)
+        return 1
+      return n * fact(n - 1)
+    fact(10)
+    """,
+    """
+    function make_adder(x)
+      function inner(y)
+        return x + y
+      return inner
+    let add5 = make_adder(5)
+    add5(3)
+    """,
+    """
+    let i = 0
+    let total = 0
+    while (i < 50)
+      if (i % 3 == 0)
+        let total = total + i
+      let i = i + 1
+    total
+    """,
+]
+
+
+def run_both(src):
+    src = textwrap.dedent(src)
+    tree_out, compiled_out = [], []
+    tree = Evaluator()
+    tree.global_env.set('print', lambda *a: tree_out.append(a))
+    compiled = Evaluator()
+    compiled.global_env.set('print', lambda *a: compiled_out.append(a))
+    return (tree.run_source(src), tree_out), (compiled.run_compiled(compiled.compile(src)), compiled_out)
+
+
+@pytest.mark.parametrize("src", PROGRAMS)
+def test_compiled_matches_tree_walker(src):
+    tree, compiled = run_both(src)
+    assert compiled == tree
+
+
+def test_compiled_print_output():
+    src = textwrap.dedent("""
+    let i = 0
+    while (i < 3)
+      if (i % 2 == 0)
+        print("even")
+      else
+        print("odd")
+      let i = i + 1
+    """)
+    _, (_, out) = run_both(src)
+    assert out == [("even",), ("odd",), ("even",)]
+
+
+def test_compiled_program_is_reusable():
+    ev = Evaluator()
+    code = ev.compile("function sq(n)\n  return n * n\nsq(7)")
+    assert ev.run_compiled(code) == 49
+    assert ev.run_compiled(code) == 49
+
+
+def test_compiled_unknown_name_raises():
+    ev = Evaluator()
+    with pytest.raises(NameError):
+        ev.run_compiled(ev.compile("missing + 1"))
@@ -79,3 +79,42 @@ def test_closure_and_environment(capsys):
     Evaluator().run_source(src)
     out = capsys.readouterr().out
     assert out.strip() == "8"
+
+
+def test_return_from_inside_loop(capsys):
+    src = textwrap.dedent("""
+    function first_multiple(n, k)
+      let i = 1
+      while (i < 100)
+        if (i % k == 0)
+          if (i > n)
+            return i
+        let i = i + 1
+      return -1
+    print(first_multiple(10, 7))
+    print(first_multiple(500, 7))
+    """)
+    Evaluator().run_source(src)
+    out = capsys.readouterr().out.split()
+    assert out == ["14", "-1"]
+
+
+def test_bare_return_and_fall_through():
+    src = textwrap.dedent("""
+    function nothing()
+      return;
+    function no_return(x)
+      let y = x
+    nothing() == no_return(1)
+    """)
+    assert Evaluator().run_source(src) == True
+
+
+def test_top_level_return_ends_program(capsys):
+    src = textwrap.dedent("""
+    print(1)
+    return 42
+    print(2)
+    """)
+    assert Evaluator().run_source(src) == 42
+    assert capsys.readouterr().out.split() == ["1"]
@@ -0,0 +1,118 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, Limits, StepLimitExceeded
+from ecoscript.incremental import IncrementalParser
+from ecoscript.output import MemorySink
+from ecoscript.parser import ForStmt, parse_source
+from ecoscript.vm import compile_bytecode, disassemble
+
+SUM = """let t = 0
+for (i in range(5))
+  let t = t + i
+t"""
+
+NESTED = """function find(n)
+  let t = 0
+  for (i in range(n))
+    for (j in range(i))
+      if (j == 5)
+        return t * 1000 + i
+      let t = t + j
+  return t
+find(4) * 100000 + find(10)"""
+
+
+def run(src, **kwargs):
+    return Evaluator(**kwargs).run_source(src)
+
+
+def test_parse():
+    stmt = parse_source("for (i in range(3)) { print(i) }").body[0]
+    assert isinstance(stmt, ForStmt)
+    assert stmt.name == 'i'
+    assert (stmt.line, stmt.col) == (1, 1)
+    with pytest.raises(SyntaxError):
+        parse_source("for (i of range(3)) { print(i) }")
+    # `in` is still an ordinary name everywhere else
+    assert run("let in = 2\nin * 3") == 6
+
+
+def test_counted_loop():
+    assert run(SUM) == 10
+    assert run("let t = 0\nfor (i in range(2, 11, 3)) { let t = t * 10 + i }\nt") == 258
+    assert run("let t = 7\nfor (i in range(0)) { let t = 0 }\nt") == 7
+
+
+def test_loop_variable_stays_bound():
+    # like a while body, the loop runs in the enclosing scope
+    assert run("for (i in range(4)) { let last = i * 2 }\ni * 10 + last") == 36
+    src = "function f()\n  for (i in range(3))\n    let x = i\n  return i + x\nf()"
+    assert run(src) == 4
+
+
+def test_return_from_nested_loops():
+    assert run(NESTED) == 4 * 100000 + 30006
+
+
+def test_closures_see_the_counter():
+    src = """function outer()
+  let t = 0
+  function add(k)
+    return t + k
+  for (i in range(4))
+    let t = add(i)
+  return t
+outer()"""
+    assert run(src) == 6
+
+
+def test_iterates_arrays():
+    out = MemorySink()
+    run("for (x in array(1, 2.5)) { print(x * 2) }", output=out)
+    assert out.lines() == ['2.0', '5.0']
+
+
+def test_other_values_are_type_errors():
+    with pytest.raises(TypeError, match='range or an array'):
+        run("for (c in \"abc\") { print(c) }")
+    with pytest.raises(TypeError):
+        run("for (i in range(1.5)) { print(i) }")
+
+
+def test_iterations_count_as_steps():
+    src = "let t = 0\nfor (i in range(n)) { let t = t + 1 }\nt"
+    ev = Evaluator(limits=Limits(max_steps=100))
+    ev.global_env.set('n', 100)
+    assert ev.run_source(src) == 100
+    ev.global_env.set('n', 101)
+    with pytest.raises(StepLimitExceeded):
+        ev.run_source(src)
+
+
+def test_optimized():
+    assert run(SUM.replace('range(5)', 'range(2 + 3)'), optimize=True) == 10
+
+
+def test_disassemble():
+    listing = disassemble(compile_bytecode(parse_source(SUM)))
+    assert 'GET_ITER' in listing
+    assert 'FOR_ITER' in listing
+
+
+def test_incremental_parser_waits_for_the_body():
+    inc = IncrementalParser()
+    inc.append('for (i in range(3))')
+    assert inc.needs_more
+    inc.append('  print(i)')
+    inc.append('')
+    assert not inc.needs_more
+    assert isinstance(inc.parse().body[0], ForStmt)
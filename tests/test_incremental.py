@@ -0,0 +1,166 @@
+import os
+import random
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript import tokenizer
+from ecoscript.evaluator import Evaluator
+from ecoscript.incremental import IncrementalParser
+from ecoscript.parser import parse_source
+
+SOURCE = """let x = 1
+function sq(n)
+  return n * n
+if (x > 0)
+  print(sq(x))
+else
+  print(0)
+while (x < 3) { let x = x + 1 }
+let y = sq(x); print(y)
+"""
+
+
+def positions(statements):
+    return [(s.line, s.col) for s in statements]
+
+
+def assert_same_as_full_parse(inc, text):
+    program = inc.parse()
+    try:
+        expected = parse_source(text)
+    except SyntaxError as e:
+        assert inc.error is not None and str(inc.error) == str(e)
+        return
+    assert inc.error is None
+    assert program.body == expected.body
+    assert positions(program.body) == positions(expected.body)
+
+
+def test_matches_full_parse():
+    inc = IncrementalParser(SOURCE)
+    assert_same_as_full_parse(inc, SOURCE)
+
+
+def test_scan_line_matches_tokenizer():
+    line = "  let s = \"a\\tb\" + f(1.5, x) != 3 && !y;"
+    leading, tokens = tokenizer.scan_line(line, 7)
+    full = [t for t in tokenizer.tokenize(line) if t.type not in ('INDENT', 'DEDENT', 'NEWLINE', 'EOF')]
+    assert leading == 2
+    assert [(t.type, t.value, t.col) for t in tokens] == [(t.type, t.value, t.col) for t in full]
+    assert {t.lineno for t in tokens} == {7}
+    assert tokenizer.scan_line("   ", 1) == (None, [])
+    _, tokens = tokenizer.scan_line("let b = @ 1", 2)
+    assert [t.type for t in tokens] == ['LET', 'IDENT', 'OP', 'MISMATCH']
+
+
+def test_edit_relexes_only_changed_lines():
+    inc = IncrementalParser(SOURCE)
+    inc.parse()
+    before = list(inc.lines)
+    edited = SOURCE.replace('print(0)', 'print(-1)')
+    inc.update(edited)
+    changed = [i for i, (a, b) in enumerate(zip(before, inc.lines)) if a is not b]
+    assert changed == [6]
+    assert_same_as_full_parse(inc, edited)
+
+
+def test_statements_before_the_edit_are_reused():
+    inc = IncrementalParser(SOURCE)
+    first = inc.parse().body
+    edited = SOURCE + 'print(x + y)\n'
+    inc.update(edited)
+    second = inc.parse().body
+    # the last line's statements are parsed again, everything above is kept
+    assert all(a is b for a, b in zip(first[:-2], second))
+    assert second[-3] is not first[-2]
+    assert_same_as_full_parse(inc, edited)
+
+
+def test_inserted_lines_renumber_later_tokens():
+    inc = IncrementalParser(SOURCE)
+    inc.parse()
+    edited = 'let z = 0\n\n' + SOURCE
+    inc.update(edited)
+    assert_same_as_full_parse(inc, edited)
+    inc.update(SOURCE)
+    assert_same_as_full_parse(inc, SOURCE)
+
+
+def test_errors_are_recorded_not_raised():
+    inc = IncrementalParser('let a = 1\nlet b = (2\nlet c = 3\n')
+    program = inc.parse()
+    assert isinstance(inc.error, SyntaxError)
+    assert len(program.body) == 1
+    inc.update('let a = 1\nlet b = @\n')
+    inc.parse()
+    assert 'line 2' in str(inc.error)
+    inc.update('let a = 1\nlet b = 2\n')
+    assert len(inc.parse().body) == 2 and inc.error is None
+
+
+def test_random_edits_match_full_parse():
+    rng = random.Random(20)
+    pieces = ['let a = 1', 'if (a)', '  print(a)', 'else', '  let a = 2', 'function f(x)',
+              '  return x', 'f(a); f(2)', '', 'while (a < 2) {', 'let a = a + 1', '}', '    print(3)']
+    lines = SOURCE.splitlines()
+    inc = IncrementalParser('\n'.join(lines))
+    for _ in range(300):
+        i = rng.randrange(len(lines) + 1)
+        op = rng.random()
+        if op < 0.4 and lines:
+            del lines[min(i, len(lines) - 1)]
+        elif op < 0.7 and lines:
+            lines[min(i, len(lines) - 1)] = rng.choice(pieces)
+        else:
+            lines.insert(i, rng.choice(pieces))
+        text = '\n'.join(lines)
+        inc.update(text)
+        assert_same_as_full_parse(inc, text)
+
+
+@pytest.mark.parametrize('lines, more', [
+    (['let x = 1'], False),
+    (['while (x < 3)'], True),
+    (['while (x < 3)', '  let x = x + 1'], True),
+    (['while (x < 3)', '  let x = x + 1', ''], False),
+    (['if (x) {', '  print(x)'], True),
+    (['if (x) {', '  print(x)', '} else'], True),
+    (['if (x) {', '  print(x)', '}'], False),
+    (['if (x)', '  print(1)', 'else'], True),
+    (['function f()'], True),
+    (['f()'], False),
+    (['let x = @'], False),
+])
+def test_needs_more(lines, more):
+    inc = IncrementalParser()
+    for line in lines:
+        inc.append(line)
+    assert inc.needs_more is more
+
+
+def test_repl_feeds_lines(monkeypatch, capsys, engine):
+    lines = iter(['let i = 0', 'while (i < 2)', '  print(i)', '  let i = i + 1', '',
+                  'function f(n) {', 'return n * 10', '}', 'print(f(i))', 'let = 1', 'print(7)', 'exit'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(lines))
+    from ecoscript import cli
+    cli.repl(engine=engine)
+    out = capsys.readouterr().out.splitlines()
+    assert out[1:4] == ['0', '1', '20']
+    assert out[4].startswith('Error:')
+    assert out[5] == '7'
+
+
+def test_program_runs():
+    inc = IncrementalParser(SOURCE)
+    out = []
+    ev = Evaluator()
+    ev.global_env.set('print', out.append)
+    ev.run_program(inc.parse())
+    assert out == [1, 9]
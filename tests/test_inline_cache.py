@@ -0,0 +1,75 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript.evaluator import Evaluator, Environment
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+READ_GLOBAL = "function get()\n  return limit\nget()"
+
+
+def test_version_changes_on_every_set():
+    env = Environment()
+    before = env.version
+    env.set('x', 1)
+    assert env.version != before
+    other = Environment()
+    assert other.version not in (before, env.version)
+
+
+def test_rebinding_a_global_invalidates_the_cache():
+    ev = Evaluator()
+    program = resolve_program(parse_source(READ_GLOBAL))
+    ev.global_env.set('limit', 1)
+    assert ev.run_program(program) == 1
+    ev.global_env.set('limit', 2)
+    assert ev.run_program(program) == 2
+
+
+def test_global_rebound_by_the_script():
+    src = """function get()
+  return value
+let value = 1
+let a = get()
+let value = 2
+a * 10 + get()"""
+    assert Evaluator().run_source(src) == 12
+
+
+def test_program_shared_between_evaluators():
+    program = resolve_program(parse_source(READ_GLOBAL))
+    evaluators = [Evaluator(), Evaluator()]
+    for i, ev in enumerate(evaluators):
+        ev.global_env.set('limit', i)
+    for _ in range(2):
+        for i, ev in enumerate(evaluators):
+            assert ev.run_program(program) == i
+
+
+def test_restore_invalidates_the_cache():
+    ev = Evaluator()
+    ev.global_env.set('limit', 1)
+    snapshot = ev.snapshot()
+    program = resolve_program(parse_source(READ_GLOBAL))
+    assert ev.run_program(program) == 1
+    ev.global_env.set('limit', 5)
+    assert ev.run_program(program) == 5
+    ev.restore(snapshot)
+    assert ev.run_program(program) == 1
+
+
+def test_print_builtin_replaced_between_runs():
+    ev = Evaluator()
+    program = resolve_program(parse_source("function show(x)\n  print(x)\nshow(1)"))
+    first, second = [], []
+    ev.global_env.set('print', first.append)
+    ev.run_program(program)
+    ev.global_env.set('print', second.append)
+    ev.run_program(program)
+    assert first == [1] and second == [1]
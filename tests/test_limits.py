@@ -0,0 +1,91 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import (CallDepthExceeded, Evaluator, ExecutionTimeout, LimitExceeded,
+                                 Limits, StepLimitExceeded, StringLimitExceeded)
+
+
+LOOP = "let i = 0\nwhile (i < n)\n  let i = i + 1\ni"
+RECURSE = "function down(n)\n  if (n < 1)\n    return 0\n  return down(n - 1) + 1\ndown(n)"
+
+
+def run(src, limits, **variables):
+    ev = Evaluator(limits=limits)
+    for name, value in variables.items():
+        ev.global_env.set(name, value)
+    return ev.run_source(src)
+
+
+def test_step_limit():
+    assert run(LOOP, Limits(max_steps=100), n=100) == 100
+    with pytest.raises(StepLimitExceeded):
+        run(LOOP, Limits(max_steps=100), n=101)
+    # calls are steps too
+    with pytest.raises(StepLimitExceeded):
+        run(RECURSE, Limits(max_steps=50), n=60)
+
+
+def test_timeout_stops_infinite_loop():
+    with pytest.raises(ExecutionTimeout):
+        run("while (1)\n  let x = 1\n", Limits(timeout=0.05))
+
+
+def test_call_depth_limit():
+    assert run(RECURSE, Limits(max_depth=30), n=29) == 29
+    with pytest.raises(CallDepthExceeded):
+        run(RECURSE, Limits(max_depth=30), n=30)
+
+
+def test_python_recursion_becomes_limit_error():
+    if Evaluator().engine in ('vm', 'stack'):
+        # VM and stack machine frames do not use the Python stack
+        assert run(RECURSE, None, n=100000) == 100000
+        return
+    with pytest.raises(CallDepthExceeded):
+        run(RECURSE, None, n=100000)
+
+
+def test_string_limit_checked_before_allocating():
+    src = "let s = 'ab'\nwhile (1)\n  let s = s + s\n"
+    with pytest.raises(StringLimitExceeded):
+        run(src, Limits(max_string=1000))
+    with pytest.raises(StringLimitExceeded):
+        run("'x' * 10000000000", Limits(max_string=1000))
+    assert run("'ab' * 3 + 'c'", Limits(max_string=7)) == 'abababc'
+
+
+def test_string_limit_after_numeric_operands():
+    # + and * see numbers first (long enough for the tree walker to
+    # specialize them), then text
+    src = "function f(a, b)\n  return a + b * 2\nlet t = 0\nfor (i in range(20))\n  let t = f(t, i)\nf(s, u)"
+    limits = Limits(max_string=1000)
+    assert run(src, limits, s='a' * 400, u='b' * 300) == 'a' * 400 + 'b' * 600
+    with pytest.raises(StringLimitExceeded):
+        run(src, limits, s='a', u='b' * 600)
+    with pytest.raises(StringLimitExceeded):
+        run(src, limits, s='a' * 600, u='b' * 250)
+
+
+def test_limits_are_per_run_and_inactive_afterwards():
+    ev = Evaluator(limits=Limits(max_steps=150))
+    ev.global_env.set('n', 100)
+    assert ev.run_source(LOOP) == 100
+    assert ev.run_source(LOOP) == 100
+    assert not ev.limited
+    ev.limits = None
+    ev.global_env.set('n', 1000)
+    assert ev.run_source(LOOP) == 1000
+
+
+def test_errors_share_a_base_class():
+    for cls in (StepLimitExceeded, ExecutionTimeout, CallDepthExceeded, StringLimitExceeded):
+        assert issubclass(cls, LimitExceeded)
+    assert Limits(max_steps=5).replace(timeout=1.0).max_steps == 5
@@ -0,0 +1,182 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript import cli
+from ecoscript.evaluator import Evaluator, Limits
+from ecoscript.memo import MEMO_PROBATION, Memo, MemoStats
+from ecoscript.output import MemorySink
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+FIB = """function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+"""
+
+
+def stats(ev, name):
+    # the MemoStats of the one declaration called `name`
+    found = [s for s in ev.memo_stats.values() if s.decl.name == name]
+    assert len(found) == 1
+    return found[0]
+
+
+def reads(src):
+    # pure_reads of the first function in `src`
+    program = resolve_program(parse_source(src))
+    return program.body[0].pure_reads
+
+
+def test_pure_recursion_is_cached():
+    ev = Evaluator()
+    assert ev.run_source(FIB + 'fib(30)') == 832040
+    fib = stats(ev, 'fib')
+    assert fib.misses == 31
+    assert fib.hits == 28
+    assert ev.memo_report() == 'memo: fib (line 1) 28 hits, 31 misses'
+
+
+def test_opt_out():
+    ev = Evaluator(memoize=False)
+    assert ev.run_source(FIB + 'fib(15)') == 610
+    assert ev.memo_stats == {}
+    assert ev.global_env.get('fib').memo is None
+    assert ev.memo_report() == 'memo: no pure functions called'
+
+
+def test_hits_are_not_steps():
+    ev = Evaluator(limits=Limits(max_steps=1000))
+    assert ev.run_source(FIB + 'fib(90)') == 2880067194370816120
+
+
+def test_purity_analysis():
+    assert reads(FIB) == ('fib',)
+    assert reads("function f(x)\n  let y = x * x\n  return y + 1") == ()
+    assert reads("function f(n)\n  return len(arange(n)) + k") == ('arange', 'k', 'len')
+    assert reads("function f(x)\n  for (i in range(x))\n    let y = i\n  return x") == ('range',)
+    # printing, calling an argument, declaring a closure
+    assert reads("function f(x)\n  print(x)\n  return x") is None
+    assert reads("function f(g, x)\n  return g(x)") is None
+    assert reads("function f(x)\n  function g(y)\n    return y\n  return g(x)") is None
+
+
+def test_closures_over_outer_locals_are_impure():
+    src = "function outer(k)\n  function inner(x)\n    return x + k\n  return inner(1)"
+    inner = resolve_program(parse_source(src)).body[0].body.statements[0]
+    assert inner.pure_reads is None
+
+
+def test_impure_functions_run_every_time():
+    out = MemorySink()
+    ev = Evaluator(output=out)
+    ev.run_source("function f(x)\n  print(x)\n  return x\nf(1)\nf(1)")
+    assert out.lines() == ['1', '1']
+    assert ev.global_env.get('f').memo is None
+
+
+def test_stats_are_per_declaration():
+    # two functions called f, one redefining the other
+    ev = Evaluator()
+    ev.run_source("function f(x)\n  return x + 1\nf(1)\nf(1)\nfunction f(x)\n  return x + 2\nf(1)")
+    assert sorted((s.decl.line, s.hits, s.misses) for s in ev.memo_stats.values()) == [(1, 1, 1), (5, 0, 1)]
+    assert ev.memo_report() == 'memo: f (line 1) 1 hits, 1 misses\nmemo: f (line 5) 0 hits, 1 misses'
+    # a fresh global environment starts fresh counts
+    ev.reset()
+    assert ev.memo_stats == {}
+
+
+def test_global_data_is_not_cached():
+    ev = Evaluator()
+    src = "let k = 2\nfunction f(x)\n  return x * k\nlet a = f(3)\nlet k = 10\na + f(3)"
+    assert ev.run_source(src) == 36
+    assert stats(ev, 'f').hits == 0
+
+
+def test_host_builtins_are_not_cached():
+    calls = []
+    ev = Evaluator()
+    ev.global_env.set('tick', lambda x: calls.append(x) or len(calls))
+    assert ev.run_source("function f(x)\n  return tick(x)\nf(1) + f(1)") == 3
+    assert calls == [1, 1]
+
+
+def test_rebinding_a_callee_clears_the_cache():
+    src = """function g(x)
+  return x + 1
+function f(x)
+  return g(x) * 2
+let a = f(1)
+function g(x)
+  return x + 2
+let b = f(1)
+a * 100 + b"""
+    ev = Evaluator()
+    assert ev.run_source(src) == 406
+    assert stats(ev, 'f').hits == 0
+
+
+def test_argument_types_are_part_of_the_key():
+    ev = Evaluator()
+    ev.run_source("function same(x)\n  return x")
+    ev.global_env.set('t', True)
+    assert type(ev.run_source("same(1)\nsame(1.0)")) is float
+    assert ev.run_source("same(1)\nsame(t)") is True
+    # only the second same(1)
+    assert stats(ev, 'same').hits == 1
+
+
+def test_signed_zeros_are_distinct_arguments():
+    out = MemorySink()
+    ev = Evaluator(output=out)
+    ev.run_source("function same(x)\n  return x\nprint(same(0.0))\nprint(same(-0.0))\nprint(same(0.0))")
+    assert out.lines() == ['0.0', '-0.0', '0.0']
+    assert stats(ev, 'same').hits == 1
+
+
+def test_unhashable_arguments_run_uncached():
+    ev = Evaluator()
+    src = "function total(a)\n  return sum(a)\nlet a = arange(4)\ntotal(a) + total(a)"
+    assert ev.run_source(src) == 12
+    total = stats(ev, 'total')
+    assert (total.hits, total.misses) == (0, 0)
+
+
+def test_mostly_distinct_calls_retire_the_cache():
+    ev = Evaluator()
+    src = "function sq(x)\n  return x * x\nlet t = 0\nfor (i in range(%d))\n  let t = sq(i)\nt"
+    assert ev.run_source(src % (MEMO_PROBATION + 10)) == (MEMO_PROBATION + 9) ** 2
+    memo = ev.global_env.get('sq').memo
+    assert memo.retired
+    assert not memo.cache
+    assert stats(ev, 'sq').misses == MEMO_PROBATION
+
+
+def test_cache_size_is_bounded():
+    ev = Evaluator()
+    ev.run_source("function sq(x)\n  return x * x")
+    sq = ev.global_env.get('sq')
+    sq.memo = Memo(MemoStats(sq.decl), maxsize=2)
+    assert ev.run_source("sq(1)\nsq(2)\nsq(1)\nsq(3)\nsq(4)") == 16
+    # least recently used first
+    assert [key[0] for key in sq.memo.cache] == [3, 4]
+    assert (sq.memo.hits, sq.memo.misses) == (1, 4)
+
+
+def test_cli_memo_flags(tmp_path, monkeypatch, capsys, engine):
+    script = tmp_path / 'fib.eco'
+    script.write_text(FIB + 'print(fib(20))\n')
+    monkeypatch.setattr(sys, 'argv', ['es', '--no-cache', '--engine', engine, '--memo-stats', str(script)])
+    cli.main()
+    out, err = capsys.readouterr()
+    assert out == '6765\n'
+    assert err == 'memo: fib (line 1) 18 hits, 21 misses\n'
+    monkeypatch.setattr(sys, 'argv', ['es', '--no-cache', '--no-memo', '--memo-stats', str(script)])
+    cli.main()
+    assert capsys.readouterr().err == 'memo: no pure functions called\n'
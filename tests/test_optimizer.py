@@ -0,0 +1,84 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+from ecoscript import cli
+from ecoscript.evaluator import Evaluator
+from ecoscript.optimizer import Optimizer, count_nodes, optimize_program
+from ecoscript.parser import *
+
+
+def optimized(src):
+    return optimize_program(parse_source(src)).body
+
+
+def run(src, optimize=True):
+    out = []
+    ev = Evaluator(optimize=optimize)
+    ev.global_env.set('print', lambda v: out.append(v))
+    result = ev.run_source(src)
+    return out, result
+
+
+def test_folds_arithmetic_comparison_and_concat():
+    assert optimized("print((2 + 3) * 4 - 1)") == [PrintStmt(NumberLiteral(19))]
+    assert optimized("print(2 < 3)") == [PrintStmt(NumberLiteral(True))]
+    assert optimized("print('a' + 'b')") == [PrintStmt(StringLiteral('ab'))]
+    assert optimized("print(-(1 + 1))") == [PrintStmt(NumberLiteral(-2))]
+    assert optimized("print(!0)") == [PrintStmt(NumberLiteral(True))]
+
+
+def test_partial_folding_keeps_variables():
+    body = optimized("print(x + 2 * 3)")
+    assert body == [PrintStmt(BinaryOp('+', Identifier('x'), NumberLiteral(6)))]
+
+
+def test_runtime_errors_are_not_folded():
+    body = optimized("print(1 / 0)")
+    assert body == [PrintStmt(BinaryOp('/', NumberLiteral(1), NumberLiteral(0)))]
+    body = optimized("print('a' - 1)")
+    assert isinstance(body[0].expr, BinaryOp)
+
+
+def test_dead_branches_are_removed():
+    src = "if (1 > 2)\n  print(1)\nelse\n  print(2)\nwhile (0)\n  print(3)\nif (0)\n  print(4)\n"
+    assert optimized(src) == [Block([PrintStmt(NumberLiteral(2))])]
+
+
+def test_report_counts_removed_nodes():
+    opt = Optimizer()
+    program = opt.optimize_program(parse_source("print(1 + 2)\nif (0)\n  print(3)\n"))
+    assert opt.nodes_before == 9
+    assert opt.nodes_after == count_nodes(program.body) == 2
+    assert opt.removed == 7
+    assert (opt.folded, opt.branches) == (1, 1)
+    assert '7 removed' in opt.report()
+
+
+def test_optimized_program_behaves_the_same():
+    src = """let x = 2 * 3
+if (x > 1 + 1)
+  let y = x + 10 / 2
+  print(y)
+function f(n)
+  if (1)
+    return n * (4 - 2)
+  return 0
+print(f(x))
+"""
+    assert run(src) == run(src, optimize=False) == ([11.0, 12], None)
+
+
+def test_cli_flag_prints_report(tmp_path, capsys):
+    script = tmp_path / 'p.eco'
+    script.write_text("print(1 + 2)\n")
+    cli.run_file(str(script), optimize=True)
+    cli.run_file(str(script))
+    captured = capsys.readouterr()
+    assert captured.out.split() == ['3', '3']
+    assert 'optimizer: 4 -> 2 nodes' in captured.err
@@ -0,0 +1,143 @@
+import io
+import os
+import subprocess
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript import cli
+from ecoscript.evaluator import Evaluator, Limits, StepLimitExceeded
+from ecoscript.output import MemorySink, StreamSink, MAX_BUFFER_SIZE
+
+LOOP = """let i = 0
+while (i < 5)
+  print(i)
+  let i = i + 1
+"""
+
+
+class CountingStream(io.StringIO):
+    # a non-terminal stream that records how its writes arrive
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_memory_sink_captures_print():
+    out = MemorySink()
+    ev = Evaluator(output=out)
+    ev.run_source('print("a")\nprint(1.5)')
+    ev.global_env.get('print')(1, 'b', True)
+    assert out.lines() == ['a', '1.5', '1 b True']
+
+
+def test_default_sink_writes_to_current_stdout(capsys):
+    Evaluator().run_source(LOOP)
+    assert capsys.readouterr().out == '0\n1\n2\n3\n4\n'
+
+
+def test_size_policy_batches_writes():
+    stream = CountingStream()
+    Evaluator(output=StreamSink(stream, policy='size', buffer_size=4)).run_source(LOOP)
+    assert stream.getvalue() == '0\n1\n2\n3\n4\n'
+    assert stream.writes == 3
+
+
+def test_line_policy_writes_every_line():
+    stream = CountingStream()
+    sink = StreamSink(stream, policy='line')
+    seen = []
+    ev = Evaluator(output=sink)
+    ev.global_env.set('seen', lambda: seen.append(stream.getvalue()))
+    ev.run_source('print(1)\nseen()\nprint(2)')
+    assert seen == ['1\n']
+    assert stream.writes == 2
+
+
+def test_exit_policy_writes_once_per_run():
+    stream = CountingStream()
+    sink = StreamSink(stream, policy='exit')
+    ev = Evaluator(output=sink)
+    ev.global_env.set('seen', lambda: stream.getvalue())
+    assert ev.run_source(LOOP + 'seen()') == ''
+    assert stream.getvalue() == '0\n1\n2\n3\n4\n'
+    assert stream.writes == 1
+    assert sink._limit() == MAX_BUFFER_SIZE
+
+
+def test_output_flushed_when_the_run_fails():
+    stream = CountingStream()
+    ev = Evaluator(output=StreamSink(stream, policy='exit'), limits=Limits(max_steps=200))
+    with pytest.raises(StepLimitExceeded):
+        ev.run_source('print("start")\nlet i = 0\nwhile (1)\n  let i = i + 1')
+    assert stream.getvalue() == 'start\n'
+
+
+def test_auto_policy_follows_the_stream():
+    class Terminal(CountingStream):
+        def isatty(self):
+            return True
+    assert StreamSink(Terminal())._limit() == 0
+    assert StreamSink(CountingStream(), buffer_size=10)._limit() == 10
+
+
+def test_non_callable_print_binding_still_writes_to_the_sink():
+    out = MemorySink()
+    ev = Evaluator(output=out)
+    ev.global_env.set('print', 0)
+    ev.run_source('print(7)')
+    assert out.getvalue() == '7\n'
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        StreamSink(policy='never')
+
+
+def test_cli_output_file(tmp_path, monkeypatch, capsys, engine):
+    script = tmp_path / 'loop.eco'
+    script.write_text(LOOP)
+    target = tmp_path / 'out.txt'
+    monkeypatch.setattr(sys, 'argv', ['es', '--no-cache', '--engine', engine, '--output', str(target),
+                                      str(script)])
+    cli.main()
+    assert target.read_text() == '0\n1\n2\n3\n4\n'
+    assert capsys.readouterr().out == ''
+
+
+def test_cli_unbuffered(tmp_path, monkeypatch, capsys):
+    script = tmp_path / 'loop.eco'
+    script.write_text(LOOP)
+    monkeypatch.setattr(sys, 'argv', ['es', '--no-cache', '--unbuffered', str(script)])
+    cli.main()
+    assert capsys.readouterr().out == '0\n1\n2\n3\n4\n'
+
+
+PIPED = """
+from ecoscript.evaluator import Evaluator
+from ecoscript.parser import parse_source
+ev = Evaluator(engine=%r)
+ev.eval(parse_source('print("hello")'))
+ev.run_source('function f(x)\\n  print(x)')
+ev.global_env.get('f').call([5], ev)
+"""
+
+
+def test_output_outside_a_run_reaches_a_pipe(engine):
+    # eval() and direct calls never end a run, so nothing flushes the
+    # size-buffered sink before the interpreter exits
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    done = subprocess.run([sys.executable, '-c', PIPED % engine], stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, text=True, env=env, timeout=60)
+    assert done.returncode == 0, done.stderr
+    assert done.stdout == 'hello\n5\n'
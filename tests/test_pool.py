@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import ExecutionTimeout
+from ecoscript.pool import EvaluatorPool
+
+
+def test_injected_variables_and_result():
+    pool = EvaluatorPool(size=2)
+    assert pool.run("x * 2 + y", variables={'x': 20, 'y': 2}) == 42
+    assert pool.run("let z = 1\nreturn z + 1") == 2
+
+
+def test_no_state_leaks_between_calls():
+    pool = EvaluatorPool(size=1)
+    pool.run("let secret = 1\nfunction f()\n  return secret\n", variables={'user': 'a'})
+    for name in ('secret', 'f', 'user'):
+        with pytest.raises(NameError):
+            pool.run(name)
+
+
+def test_builtins_survive_reset():
+    out = []
+    pool = EvaluatorPool(size=1, builtins={'emit': out.append, 'print': out.append})
+    pool.run("emit(1)\nprint(2)")
+    pool.run("let emit = 0")
+    pool.run("emit(3)")
+    assert out == [1, 2, 3]
+
+
+def test_programs_are_parsed_once():
+    pool = EvaluatorPool(size=1, cache_size=2)
+    for _ in range(3):
+        pool.run("1 + 1")
+    pool.run("2")
+    pool.run("3")
+    pool.run("1 + 1")
+    assert (pool.hits, pool.misses) == (2, 4)
+
+
+def test_timeout_stops_runaway_scripts():
+    pool = EvaluatorPool(size=1)
+    with pytest.raises(ExecutionTimeout):
+        pool.run("let i = 0\nwhile (1)\n  let i = i + 1\n", timeout=0.05)
+    with pytest.raises(ExecutionTimeout):
+        # no two calls share arguments, so memoization cannot cut this short
+        pool.run("function walk(n, id)\n  if (n < 1)\n    return id\n"
+                 "  return walk(n - 1, id * 2) + walk(n - 1, id * 2 + 1)\nwalk(40, 1)",
+                 timeout=0.05)
+    # the evaluator is reusable afterwards and unlimited again
+    assert pool.run("let i = 0\nwhile (i < 10)\n  let i = i + 1\ni") == 10
+
+
+def test_concurrent_runs():
+    pool = EvaluatorPool(size=3)
+    src = "function fib(n)\n  if (n < 2)\n    return n\n  return fib(n - 1) + fib(n - 2)\nfib(k) + k"
+    results = {}
+    def worker(k):
+        for _ in range(5):
+            results.setdefault(k, set()).add(pool.run(src, variables={'k': k}))
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fib = [0, 1, 1, 2, 3, 5, 8, 13]
+    assert results == {k: {fib[k] + k} for k in range(8)}
+    assert pool.misses == 1
+
+
+
+def test_shared_program_with_different_globals():
+    # the inline caches and BinaryOp specialization written into the shared
+    # Program must not leak one evaluator's bindings into another's run
+    pool = EvaluatorPool(size=2)
+    src = "let t = 0\nlet i = 0\nwhile (i < 20)\n  let t = t + k\n  let i = i + 1\nprint(t)\nt"
+    program = pool.program(src)
+    a, b = [], []
+    with pool.evaluator(variables={'k': 2, 'print': a.append}) as first:
+        with pool.evaluator(variables={'k': 0.5, 'print': b.append}) as second:
+            assert first is not second
+            for _ in range(3):
+                assert first.run_program(program) == 40
+                assert second.run_program(program) == 10.0
+    assert a == [40] * 3
+    assert b == [10.0] * 3 and type(b[0]) is float
+    assert pool.run(src, variables={'k': 3, 'print': a.append}) == 60
+
+
+def test_checked_out_evaluator_is_clean():
+    pool = EvaluatorPool(size=1)
+    with pool.evaluator(variables={'n': 3}) as ev:
+        assert ev.run_source("let m = n + 1\nm") == 4
+    with pool.evaluator() as ev:
+        with pytest.raises(NameError):
+            ev.run_source("m")
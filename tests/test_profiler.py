@@ -0,0 +1,92 @@
+import os
+import re
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript import cli
+from ecoscript.evaluator import Evaluator
+from ecoscript.parser import *
+from ecoscript.profiler import MAIN, Profiler
+
+
+SRC = """function fib(n)
+  if (n < 2)
+    return n
+  return fib(n - 1) + fib(n - 2)
+function spin()
+  let i = 0
+  while (i < 30000)
+    let i = i + 1
+  return i
+print(fib(12))
+print(spin())
+"""
+
+
+def profile(src):
+    out = []
+    # every fib call runs, none is answered from the memo
+    ev = Evaluator(engine='tree', memoize=False)
+    ev.global_env.set('print', lambda v: out.append(v))
+    profiler = Profiler(interval=0.0005)
+    profiler.attach(ev)
+    with profiler:
+        ev.run_source(src)
+    return profiler, out
+
+
+def test_nodes_carry_source_positions():
+    program = parse_source("let x = 1\nif (x)\n  print(x + 2)\n")
+    let, if_stmt = program.body
+    assert (let.line, let.col) == (1, 1)
+    assert (let.expr.line, let.expr.col) == (1, 9)
+    stmt = if_stmt.then_block.statements[0]
+    assert (stmt.line, stmt.col) == (3, 3)
+    assert (stmt.expr.line, stmt.expr.col) == (3, 11)
+
+
+def test_counts_calls_and_attributes_time():
+    profiler, out = profile(SRC)
+    assert out == [144, 30000]
+    assert profiler.calls == {'fib': 465, 'spin': 1}
+    times = profiler.function_times()
+    assert times[MAIN][1] == pytest.approx(sum(profiler.samples.values()))
+    assert times['spin'][1] > 0
+    lines = profiler.line_times()
+    assert set(lines) <= set(range(1, 12))
+    assert lines[8][0] > 0
+
+
+def test_report_and_collapsed_stacks(tmp_path):
+    profiler, _ = profile(SRC)
+    report = profiler.format_report(SRC.splitlines())
+    assert 'spin' in report and 'let i = i + 1' in report
+    path = tmp_path / 'out.collapsed'
+    profiler.write_collapsed(str(path))
+    lines = path.read_text().splitlines()
+    assert lines
+    for line in lines:
+        assert re.fullmatch(r'<main>:\d+(;\w+:\d+)* \d+', line)
+    assert any(line.startswith('<main>:11;spin:8 ') for line in lines)
+
+
+def test_profiler_requires_tree_engine():
+    with pytest.raises(ValueError):
+        Profiler().attach(Evaluator(engine='vm'))
+
+
+def test_run_file_with_profiler(tmp_path, capsys):
+    script = tmp_path / 'p.eco'
+    script.write_text(SRC)
+    profiler = Profiler()
+    cli.run_file(str(script), engine='tree', profiler=profiler)
+    cli.report_profile(profiler, str(script))
+    assert capsys.readouterr().out.split() == ['144', '30000']
+    assert (tmp_path / 'p.eco.collapsed').exists()
@@ -0,0 +1,129 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import textwrap
+
+from ecoscript.evaluator import Evaluator
+from ecoscript.parser import parse_source
+from ecoscript.resolver import GLOBAL, EMPTY_LAYOUT, resolve_program
+
+
+def run(src):
+    return Evaluator().run_source(textwrap.dedent(src))
+
+
+def test_identifiers_get_depth_and_slot():
+    prog = resolve_program(parse_source(textwrap.dedent("""
+    function fib(n)
+      if (n < 2)
+        return n
+      return fib(n - 1) + fib(n - 2)
+    """)))
+    fib = prog.body[0]
+    assert fib.layout.index == {'n': 0}
+    cond = fib.body.statements[0].condition
+    assert (cond.left.depth, cond.left.slot) == (0, 0)
+    callee = fib.body.statements[1].expr.left.callee
+    assert callee.depth == GLOBAL
+    # the if body declares nothing, so it does not get a frame of its own
+    assert fib.body.statements[0].then_block.layout is EMPTY_LAYOUT
+
+
+def test_outer_function_locals_by_depth():
+    prog = resolve_program(parse_source(textwrap.dedent("""
+    function outer(x)
+      function inner(y)
+        return x + y
+      return inner
+    """)))
+    inner = prog.body[0].body.statements[0]
+    add = inner.body.statements[0].expr
+    assert (add.left.depth, add.left.slot) == (1, 0)
+    assert (add.right.depth, add.right.slot) == (0, 0)
+
+
+def test_if_block_binding_shadows_then_expires():
+    assert run("""
+    function f()
+      let x = 1
+      let seen = 0
+      if (1)
+        let x = 2
+        let seen = x
+      return seen * 10 + x
+    f()
+    """) == 1
+
+
+def test_read_before_let_in_same_scope_sees_outer_binding():
+    assert run("""
+    let x = 5
+    function f()
+      let before = x
+      let x = 7
+      return before * 10 + x
+    f()
+    """) == 57
+
+
+def test_loop_binding_visible_on_later_iterations():
+    assert run("""
+    let x = 100
+    function f()
+      let i = 0
+      let total = 0
+      while (i < 3)
+        let total = total + x
+        let x = i
+        let i = i + 1
+      return total
+    f()
+    """) == 101
+
+
+def test_function_sees_outer_binding_declared_after_it():
+    assert run("""
+    function outer()
+      function get()
+        return late
+      let late = 42
+      return get()
+    outer()
+    """) == 42
+
+
+def test_unset_slot_falls_back_to_global():
+    assert run("""
+    let late = 1
+    function outer()
+      function get()
+        return late
+      let first = get()
+      let late = 2
+      return first * 10 + get()
+    outer()
+    """) == 12
+
+
+def test_deep_recursion_locals():
+    assert run("""
+    function sum(n)
+      if (n == 0)
+        return 0
+      return n + sum(n - 1)
+    sum(100)
+    """) == 5050
+
+
+def test_missing_arguments_are_none():
+    assert run("""
+    function f(a, b)
+      return b
+    f(1)
+    """) is None
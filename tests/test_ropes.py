@@ -0,0 +1,113 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, Limits, StringLimitExceeded
+from ecoscript.output import MemorySink
+from ecoscript.ropes import ROPE_MIN_LENGTH, Rope, add, plain
+
+BUILD = """let s = ""
+let i = 0
+while (i < n)
+  let s = s + piece
+  let i = i + 1
+"""
+
+PIECE = 'abcdefghij'
+
+
+def run(src, n=500, piece=PIECE, **kwargs):
+    ev = Evaluator(**kwargs)
+    ev.global_env.set('n', n)
+    ev.global_env.set('piece', piece)
+    ev.global_env.set('kind', lambda v: type(v).__name__)
+    return ev.run_source(src)
+
+
+def test_long_strings_become_ropes():
+    ev = Evaluator()
+    ev.global_env.set('n', 500)
+    ev.global_env.set('piece', PIECE)
+    ev.run_source(BUILD)
+    assert type(ev.global_env.get('s')) is Rope
+    # results handed back to Python are plain strings
+    result = ev.run_source('s')
+    assert type(result) is str and result == PIECE * 500
+    assert type(run('"ab" + "cd"')) is str
+
+
+def test_same_values_as_strings():
+    expected = PIECE * 500
+    assert run(BUILD + 's') == expected
+    assert run(BUILD + 'len(s)') == len(expected)
+    assert run(BUILD + 'kind(s)') == 'str'
+    ev = Evaluator()
+    ev.global_env.set('t', expected)
+    ev.global_env.set('n', 500)
+    ev.global_env.set('piece', PIECE)
+    assert ev.run_source(BUILD + 's == t && !(s != t) && s <= t && !(s < t)') is True
+    assert ev.run_source('(s + "z") > t && t < s + "z" && "z" + s > t') is True
+    assert ev.run_source('let u = s\nlet s = s + "!"\nu == t') is True
+
+
+def test_appending_to_an_older_rope_copies():
+    assert run(BUILD + 'let a = s + "x"\nlet b = s + "y"\nlet c = a + "z"\na + b + c') == \
+        PIECE * 500 + 'x' + PIECE * 500 + 'y' + PIECE * 500 + 'xz'
+
+
+def test_print_writes_the_string():
+    out = MemorySink()
+    run(BUILD + 'print(s)', n=200, output=out)
+    assert out.getvalue() == PIECE * 200 + '\n'
+
+
+def test_other_operators_behave_like_str():
+    s = PIECE * 200
+    assert run(BUILD + 's * 2', n=200) == s * 2
+    assert run(BUILD + '2 * s', n=200) == s * 2
+    assert run(BUILD + 's && 1', n=200) is True
+    assert run(BUILD + 's || 0', n=200) is True
+    assert run(BUILD + '!s', n=200) is False
+    for expr in ('s + 1', '1 + s', 's - 1', '-s', 'array(1) + s'):
+        with pytest.raises(TypeError) as rope_error:
+            run(BUILD + expr, n=200)
+        with pytest.raises(TypeError) as str_error:
+            run('let s = piece\n' + expr)
+        assert str(rope_error.value) == str(str_error.value)
+    with pytest.raises(TypeError, match='not str'):
+        run(BUILD + 'for (c in s) { print(c) }', n=200)
+
+
+def test_string_limit_counts_rope_length():
+    limit = Limits(max_string=ROPE_MIN_LENGTH * 3)
+    assert len(run(BUILD + 's', n=ROPE_MIN_LENGTH * 3 // len(PIECE), limits=limit)) == \
+        ROPE_MIN_LENGTH * 3 // len(PIECE) * len(PIECE)
+    with pytest.raises(StringLimitExceeded):
+        run(BUILD, n=ROPE_MIN_LENGTH * 3 // len(PIECE) + 1, limits=limit)
+    with pytest.raises(StringLimitExceeded):
+        run(BUILD + 's * 4', n=200, limits=limit)
+
+
+def test_rope_parts_are_shared_safely():
+    base = add('x' * ROPE_MIN_LENGTH, 'a')
+    assert type(base) is Rope
+    first = base + 'b'
+    second = base + 'c'
+    assert first.parts is base.parts
+    assert second.parts is not base.parts
+    assert plain(first).endswith('ab') and plain(second).endswith('ac')
+    assert plain(base).endswith('xa')
+    # joining keeps the value and lets later appends start from it
+    assert base.parts == [plain(base)]
+    assert plain(base + base) == plain(base) * 2
+    assert plain(first + 'd').endswith('abd')
+    assert hash(base) == hash(plain(base))
+    assert repr(first) == repr(plain(first))
+    assert f'{first:.3}' == 'xxx'
@@ -0,0 +1,93 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, Limits, SPECIALIZE_AFTER
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+ADD = "function add(a, b)\n  return a + b\n"
+
+
+def add_node(program):
+    return program.body[0].body.statements[0].expr
+
+
+def run_calls(calls):
+    ev = Evaluator(engine='tree')
+    program = resolve_program(parse_source(ADD + calls))
+    return ev.run_program(program), add_node(program)
+
+
+def test_int_operands_specialize():
+    calls = '\n'.join(f'add({i}, 1)' for i in range(SPECIALIZE_AFTER + 1))
+    result, node = run_calls(calls)
+    assert result == SPECIALIZE_AFTER + 1
+    assert node.fast and node.fast.kind is int
+
+
+def test_float_operands_specialize():
+    calls = '\n'.join(f'add({i}.5, 0.25)' for i in range(SPECIALIZE_AFTER + 1))
+    result, node = run_calls(calls)
+    assert result == SPECIALIZE_AFTER + 0.75
+    assert node.fast.kind is float
+
+
+def test_type_change_deoptimizes():
+    calls = '\n'.join(f'add({i}, 1)' for i in range(SPECIALIZE_AFTER + 1))
+    calls += '\nadd("a", "b")'
+    result, node = run_calls(calls)
+    assert result == 'ab'
+    assert node.fast is False
+
+
+def test_mixed_types_never_specialize():
+    result, node = run_calls('add(1, 2.5)\nadd(1, 2)')
+    assert result == 3
+    assert node.fast is False
+
+
+def test_specialized_loop_result_matches():
+    src = """function total(n)
+  let i = 0
+  let t = 0
+  while (i < n)
+    let t = t + i * 2 % 7
+    let i = i + 1
+  return t
+total(200)"""
+    expected = sum(i * 2 % 7 for i in range(200))
+    assert Evaluator().run_source(src) == expected
+
+
+@pytest.mark.parametrize('src, expected', [
+    ('0 && missing()', False),
+    ('1 || missing()', True),
+    ('1 && 0', False),
+    ('1 && 2', True),
+    ('0 || ""', False),
+    ('0 || 2', True),
+])
+def test_logical_operators_short_circuit(src, expected):
+    result = Evaluator().run_source(src)
+    assert result is expected
+
+
+def test_short_circuit_skips_calls():
+    ev = Evaluator()
+    calls = []
+    ev.global_env.set('hit', lambda x: calls.append(x) or x)
+    ev.run_source("function f(a)\n  return a && hit(1)\nf(0)\nf(1)\n0 || hit(2)\n1 || hit(3)")
+    assert calls == [1, 2]
+
+
+def test_short_circuit_under_string_limit():
+    ev = Evaluator(limits=Limits(max_string=100))
+    assert ev.run_source('0 && missing()') is False
@@ -0,0 +1,69 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, Limits, CallDepthExceeded
+from ecoscript.stackeval import StackFunction
+
+COUNT = """function count(n)
+  if (n == 0)
+    return 0
+  return 1 + count(n - 1)
+count(%d)"""
+
+
+def test_recursion_deeper_than_python_stack():
+    ev = Evaluator(engine='stack')
+    assert ev.run_source(COUNT % (sys.getrecursionlimit() * 20)) == sys.getrecursionlimit() * 20
+
+
+def test_depth_limit_still_applies():
+    ev = Evaluator(engine='stack', limits=Limits(max_depth=500))
+    with pytest.raises(CallDepthExceeded):
+        ev.run_source(COUNT % 1000)
+    assert ev.run_source(COUNT % 400) == 400
+
+
+def test_return_from_inside_loop_and_branch():
+    src = """function first_multiple(k, limit)
+  let i = 1
+  while (i < limit)
+    if (i % k == 0)
+      return i
+    let i = i + 1
+  return -1
+first_multiple(7, 100) * 1000 + first_multiple(7, 5)"""
+    assert Evaluator(engine='stack').run_source(src) == 7000 - 1
+
+
+def test_function_without_return_gives_none():
+    ev = Evaluator(engine='stack')
+    assert ev.run_source("function f(x)\n  let y = x\nf(1)") is None
+
+
+def test_top_level_return_ends_program():
+    ev = Evaluator(engine='stack')
+    assert ev.run_source("let x = 1\nreturn x + 1\nprint(x)") == 2
+
+
+def test_stack_function_callable_from_tree_walker():
+    stack = Evaluator(engine='stack')
+    stack.run_source("function double(n)\n  return n * 2")
+    double = stack.global_env.get('double')
+    assert isinstance(double, StackFunction)
+    tree = Evaluator(engine='tree')
+    tree.global_env.set('double', double)
+    assert tree.run_source("double(21)") == 42
+
+
+def test_builtin_calling_back_into_machine():
+    ev = Evaluator(engine='stack')
+    ev.global_env.set('twice', lambda f, x: f.call([f.call([x], ev)], ev))
+    assert ev.run_source("function inc(n)\n  return n + 1\ntwice(inc, 5)") == 7
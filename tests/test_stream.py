@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript import cli
+from ecoscript.cache import CACHE_DIR_NAME
+from ecoscript.evaluator import Evaluator
+
+
+def run_stream(source):
+    out = []
+    ev = Evaluator()
+    ev.global_env.set('print', lambda v: out.append(v))
+    result = ev.run_stream(source)
+    return out, result
+
+
+def test_stream_from_lines():
+    lines = ["let x = 2\n", "function sq(n)\n", "  return n * n\n", "print(sq(x) + 1)\n"]
+    assert run_stream(lines) == ([5], None)
+
+
+def test_stream_from_file_object():
+    src = io.StringIO("let i = 0\nwhile (i < 3)\n  print(i)\n  let i = i + 1\n")
+    assert run_stream(src)[0] == [0, 1, 2]
+
+
+def test_function_called_before_declaration_in_body():
+    src = "function f()\n  return g()\nfunction g()\n  return 7\nprint(f())\n"
+    assert run_stream(src)[0] == [7]
+
+
+def test_statements_run_before_later_syntax_error():
+    out = []
+    ev = Evaluator()
+    ev.global_env.set('print', lambda v: out.append(v))
+    with pytest.raises(SyntaxError):
+        ev.run_stream(["print(1)\n", "print(2)\n", "let = \n"])
+    assert out == [1, 2]
+
+
+def test_top_level_return_stops_reading():
+    def lines():
+        yield "print(1)\n"
+        yield "return 5\n"
+        yield "print(2)\n"
+        raise AssertionError('read past the return')
+    assert run_stream(lines()) == ([1], 5)
+
+
+def test_run_file_streams_through_cache(tmp_path, capsys):
+    script = tmp_path / 'big.eco'
+    script.write_text("".join(f"print({i})\n" for i in range(50)))
+    cli.run_file(str(script))
+    cli.run_file(str(script))
+    cli.run_file(str(script), use_cache=False)
+    out = capsys.readouterr().out.split()
+    assert out == [str(i) for i in range(50)] * 3
+    assert len(os.listdir(tmp_path / CACHE_DIR_NAME)) == 1
+
+
+def test_failed_run_leaves_no_cache_entry(tmp_path):
+    script = tmp_path / 'bad.eco'
+    script.write_text("print(1)\nlet = 2\n")
+    with pytest.raises(SyntaxError):
+        cli.run_file(str(script))
+    assert os.listdir(tmp_path / CACHE_DIR_NAME) == []
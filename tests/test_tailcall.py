@@ -0,0 +1,94 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator, Limits, StepLimitExceeded
+from ecoscript.parser import parse_source
+from ecoscript.resolver import resolve_program
+
+LOOP = """function loop(n, acc)
+  if (n == 0)
+    return acc
+  return loop(n - 1, acc + n)
+loop(%d, 0)"""
+
+# the same recursion with the call out of tail position
+NOT_TAIL = """function loop(n, acc)
+  if (n == 0)
+    return acc
+  return 0 + loop(n - 1, acc + n)
+loop(%d, 0)"""
+
+
+def test_tail_call_is_annotated():
+    program = resolve_program(parse_source(LOOP % 1))
+    decl = program.body[0]
+    tail = decl.body.statements[1]
+    assert tail.tail is decl
+    program = resolve_program(parse_source(NOT_TAIL % 1))
+    assert program.body[0].body.statements[1].tail is None
+
+
+def test_only_self_calls_are_tail_calls():
+    program = resolve_program(parse_source("function f(x)\n  return g(x)\nfunction g(x)\n  return x"))
+    assert program.body[0].body.statements[0].tail is None
+
+
+def test_parameter_shadowing_function_name():
+    src = "function f(f)\n  return f(1)\nfunction one(x)\n  return x\nf(one)"
+    program = resolve_program(parse_source(src))
+    assert program.body[0].body.statements[0].tail is None
+    assert Evaluator().run_source(src) == 1
+
+
+def test_same_result_as_plain_recursion():
+    for n in (0, 1, 10, 50):
+        assert Evaluator().run_source(LOOP % n) == Evaluator().run_source(NOT_TAIL % n)
+
+
+def test_tail_recursion_runs_in_constant_stack():
+    n = sys.getrecursionlimit() * 10
+    assert Evaluator().run_source(LOOP % n) == n * (n + 1) // 2
+
+
+def test_tail_call_inside_while_and_block_scope():
+    src = """function find(n)
+  let i = 0
+  while (i < 3)
+    if (n > 100)
+      let big = n
+      return big
+    let i = i + 1
+    if (i == 2)
+      let next = n * 2
+      return find(next)
+  return -1
+find(1)"""
+    assert Evaluator().run_source(src) == 128
+
+
+def test_each_tail_call_gets_a_fresh_frame():
+    src = """function build(n, prev)
+  function get()
+    return n + prev()
+  if (n == 0)
+    return get
+  return build(n - 1, get)
+function zero()
+  return 0
+let f = build(3, zero)
+f()"""
+    assert Evaluator().run_source(src) == 6
+
+
+def test_tail_calls_count_as_steps():
+    ev = Evaluator(limits=Limits(max_steps=1000))
+    with pytest.raises(StepLimitExceeded):
+        ev.run_source("function spin(n)\n  return spin(n + 1)\nspin(0)")
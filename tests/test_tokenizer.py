@@ -0,0 +1,95 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import types
+import pytest
+
+from ecoscript import tokenizer
+from ecoscript.parser import Parser, parse_source
+
+
+def kinds(src):
+    return [t.type for t in tokenizer.tokenize(src)]
+
+
+def test_iter_tokens_is_lazy():
+    stream = tokenizer.iter_tokens("let x = 1\n$")
+    assert isinstance(stream, types.GeneratorType)
+    assert next(stream).type == 'LET'
+    with pytest.raises(SyntaxError):
+        list(stream)
+
+
+def test_indent_dedent_and_blank_lines():
+    src = "if (x)\n  a\n\n   \n  b\nc\n"
+    assert kinds(src) == ['IF', 'LPAREN', 'IDENT', 'RPAREN', 'NEWLINE',
+                          'INDENT', 'IDENT', 'NEWLINE', 'IDENT', 'NEWLINE',
+                          'DEDENT', 'IDENT', 'NEWLINE', 'EOF']
+
+
+def test_dedents_closed_at_eof():
+    toks = tokenizer.tokenize("if (x)\n  if (y)\n    z")
+    assert [t.type for t in toks[-3:]] == ['DEDENT', 'DEDENT', 'EOF']
+    assert toks[-1].lineno == 3
+
+
+def test_line_endings_and_columns():
+    toks = tokenizer.tokenize("a\r\n  b + 1\rc")
+    assert [(t.type, t.lineno, t.col) for t in toks if t.type == 'IDENT'] == [
+        ('IDENT', 1, 1), ('IDENT', 2, 3), ('IDENT', 3, 1)]
+
+
+def test_literals():
+    toks = tokenizer.tokenize("1 2.5 'a\\tb' \"q\"")
+    assert [t.value for t in toks[:4]] == [1, 2.5, 'a\tb', 'q']
+
+
+@pytest.mark.parametrize('brk', ['\n', '\r', '\v', '\f', '\x1c', '\x85', '\u2028', '\u2029'])
+def test_strings_end_at_line_breaks(brk):
+    # every character that ends a line also ends (unterminated) a string
+    for src in ("'a" + brk + "b'", '"a\\' + brk + 'b"'):
+        with pytest.raises(SyntaxError):
+            tokenizer.tokenize(src)
+
+
+def test_parser_reads_one_token_ahead():
+    pulled = []
+    def tokens():
+        for tok in tokenizer.iter_tokens("a(1)"):
+            pulled.append(tok)
+            yield tok
+    p = Parser(tokens())
+    assert p.peek().value == 'a'
+    assert len(pulled) == 1
+    assert p.advance().value == 'a'
+    assert p.peek().type == 'LPAREN'
+    assert len(pulled) == 2
+    # advancing past the end keeps returning EOF
+    for _ in range(10):
+        p.advance()
+    assert p.peek().type == 'EOF'
+
+
+def test_parse_source_matches_token_list():
+    src = "function f(a)\n  return a + 1\nf(2)\n"
+    assert Parser(tokenizer.tokenize(src)).parse() == parse_source(src)
+
+
+def test_tokens_and_nodes_are_slotted():
+    import dataclasses
+    from ecoscript import parser
+    tok = tokenizer.tokenize("x")[0]
+    assert not hasattr(tok, '__dict__')
+    program = parse_source("function f(a)\n  return -a + 1\nf(2)")
+    nodes = [program, program.body[0], program.body[0].body, program.body[1].expr]
+    assert all(not hasattr(n, '__dict__') for n in nodes)
+    for name in dir(parser):
+        cls = getattr(parser, name)
+        if dataclasses.is_dataclass(cls):
+            assert '__slots__' in cls.__dict__, name
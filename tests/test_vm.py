@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Make sure parent directory is on sys.path so `ecoscript` package can be imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PARENT = os.path.abspath(os.path.join(ROOT, '..'))
+if PARENT not in sys.path:
+    sys.path.insert(0, PARENT)
+
+import pytest
+
+from ecoscript.evaluator import Evaluator
+from ecoscript.output import MemorySink
+from ecoscript.parser import parse_source
+from ecoscript.vm import compile_bytecode, disassemble
+
+
+def test_bytecode_is_compact_array():
+    code = compile_bytecode(parse_source("let x = 1 + 2\nx"))
+    assert code.code.typecode == 'i'
+    assert code.consts == [1, 2]
+    assert code.names == ['x']
+
+
+def test_constant_pool_keeps_types_distinct():
+    code = compile_bytecode(parse_source("1 + 1.0 + 1"))
+    assert code.consts == [1, 1.0]
+    assert [type(c) for c in code.consts] == [int, float]
+
+
+def test_constant_pool_keeps_signed_zeros_distinct():
+    out = MemorySink()
+    Evaluator(engine='vm', optimize=True, output=out).run_source("print(0.0)\nprint(-0.0)")
+    assert out.lines() == ['0.0', '-0.0']
+
+
+def test_disassemble():
+    code = compile_bytecode(parse_source("let x = 1 + 2"))
+    listing = disassemble(code)
+    assert 'BINARY_OP' in listing
+    assert 'STORE_NAME     x' in listing
+
+
+def test_vm_calls_do_not_use_python_stack():
+    ev = Evaluator(engine='vm')
+    src = """function count(n)
+  if (n == 0)
+    return 0
+  return 1 + count(n - 1)
+count(5000)"""
+    assert ev.run_source(src) == 5000
+
+
+def test_vm_function_callable_from_tree_walker():
+    vm = Evaluator(engine='vm')
+    vm.run_source("function double(n)\n  return n * 2")
+    tree = Evaluator(engine='tree')
+    tree.global_env.set('double', vm.global_env.get('double'))
+    assert tree.run_source("double(21)") == 42
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        Evaluator(engine='jit')
@@ -1,10 +1,18 @@
 import re
 
-# We'll tokenize line-by-line and emit INDENT/DEDENT/NEWLINE tokens similar to Python's tokenizer.
+# The whole source is scanned with one compiled pattern; INDENT/DEDENT/NEWLINE
+# tokens are produced inline, like Python's tokenizer, and tokens are yielded
+# lazily so the parser can start before the scan has finished.
+
+# the same line boundaries str.splitlines() recognises (and \r\n)
+LINE_BREAKS = r'\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029'
+
 TOKEN_SPEC = [
     ('NUMBER',   r"\d+(?:\.\d+)?"),
-    # string can be double-quoted or single-quoted, allow escaped chars
-    ('STRING',   r'\"(?:\\.|[^"\\])*\"|\'(?:\\.|[^\'\\])*\''),
+    # string can be double-quoted or single-quoted, allow escaped chars; it
+    # cannot contain a line break
+    ('STRING',   rf'"(?:\\[^{LINE_BREAKS}]|[^"\\{LINE_BREAKS}])*"'
+                 rf"|'(?:\\[^{LINE_BREAKS}]|[^'\\{LINE_BREAKS}])*'"),
     ('IDENT',    r'[A-Za-z_][A-Za-z0-9_]*'),
     ('OP',       r'==|!=|<=|>=|&&|\|\||[+\-*/%<>!=]'),
     ('LPAREN',   r'\('),
@@ -14,14 +22,17 @@ TOKEN_SPEC = [
     ('COMMA',    r','),
     ('SEMICOL',  r';'),
     ('SKIP',     r'[ \t]+'),
+    ('NEWLINE',  rf'\r\n|[{LINE_BREAKS}]'),
     ('MISMATCH', r'.'),
 ]
 
 MASTER_RE = re.compile('|'.join('(?P<%s>%s)' % pair for pair in TOKEN_SPEC))
 KEYWORDS = {'let','var','const','function','return','if','else','while','for','print','true','false','else'}
+_SIMPLE = {'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'COMMA', 'SEMICOL', 'OP'}
 
 
 class Token:
+    __slots__ = ('type', 'value', 'lineno', 'col')
     def __init__(self, type_, value, lineno, col):
         self.type = type_
         self.value = value
@@ -31,79 +42,150 @@ class Token:
         return f"Token({self.type}, {self.value!r}, {self.lineno}, {self.col})"
 
 
-def _tokenize_line(line, lineno, line_offset=0):
-    tokens = []
+def _indent_width(ws):
+    # tabs count as 4 spaces
+    return len(ws) + 3 * ws.count('\t')
+
+
+class Scanner:
+    # Tokenizer state that survives between chunks of input: the indent stack
+    # and the current line number. Each scanned chunk must end on a line
+    # boundary (or be the final chunk).
+    def __init__(self):
+        self.indent_stack = [0]
+        self.lineno = 1
+        self.lines = 0
+
+    def scan(self, text):
+        match = MASTER_RE.match
+        indent_stack = self.indent_stack
+        lineno = self.lineno
+        n = len(text)
+        pos = 0
+        while pos < n:
+            # start of a line: measure indentation
+            line_start = pos
+            m = match(text, pos)
+            leading = 0
+            if m.lastgroup == 'SKIP':
+                leading = _indent_width(m.group())
+                pos = m.end()
+                if pos == n:
+                    self.lines += 1
+                    break
+                m = match(text, pos)
+            if m.lastgroup == 'NEWLINE':
+                # blank line
+                pos = m.end()
+                lineno += 1
+                self.lines += 1
+                continue
+            if leading > indent_stack[-1]:
+                indent_stack.append(leading)
+                yield Token('INDENT', '', lineno, 1)
+            while leading < indent_stack[-1]:
+                indent_stack.pop()
+                yield Token('DEDENT', '', lineno, 1)
+            # tokens of the rest of the line
+            while True:
+                kind = m.lastgroup
+                if kind == 'NEWLINE':
+                    line_end = m.start()
+                    pos = m.end()
+                    break
+                value = m.group()
+                col = pos - line_start + 1
+                pos = m.end()
+                if kind == 'IDENT':
+                    if value in KEYWORDS:
+                        yield Token(value.upper(), value, lineno, col)
+                    else:
+                        yield Token('IDENT', value, lineno, col)
+                elif kind == 'NUMBER':
+                    yield Token('NUMBER', float(value) if '.' in value else int(value), lineno, col)
+                elif kind in _SIMPLE:
+                    yield Token(kind, value, lineno, col)
+                elif kind == 'STRING':
+                    # strip surrounding quotes and decode escapes
+                    val = bytes(value[1:-1], 'utf-8').decode('unicode_escape')
+                    yield Token('STRING', val, lineno, col)
+                elif kind == 'MISMATCH':
+                    self.lineno = lineno
+                    raise SyntaxError(f'Unexpected character {value!r} on line {lineno}')
+                # SKIP: whitespace inside line
+                if pos == n:
+                    line_end = n
+                    break
+                m = match(text, pos)
+            # newline separator
+            yield Token('NEWLINE', '', lineno, line_end - line_start)
+            lineno += 1
+            self.lines += 1
+        self.lineno = lineno
+
+    def finish(self):
+        # close any remaining indents
+        last = self.lines or 1
+        while len(self.indent_stack) > 1:
+            self.indent_stack.pop()
+            yield Token('DEDENT', '', last, 1)
+        yield Token('EOF', '', last, 0)
+
+
+def iter_tokens(code):
+    # lazily tokenize a whole source buffer, or a file object / iterable of
+    # lines scanned one line at a time
+    scanner = Scanner()
+    if isinstance(code, str):
+        yield from scanner.scan(code)
+    else:
+        for line in code:
+            yield from scanner.scan(line)
+    yield from scanner.finish()
+
+
+def tokenize(code: str):
+    return list(iter_tokens(code))
+
+
+def scan_line(text, lineno):
+    # tokens of one line (no line terminator) for the incremental parser:
+    # (leading indent width, tokens), with leading None for a blank line.
+    # INDENT/DEDENT/NEWLINE are left to the caller, which owns the indent
+    # stack. An unexpected character ends the list as a MISMATCH token, so the
+    # caller can raise when (and if) the parser gets that far.
+    match = MASTER_RE.match
+    n = len(text)
     pos = 0
-    while pos < len(line):
-        m = MASTER_RE.match(line, pos)
-        if not m:
-            break
+    m = match(text, pos) if n else None
+    leading = 0
+    if m is not None and m.lastgroup == 'SKIP':
+        leading = _indent_width(m.group())
+        pos = m.end()
+        m = match(text, pos) if pos < n else None
+    if m is None:
+        return None, []
+    tokens = []
+    while True:
         kind = m.lastgroup
         value = m.group()
         col = pos + 1
         pos = m.end()
-        if kind == 'NUMBER':
-            if '.' in value:
-                val = float(value)
-            else:
-                val = int(value)
-            tokens.append(Token('NUMBER', val, lineno, col))
-        elif kind == 'STRING':
-            # strip surrounding quotes and decode escapes
-            val = value[1:-1]
-            val = bytes(val, 'utf-8').decode('unicode_escape')
-            tokens.append(Token('STRING', val, lineno, col))
-        elif kind == 'IDENT':
+        if kind == 'IDENT':
             if value in KEYWORDS:
                 tokens.append(Token(value.upper(), value, lineno, col))
             else:
                 tokens.append(Token('IDENT', value, lineno, col))
-        elif kind == 'OP':
-            tokens.append(Token('OP', value, lineno, col))
-        elif kind in ('LPAREN','RPAREN','LBRACE','RBRACE','COMMA','SEMICOL'):
+        elif kind == 'NUMBER':
+            tokens.append(Token('NUMBER', float(value) if '.' in value else int(value), lineno, col))
+        elif kind in _SIMPLE:
             tokens.append(Token(kind, value, lineno, col))
-        elif kind == 'SKIP':
-            # skip whitespace inside line
-            continue
-        elif kind == 'MISMATCH':
-            raise SyntaxError(f'Unexpected character {value!r} on line {lineno}')
-    return tokens
-
-
-def tokenize(code: str):
-    tokens = []
-    indent_stack = [0]
-    lines = code.splitlines()
-    for i, raw_line in enumerate(lines, start=1):
-        line = raw_line.rstrip('\r\n')
-        # ignore pure blank lines
-        if line.strip() == '':
-            continue
-        # compute indent (use spaces only; tabs converted to 4 spaces)
-        leading = 0
-        for ch in line:
-            if ch == ' ':
-                leading += 1
-            elif ch == '\t':
-                leading += 4
-            else:
-                break
-        if leading > indent_stack[-1]:
-            indent_stack.append(leading)
-            tokens.append(Token('INDENT', '', i, 1))
-        while leading < indent_stack[-1]:
-            indent_stack.pop()
-            tokens.append(Token('DEDENT', '', i, 1))
-        # tokenize the rest of the line
-        content = line.lstrip('\t ')
-        line_tokens = _tokenize_line(content, i, leading)
-        tokens.extend(line_tokens)
-        # newline separator
-        tokens.append(Token('NEWLINE', '', i, len(line)))
-
-    # close any remaining indents
-    while len(indent_stack) > 1:
-        indent_stack.pop()
-        tokens.append(Token('DEDENT', '', len(lines) or 1, 1))
-    tokens.append(Token('EOF', '', len(lines) or 1, 0))
-    return tokens
+        elif kind == 'STRING':
+            val = bytes(value[1:-1], 'utf-8').decode('unicode_escape')
+            tokens.append(Token('STRING', val, lineno, col))
+        elif kind == 'MISMATCH' or kind == 'NEWLINE':
+            tokens.append(Token('MISMATCH', value, lineno, col))
+            return leading, tokens
+        if pos == n:
+            return leading, tokens
+        m = match(text, pos)
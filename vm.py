@@ -0,0 +1,510 @@
+from array import array
+from ecoscript.parser import *
+from ecoscript.evaluator import Environment, Frame, Function, RETURN as RETURN_SIGNAL, BINARY_OPS, \
+    RUNTIME_OPS, _UNSET, loop_values
+from ecoscript.memo import MISS
+from ecoscript.ropes import concat, plain, plain_args
+from ecoscript.resolver import GLOBAL
+
+# Bytecode backend: a compiler from the AST to linear wordcode (opcode, arg
+# pairs held in an array('i')) with a per-code-object constant pool, and a
+# stack VM that runs it. User function calls push a frame onto the VM's own
+# frame list instead of recursing in Python. Variables use the slots assigned
+# by the resolver; LOAD_NAME/STORE_NAME are only emitted for globals.
+
+(LOAD_CONST, LOAD_NAME, STORE_NAME, BINARY_OP, UNARY_NEG, UNARY_NOT, POP,
+ JUMP, JUMP_IF_FALSE, CALL, RETURN, MAKE_FUNCTION, PUSH_ENV, POP_ENV,
+ PRINT, LOAD_GLOBAL, LOAD_FAST, STORE_FAST, LOAD_DEREF, HALT, TAIL_CALL,
+ GET_ITER, FOR_ITER) = range(23)
+
+OPNAMES = ['LOAD_CONST', 'LOAD_NAME', 'STORE_NAME', 'BINARY_OP', 'UNARY_NEG',
+           'UNARY_NOT', 'POP', 'JUMP', 'JUMP_IF_FALSE', 'CALL', 'RETURN',
+           'MAKE_FUNCTION', 'PUSH_ENV', 'POP_ENV', 'PRINT', 'LOAD_GLOBAL',
+           'LOAD_FAST', 'STORE_FAST', 'LOAD_DEREF', 'HALT', 'TAIL_CALL',
+           'GET_ITER', 'FOR_ITER']
+
+# LOAD_FAST packs the name index (for the unset-slot fallback) above the slot.
+FAST_SLOT_BITS = 16
+FAST_SLOT_MASK = (1 << FAST_SLOT_BITS) - 1
+FAST_NAME_LIMIT = 1 << (31 - FAST_SLOT_BITS)
+
+# BINARY_OP's argument indexes this tuple.
+BINARY_OP_NAMES = tuple(BINARY_OPS)
+BINARY_OP_FUNCS = tuple(BINARY_OPS[op] for op in BINARY_OP_NAMES)
+BINARY_ADD = BINARY_OP_NAMES.index('+')
+
+
+class CodeObject:
+    def __init__(self, name, code, consts, names, refs):
+        self.name = name
+        self.code = code      # array('i') of opcode, arg pairs
+        self.consts = consts  # constant pool
+        self.names = names    # identifier pool
+        self.refs = refs      # (depth, slot, name) for LOAD_DEREF
+        # inline caches for LOAD_GLOBAL and PRINT, indexed like names:
+        # (Environment.version, value)
+        self.caches = [None] * len(names)
+    def __repr__(self):
+        return f"<CodeObject {self.name} ({len(self.code) // 2} instructions)>"
+
+
+class FunctionCode:
+    # Constant pool entry for a function declaration.
+    def __init__(self, decl: FunctionDecl, code: CodeObject):
+        self.decl = decl
+        self.code = code
+
+
+class VMFunction(Function):
+    def __init__(self, decl: FunctionDecl, env: Environment, code: CodeObject):
+        super().__init__(decl, env)
+        self.code = code
+    def invoke(self, args, evaluator):
+        # entry point for callers outside the VM loop (e.g. the tree walker)
+        VM(evaluator).run(self.code, self.new_frame(args))
+        return evaluator.return_value
+    def call(self, args, evaluator):
+        if self.memo is not None:
+            return self.memo.call(self, args, evaluator)
+        if evaluator.limited:
+            return evaluator.call_limited(self, args)
+        return self.invoke(args, evaluator)
+
+
+class BytecodeCompiler:
+    def __init__(self, name='<program>'):
+        self.name = name
+        self.code = []
+        self.consts = []
+        self.names = []
+        self.refs = []
+        self._const_index = {}
+        self._name_index = {}
+        self.loops = 0  # enclosing for loops, each holding an iterator on the stack
+
+    def emit(self, op, arg=0):
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, at, target):
+        self.code[at + 1] = target
+
+    def add_const(self, value):
+        # literals are pooled by (type, value); 1, 1.0 and True stay distinct,
+        # and floats go by their hex form so 0.0 and -0.0 do too
+        if isinstance(value, float):
+            key = (float, value.hex())
+        elif value is None or isinstance(value, (int, str)):
+            key = (type(value), value)
+        else:
+            key = None
+        if key is not None and key in self._const_index:
+            return self._const_index[key]
+        self.consts.append(value)
+        if key is not None:
+            self._const_index[key] = len(self.consts) - 1
+        return len(self.consts) - 1
+
+    def add_name(self, name):
+        if name not in self._name_index:
+            self._name_index[name] = len(self.names)
+            self.names.append(name)
+        return self._name_index[name]
+
+    def add_ref(self, depth, slot, name):
+        self.refs.append((depth, slot, name))
+        return len(self.refs) - 1
+
+    def finish(self):
+        return CodeObject(self.name, array('i', self.code), self.consts, self.names, self.refs)
+
+    def compile(self, node):
+        method = getattr(self, 'compile_' + node.__class__.__name__, None)
+        if method is None:
+            raise NotImplementedError('compile_' + node.__class__.__name__)
+        method(node)
+
+    def compile_program(self, node: Program):
+        # the program's value is the value of its last statement; HALT ends
+        # the program normally, a top-level RETURN ends it early
+        if not node.body:
+            self.emit(LOAD_CONST, self.add_const(None))
+        for i, s in enumerate(node.body):
+            self.compile_statement(s, keep=(i == len(node.body) - 1))
+        self.emit(HALT)
+        return self.finish()
+
+    def compile_function(self, node: FunctionDecl):
+        for s in node.body.statements:
+            self.compile_statement(s)
+        self.emit(LOAD_CONST, self.add_const(None))
+        self.emit(RETURN)
+        return self.finish()
+
+    def compile_statement(self, node, keep=False):
+        if isinstance(node, (ExprStmt, PrintStmt)):
+            self.compile(node)
+            if not keep:
+                self.emit(POP)
+            return
+        self.compile(node)
+        if keep:
+            self.emit(LOAD_CONST, self.add_const(None))
+
+    def compile_statements(self, statements):
+        for s in statements:
+            self.compile_statement(s)
+
+    def compile_LetStmt(self, node: LetStmt):
+        if node.expr is None:
+            self.emit(LOAD_CONST, self.add_const(None))
+        else:
+            self.compile(node.expr)
+        self.store(node.name, node.slot)
+
+    def store(self, name, slot):
+        if slot is None:
+            self.emit(STORE_NAME, self.add_name(name))
+        else:
+            self.emit(STORE_FAST, slot)
+
+    def compile_ExprStmt(self, node: ExprStmt):
+        self.compile(node.expr)
+
+    def compile_NumberLiteral(self, node: NumberLiteral):
+        self.emit(LOAD_CONST, self.add_const(node.value))
+
+    def compile_StringLiteral(self, node: StringLiteral):
+        self.emit(LOAD_CONST, self.add_const(node.value))
+
+    def compile_Identifier(self, node: Identifier):
+        depth = node.depth
+        if depth is None:
+            self.emit(LOAD_NAME, self.add_name(node.name))
+        elif depth == GLOBAL:
+            self.emit(LOAD_GLOBAL, self.add_name(node.name))
+        else:
+            name = self.add_name(node.name)
+            if depth == 0 and node.slot <= FAST_SLOT_MASK and name < FAST_NAME_LIMIT:
+                self.emit(LOAD_FAST, name << FAST_SLOT_BITS | node.slot)
+            else:
+                self.emit(LOAD_DEREF, self.add_ref(depth, node.slot, node.name))
+
+    def compile_BinaryOp(self, node: BinaryOp):
+        if node.op in ('&&', '||'):
+            self.compile_logical(node)
+            return
+        if node.op not in BINARY_OPS:
+            raise NotImplementedError(f'Operator {node.op}')
+        self.compile(node.left)
+        self.compile(node.right)
+        self.emit(BINARY_OP, BINARY_OP_NAMES.index(node.op))
+
+    def compile_logical(self, node: BinaryOp):
+        # && and || skip the right operand when the left decides the result;
+        # the result is a bool either way
+        self.compile(node.left)
+        jump_right = self.emit(JUMP_IF_FALSE)
+        if node.op == '&&':
+            self.compile(node.right)
+            self.emit(UNARY_NOT)
+            self.emit(UNARY_NOT)
+            jump_end = self.emit(JUMP)
+            self.patch(jump_right, len(self.code))
+            self.emit(LOAD_CONST, self.add_const(False))
+        else:
+            self.emit(LOAD_CONST, self.add_const(True))
+            jump_end = self.emit(JUMP)
+            self.patch(jump_right, len(self.code))
+            self.compile(node.right)
+            self.emit(UNARY_NOT)
+            self.emit(UNARY_NOT)
+        self.patch(jump_end, len(self.code))
+
+    def compile_UnaryOp(self, node: UnaryOp):
+        self.compile(node.operand)
+        if node.op == '-':
+            self.emit(UNARY_NEG)
+        elif node.op == '!':
+            self.emit(UNARY_NOT)
+        else:
+            raise NotImplementedError(node.op)
+
+    def compile_PrintStmt(self, node: PrintStmt):
+        self.compile(node.expr)
+        self.emit(PRINT, self.add_name('print'))
+
+    def compile_Block(self, node: Block):
+        if node.layout is not None and not node.layout.size:
+            # declares nothing: runs in the enclosing frame
+            self.compile_statements(node.statements)
+            return
+        self.emit(PUSH_ENV, self.add_const(node.layout))
+        self.compile_statements(node.statements)
+        self.emit(POP_ENV)
+
+    def compile_IfStmt(self, node: IfStmt):
+        self.compile(node.condition)
+        jump_else = self.emit(JUMP_IF_FALSE)
+        self.compile_Block(node.then_block)
+        if node.else_block is None:
+            self.patch(jump_else, len(self.code))
+            return
+        jump_end = self.emit(JUMP)
+        self.patch(jump_else, len(self.code))
+        self.compile_Block(node.else_block)
+        self.patch(jump_end, len(self.code))
+
+    def compile_WhileStmt(self, node: WhileStmt):
+        top = len(self.code)
+        self.compile(node.condition)
+        jump_end = self.emit(JUMP_IF_FALSE)
+        self.compile_statements(node.body.statements)
+        self.emit(JUMP, top)
+        self.patch(jump_end, len(self.code))
+
+    def compile_ForStmt(self, node: ForStmt):
+        self.compile(node.iterable)
+        self.emit(GET_ITER)
+        top = self.emit(FOR_ITER)
+        self.store(node.name, node.slot)
+        self.loops += 1
+        self.compile_statements(node.body.statements)
+        self.loops -= 1
+        self.emit(JUMP, top)
+        self.patch(top, len(self.code))
+
+    def compile_FunctionDecl(self, node: FunctionDecl):
+        code = BytecodeCompiler(node.name).compile_function(node)
+        self.emit(MAKE_FUNCTION, self.add_const(FunctionCode(node, code)))
+        self.store(node.name, node.slot)
+
+    def compile_ReturnStmt(self, node: ReturnStmt):
+        # drop the iterators of the for loops being left
+        for _ in range(self.loops):
+            self.emit(POP)
+        if node.tail is not None:
+            # a self call restarts the function; any other callee falls
+            # through to the RETURN like a plain CALL
+            call = node.expr
+            self.compile(call.callee)
+            for a in call.args:
+                self.compile(a)
+            self.emit(TAIL_CALL, len(call.args))
+            self.emit(RETURN)
+            return
+        if node.expr is None:
+            self.emit(LOAD_CONST, self.add_const(None))
+        else:
+            self.compile(node.expr)
+        self.emit(RETURN)
+
+    def compile_CallExpr(self, node: CallExpr):
+        self.compile(node.callee)
+        for a in node.args:
+            self.compile(a)
+        self.emit(CALL, len(node.args))
+
+
+def compile_bytecode(program: Program) -> CodeObject:
+    return BytecodeCompiler().compile_program(program)
+
+
+def compile_statement(node) -> CodeObject:
+    return BytecodeCompiler().compile_program(Program([node]))
+
+
+def disassemble(code: CodeObject):
+    lines = []
+    ops = code.code
+    for pc in range(0, len(ops), 2):
+        op, arg = ops[pc], ops[pc + 1]
+        if op in (LOAD_CONST, MAKE_FUNCTION, PUSH_ENV):
+            detail = repr(code.consts[arg])
+        elif op in (LOAD_NAME, STORE_NAME, LOAD_GLOBAL, PRINT):
+            detail = code.names[arg]
+        elif op == LOAD_FAST:
+            detail = f'{arg & FAST_SLOT_MASK} ({code.names[arg >> FAST_SLOT_BITS]})'
+        elif op == STORE_FAST:
+            detail = str(arg)
+        elif op == LOAD_DEREF:
+            depth, slot, name = code.refs[arg]
+            detail = f'{depth}:{slot} ({name})'
+        elif op == BINARY_OP:
+            detail = BINARY_OP_NAMES[arg]
+        elif op in (JUMP, JUMP_IF_FALSE, CALL, TAIL_CALL, FOR_ITER):
+            detail = str(arg)
+        else:
+            detail = ''
+        lines.append(f'{pc:4d} {OPNAMES[op]:14s} {detail}'.rstrip())
+    return '\n'.join(lines)
+
+
+class VM:
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+
+    def run(self, code: CodeObject, env: Environment):
+        evaluator = self.evaluator
+        limited = evaluator.limited
+        binary_funcs = BINARY_OP_FUNCS
+        # + on a str goes through ropes.concat, unless the string limit's
+        # checked + is in use
+        add = BINARY_ADD
+        if evaluator.binary_ops is not RUNTIME_OPS:
+            binary_funcs = tuple(evaluator.binary_ops[name] for name in BINARY_OP_NAMES)
+            add = None
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        ops, consts, names, refs, caches = code.code, code.consts, code.names, code.refs, code.caches
+        pc = 0
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+            if op == LOAD_FAST:
+                value = env.slots[arg & FAST_SLOT_MASK]
+                if value is _UNSET:
+                    value = env.get(names[arg >> FAST_SLOT_BITS])
+                push(value)
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == BINARY_OP:
+                r = pop()
+                l = stack[-1]
+                if type(l) is str and arg == add:
+                    stack[-1] = concat(l, r)
+                else:
+                    stack[-1] = binary_funcs[arg](l, r)
+            elif op == STORE_FAST:
+                env.slots[arg] = pop()
+            elif op == LOAD_GLOBAL:
+                genv = env.globals
+                cache = caches[arg]
+                if cache is not None and cache[0] == genv.version:
+                    push(cache[1])
+                else:
+                    value = genv.get(names[arg])
+                    caches[arg] = (genv.version, value)
+                    push(value)
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                # a backward jump closes a loop iteration
+                if limited and arg < pc:
+                    evaluator.steps += 1
+                    if evaluator.steps >= evaluator.next_check:
+                        evaluator.check_limits()
+                pc = arg
+            elif op == FOR_ITER:
+                # the loop's iterator is on top of the stack
+                value = next(stack[-1], _UNSET)
+                if value is _UNSET:
+                    pop()
+                    pc = arg
+                else:
+                    push(value)
+            elif op == POP:
+                pop()
+            elif op == CALL or op == TAIL_CALL:
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = []
+                callee = pop()
+                # builtin function
+                if callable(callee):
+                    push(callee(*plain_args(args)))
+                # self tail call: start this function's code again in a new frame
+                elif op == TAIL_CALL and type(callee) is VMFunction and callee.code.code is ops:
+                    if limited:
+                        evaluator.steps += 1
+                        if evaluator.steps >= evaluator.next_check:
+                            evaluator.check_limits()
+                    env = callee.new_frame(args)
+                    pc = 0
+                # user function compiled for this VM: switch frames
+                elif type(callee) is VMFunction:
+                    memo = callee.memo
+                    key = None
+                    if memo is not None:
+                        key, value = memo.get(callee, args)
+                        if value is not MISS:
+                            push(value)
+                            continue
+                    if limited:
+                        evaluator.enter_call()
+                    # RETURN stores the result under `key` in `memo`
+                    frames.append((ops, consts, names, refs, caches, pc, env, memo, key))
+                    env = callee.new_frame(args)
+                    code = callee.code
+                    ops, consts, names, refs, caches = code.code, code.consts, code.names, code.refs, code.caches
+                    pc = 0
+                # user function from another backend
+                elif isinstance(callee, Function):
+                    push(callee.call(args, evaluator))
+                else:
+                    raise TypeError('Not callable')
+            elif op == RETURN:
+                if not frames:
+                    evaluator.return_value = pop()
+                    return RETURN_SIGNAL
+                ops, consts, names, refs, caches, pc, env, memo, key = frames.pop()
+                if key is not None:
+                    memo.put(key, stack[-1])
+                if limited:
+                    evaluator.depth -= 1
+            elif op == PUSH_ENV:
+                layout = consts[arg]
+                if layout is None:
+                    env = Environment(env)
+                else:
+                    env = Frame([_UNSET] * layout.size, env, layout)
+            elif op == POP_ENV:
+                env = env.parent
+            elif op == LOAD_DEREF:
+                depth, slot, name = refs[arg]
+                frame = env
+                for _ in range(depth):
+                    frame = frame.parent
+                value = frame.slots[slot]
+                if value is _UNSET:
+                    value = env.get(name)
+                push(value)
+            elif op == STORE_NAME:
+                env.set(names[arg], pop())
+            elif op == LOAD_NAME:
+                push(env.get(names[arg]))
+            elif op == UNARY_NOT:
+                stack[-1] = not stack[-1]
+            elif op == UNARY_NEG:
+                stack[-1] = -stack[-1]
+            elif op == MAKE_FUNCTION:
+                fn = consts[arg]
+                push(evaluator.memoized(VMFunction(fn.decl, env, fn.code)))
+            elif op == PRINT:
+                v = pop()
+                # `print` is a keyword, so it can only be bound globally
+                genv = env.globals
+                cache = caches[arg]
+                if cache is not None and cache[0] == genv.version:
+                    builtin = cache[1]
+                else:
+                    builtin = genv.get('print')
+                    caches[arg] = (genv.version, builtin)
+                if builtin is evaluator.print_builtin or not callable(builtin):
+                    evaluator.output.write(f'{v}\n')
+                    push(None)
+                else:
+                    push(builtin(plain(v)))
+            elif op == GET_ITER:
+                stack[-1] = iter(loop_values(stack[-1]))
+            elif op == HALT:
+                return pop()
+            else:
+                raise RuntimeError(f'Bad opcode {op}')